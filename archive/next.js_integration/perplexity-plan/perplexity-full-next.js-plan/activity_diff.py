@@ -0,0 +1,226 @@
+# Diff-based storage for activity_logs.old_data / new_data
+#
+# Instead of two full JSONB snapshots per entry, each entry for a resource
+# stores a JSON Patch (RFC 6902) from the previous state, and every
+# CHECKPOINT_INTERVAL-th entry stores the full state. Any state is rebuilt
+# from the nearest checkpoint at or before it plus at most interval - 1
+# patches; old_data of entry n is simply the state after entry n - 1.
+#
+# The activity_logs columns and index for this mode are generated by
+# schema_ddl.activity_log_diff_ddl() into strive_tech_activity_log_diff.sql.
+#
+# The benchmark generates synthetic audit streams and reports storage saved
+# and reconstruction cost for several checkpoint intervals.
+#
+# Usage: python activity_diff.py --resources 2000 --updates 100
+
+import argparse
+import copy
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmark_utils import percentiles
+
+CHECKPOINT_INTERVAL = 50
+
+
+def _escape(key: str) -> str:
+    return key.replace('~', '~0').replace('/', '~1')
+
+
+def _unescape(token: str) -> str:
+    return token.replace('~1', '/').replace('~0', '~')
+
+
+def make_patch(old: Any, new: Any, path: str = '') -> List[dict]:
+    """JSON Patch turning old into new. Objects are diffed key by key, lists
+    of equal length element by element; anything else is replaced whole."""
+    if old == new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key in old:
+            if key not in new:
+                ops.append({'op': 'remove', 'path': f'{path}/{_escape(key)}'})
+        for key, value in new.items():
+            if key not in old:
+                ops.append({'op': 'add', 'path': f'{path}/{_escape(key)}', 'value': value})
+            else:
+                ops.extend(make_patch(old[key], value, f'{path}/{_escape(key)}'))
+        return ops
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        ops = []
+        for index, (before, after) in enumerate(zip(old, new)):
+            ops.extend(make_patch(before, after, f'{path}/{index}'))
+        return ops
+    return [{'op': 'replace', 'path': path, 'value': new}]
+
+
+def apply_patch(document: Any, patch: List[dict]) -> Any:
+    """Apply a patch from make_patch. The input document is not modified."""
+    return _apply_in_place(copy.deepcopy(document), patch)
+
+
+def _apply_in_place(document: Any, patch: List[dict]) -> Any:
+    for op in patch:
+        if op['path'] == '':
+            document = copy.deepcopy(op['value'])
+            continue
+        *parents, last = [_unescape(token) for token in op['path'].split('/')[1:]]
+        target = document
+        for token in parents:
+            target = target[int(token)] if isinstance(target, list) else target[token]
+        if isinstance(target, list):
+            last = int(last)
+        if op['op'] == 'remove':
+            del target[last]
+        else:
+            target[last] = copy.deepcopy(op['value'])
+    return document
+
+
+@dataclass
+class StoredEntry:
+    seq: int
+    is_checkpoint: bool
+    # Full state for checkpoints, JSON Patch from the previous state otherwise
+    payload: Any
+
+
+@dataclass
+class ResourceHistory:
+    checkpoint_interval: int = CHECKPOINT_INTERVAL
+    entries: List[StoredEntry] = field(default_factory=list)
+    _last_state: Optional[Any] = None
+    _last_checkpoint: Optional[int] = None
+
+    def append(self, new_state: Any, checkpoint: bool = False) -> StoredEntry:
+        """checkpoint forces a full state, as for a resource's first entry in a new month partition."""
+        seq = len(self.entries)
+        if checkpoint or self._last_checkpoint is None or seq - self._last_checkpoint >= self.checkpoint_interval:
+            entry = StoredEntry(seq, True, new_state)
+            self._last_checkpoint = seq
+        else:
+            entry = StoredEntry(seq, False, make_patch(self._last_state, new_state))
+        self.entries.append(entry)
+        self._last_state = copy.deepcopy(new_state)
+        return entry
+
+    def state_at(self, seq: int) -> Any:
+        """new_data of entry seq; state_at(seq - 1) is its old_data."""
+        start = seq
+        while not self.entries[start].is_checkpoint:
+            start -= 1
+        state = copy.deepcopy(self.entries[start].payload)
+        for entry in self.entries[start + 1:seq + 1]:
+            state = _apply_in_place(state, entry.payload)
+        return state
+
+
+def encoded_size(value: Any) -> int:
+    return len(json.dumps(value, separators=(',', ':')))
+
+
+def synthetic_customer(rng: random.Random, index: int) -> Dict[str, Any]:
+    return {
+        'id': f'customer-{index}',
+        'name': f'Customer {index}',
+        'email': f'customer{index}@example.test',
+        'phone': '+1555%07d' % rng.randrange(10 ** 7),
+        'company': rng.choice(['Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli']),
+        'status': 'lead',
+        'source': rng.choice(['website', 'referral', 'social', 'email', 'other']),
+        'tags': rng.sample(['vip', 'smb', 'enterprise', 'newsletter', 'trial'], 2),
+        'customFields': {
+            'industry': rng.choice(['saas', 'retail', 'health', 'finance']),
+            'employees': rng.randrange(1, 5000),
+            'notes': ' '.join(rng.choice(['call', 'email', 'demo', 'follow', 'up', 'pricing']) for _ in range(30)),
+        },
+        'assignedTo': {'name': 'Owner', 'email': 'owner@example.test'},
+        'updatedAt': '2025-01-01T00:00:00Z',
+    }
+
+
+def synthetic_update(rng: random.Random, state: Dict[str, Any], step: int) -> Dict[str, Any]:
+    """A typical CRM edit: one to three fields change, plus updatedAt."""
+    state = copy.deepcopy(state)
+    for _ in range(rng.randint(1, 3)):
+        field_name = rng.choice(['status', 'phone', 'tags', 'employees', 'notes', 'company'])
+        if field_name == 'status':
+            state['status'] = rng.choice(['lead', 'prospect', 'active', 'churned'])
+        elif field_name == 'phone':
+            state['phone'] = '+1555%07d' % rng.randrange(10 ** 7)
+        elif field_name == 'tags':
+            state['tags'] = rng.sample(['vip', 'smb', 'enterprise', 'newsletter', 'trial', 'renewal'], rng.randint(0, 3))
+        elif field_name == 'employees':
+            state['customFields']['employees'] = rng.randrange(1, 5000)
+        elif field_name == 'notes':
+            state['customFields']['notes'] += ' updated'
+        else:
+            state['company'] = rng.choice(['Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli'])
+    state['updatedAt'] = f'2025-01-01T00:00:{step % 60:02d}Z'
+    return state
+
+
+def build_streams(resources: int, updates: int, seed: int = 42) -> List[List[Dict[str, Any]]]:
+    rng = random.Random(seed)
+    streams = []
+    for index in range(resources):
+        states = [synthetic_customer(rng, index)]
+        for step in range(updates):
+            states.append(synthetic_update(rng, states[-1], step))
+        streams.append(states)
+    return streams
+
+
+def measure(streams: List[List[Dict[str, Any]]], interval: int, samples: int,
+            seed: int = 7) -> Tuple[int, List[float]]:
+    """Bytes stored in diff mode, and per-reconstruction latency in ms."""
+    histories = []
+    stored = 0
+    for states in streams:
+        history = ResourceHistory(checkpoint_interval=interval)
+        for state in states:
+            stored += encoded_size(history.append(state).payload)
+        histories.append(history)
+
+    rng = random.Random(seed)
+    latencies = []
+    for _ in range(samples):
+        which = rng.randrange(len(streams))
+        seq = rng.randrange(len(streams[which]))
+        started = time.perf_counter()
+        state = histories[which].state_at(seq)
+        latencies.append((time.perf_counter() - started) * 1000)
+        if state != streams[which][seq]:
+            raise AssertionError(f"Reconstruction mismatch for resource {which} at seq {seq}")
+    return stored, latencies
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark diff-based activity log storage')
+    parser.add_argument('--resources', type=int, default=2000)
+    parser.add_argument('--updates', type=int, default=100)
+    parser.add_argument('--intervals', type=int, nargs='+', default=[10, 50, 200])
+    parser.add_argument('--samples', type=int, default=2000)
+    args = parser.parse_args()
+
+    streams = build_streams(args.resources, args.updates)
+    # Full mode stores old_data and new_data for every entry (old_data is null on create)
+    full = sum(encoded_size(states[0]) + sum(encoded_size(before) + encoded_size(after)
+                                             for before, after in zip(states, states[1:]))
+               for states in streams)
+    entries = sum(len(states) for states in streams)
+
+    print("=== STRIVE TECH ACTIVITY LOG DIFF STORAGE BENCHMARK ===\n")
+    print(f"{args.resources:,} resources, {entries:,} audit entries")
+    print(f"  • full snapshots: {full / 1024 / 1024:,.1f} MiB ({full / entries:,.0f} B/entry)")
+    for interval in args.intervals:
+        stored, latencies = measure(streams, interval, args.samples)
+        stats = percentiles(latencies)
+        print(f"  • diffs, checkpoint every {interval:>3}: {stored / 1024 / 1024:,.1f} MiB "
+              f"({stored / entries:,.0f} B/entry, {100 * (1 - stored / full):.1f}% saved)  "
+              f"rebuild p50 {stats['p50']:.3f}ms p99 {stats['p99']:.3f}ms")
@@ -0,0 +1,200 @@
+# Reference implementation and benchmark of the batched activity log writer
+#
+# Mirrors lib/activity-log-writer.ts from script_2.py: entries go into a
+# bounded asyncio queue and a single flusher writes them in batches (the
+# createMany equivalent), on batch size or after a flush interval. A full
+# queue makes log() wait, which pushes back on request handlers instead of
+# buffering without limit.
+#
+# The benchmark replays concurrent customer creates against a simulated
+# database (fixed round-trip latency, limited connection pool, rows landing
+# in SQLite) with the activity log written inline, as the POST route does
+# today, and through the writer.
+#
+# Usage: python activity_log_writer.py --requests 5000 --concurrency 16 64 256
+
+import argparse
+import asyncio
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional
+
+from benchmark_utils import format_latency, percentiles
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH = 500
+MAX_QUEUE = 10_000
+FLUSH_INTERVAL = 0.25
+MAX_ATTEMPTS = 3
+
+
+@dataclass
+class WriterStats:
+    rows: int = 0
+    batches: int = 0
+    failed_rows: int = 0
+    max_depth: int = 0
+    blocked_puts: int = 0
+
+
+class ActivityLogWriter:
+    """Buffers activity log rows and writes them with write_batch in the background."""
+
+    def __init__(self, write_batch: Callable[[List[dict]], Awaitable[None]], max_batch: int = MAX_BATCH,
+                 max_queue: int = MAX_QUEUE, flush_interval: float = FLUSH_INTERVAL):
+        self.write_batch = write_batch
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.stats = WriterStats()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def start(self) -> 'ActivityLogWriter':
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    async def log(self, entry: dict) -> None:
+        if self._closing:
+            raise RuntimeError('ActivityLogWriter is closed')
+        if self._queue.full():
+            self.stats.blocked_puts += 1
+        await self._queue.put(entry)
+        self.stats.max_depth = max(self.stats.max_depth, self._queue.qsize())
+
+    async def close(self) -> None:
+        """Stop accepting entries and wait until everything queued is written."""
+        self._closing = True
+        await self._queue.join()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _next_batch(self) -> List[dict]:
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.flush_interval
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0 or self._closing:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._write_with_retries(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write_with_retries(self, batch: List[dict]) -> None:
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                await self.write_batch(batch)
+                self.stats.rows += len(batch)
+                self.stats.batches += 1
+                return
+            except Exception:
+                if attempt == MAX_ATTEMPTS:
+                    logger.exception("Dropping %d activity log entries", len(batch))
+                    self.stats.failed_rows += len(batch)
+                    return
+                await asyncio.sleep(0.1 * 2 ** attempt)
+
+
+class SimulatedDatabase:
+    """A remote database: every statement costs one round trip plus a small
+    per-row cost, and at most pool_size statements run at once."""
+
+    def __init__(self, rtt: float, per_row: float, pool_size: int):
+        self.rtt = rtt
+        self.per_row = per_row
+        self.pool = asyncio.Semaphore(pool_size)
+        self.round_trips = 0
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute("CREATE TABLE customers (id INTEGER PRIMARY KEY, name TEXT)")
+        self.conn.execute("CREATE TABLE activity_logs (id INTEGER PRIMARY KEY, resource_id INTEGER, action TEXT, new_data TEXT)")
+
+    async def execute(self, sql: str, rows: List[tuple]) -> None:
+        async with self.pool:
+            self.round_trips += 1
+            await asyncio.sleep(self.rtt + self.per_row * len(rows))
+            self.conn.executemany(sql, rows)
+
+    async def create_customer(self, customer_id: int) -> None:
+        await self.execute("INSERT INTO customers VALUES (?, ?)", [(customer_id, f'customer {customer_id}')])
+
+    async def create_activity_logs(self, entries: List[dict]) -> None:
+        await self.execute("INSERT INTO activity_logs (resource_id, action, new_data) VALUES (?, ?, ?)",
+                           [(entry['resource_id'], entry['action'], entry['new_data']) for entry in entries])
+
+
+async def replay(mode: str, requests: int, concurrency: int, rtt: float, per_row: float, pool_size: int):
+    db = SimulatedDatabase(rtt, per_row, pool_size)
+    writer = ActivityLogWriter(db.create_activity_logs).start() if mode == 'batched' else None
+    latencies = []
+    next_id = iter(range(requests))
+
+    async def client():
+        for customer_id in next_id:
+            started = time.perf_counter()
+            await db.create_customer(customer_id)
+            entry = {'resource_id': customer_id, 'action': 'customer_created', 'new_data': '{"status": "lead"}'}
+            if writer:
+                await writer.log(entry)
+            else:
+                await db.create_activity_logs([entry])
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    request_phase = time.perf_counter() - started
+    if writer:
+        await writer.close()
+    logged = db.conn.execute("SELECT count(*) FROM activity_logs").fetchone()[0]
+    return {
+        'throughput': requests / request_phase,
+        'latency': percentiles(latencies),
+        'round_trips': db.round_trips,
+        'logged': logged,
+        'writer': writer.stats if writer else None,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark inline vs batched activity log writes')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[16, 64, 256])
+    parser.add_argument('--rtt-ms', type=float, default=2.0)
+    parser.add_argument('--per-row-ms', type=float, default=0.01)
+    parser.add_argument('--pool-size', type=int, default=10)
+    args = parser.parse_args()
+
+    print("=== STRIVE TECH ACTIVITY LOG WRITER BENCHMARK ===\n")
+    print(f"Simulated database: {args.rtt_ms}ms round trip, pool of {args.pool_size} connections\n")
+    for concurrency in args.concurrency:
+        print(f"{concurrency} concurrent clients, {args.requests:,} customer creates")
+        for mode in ('inline', 'batched'):
+            result = asyncio.run(replay(mode, args.requests, concurrency, args.rtt_ms / 1000,
+                                        args.per_row_ms / 1000, args.pool_size))
+            print(f"  • {mode:<8} {result['throughput']:>8,.0f} req/s  {format_latency(result['latency'])}  "
+                  f"round trips {result['round_trips']:,}  logged {result['logged']:,}")
+            if result['writer']:
+                stats = result['writer']
+                print(f"             {stats.batches:,} batches, max queue depth {stats.max_depth:,}, "
+                      f"{stats.blocked_puts:,} blocked puts, {stats.failed_rows} failed rows")
+        print()
@@ -0,0 +1,134 @@
+# Benchmark chat turns: rewriting ai_conversations.conversation_data vs appending to ai_messages
+#
+# Plays conversations of 10 to 1000 turns (a user message and an assistant
+# reply each) against a file-backed SQLite database in WAL mode, once
+# appending both messages to the jsonb-style blob and once inserting them
+# into the append-only store from schema_ddl.ai_messages_ddl(). Bytes
+# written are the WAL bytes each commit adds, i.e. every page the turn
+# dirtied, so they include index pages and blob overflow pages. The blob
+# database is then migrated and checked message for message.
+#
+# Usage: python ai_messages_benchmark.py --turns 10 100 1000
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple
+
+from benchmark_utils import format_latency, percentiles
+from schema_ddl import ai_messages_ddl, ai_messages_migration_sql, load_sqlite
+from schema_spec import load_tables
+
+# Checkpoint once the WAL passes this, so a 1000-turn blob run stays bounded on disk
+WAL_LIMIT = 64 * 1024 * 1024
+
+WORDS = ('the customer asked about invoice renewal project deadline pipeline kanban task summary draft '
+         'email follow up meeting notes budget quarter revenue forecast churn onboarding contract').split()
+
+Message = Dict[str, object]
+
+
+def make_turns(turns: int, seed: int) -> List[Tuple[Message, Message]]:
+    rng = random.Random(seed)
+
+    def message(role: str, low: int, high: int) -> Message:
+        content = ' '.join(rng.choices(WORDS, k=rng.randint(low, high)))
+        return {'role': role, 'content': content, 'tokens': len(content) // 4}
+    return [(message('user', 10, 60), message('assistant', 40, 250)) for _ in range(turns)]
+
+
+def open_database(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA wal_autocheckpoint = 0")
+    load_sqlite(load_tables(), conn)
+    conn.executescript(ai_messages_ddl('sqlite'))
+    conn.execute("INSERT INTO ai_conversations (id, title, conversation_data, usage_tokens, created_at) "
+                 "VALUES ('c1', 'benchmark', '{\"messages\": []}', 0, '2026-01-01T00:00:00Z')")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return conn
+
+
+def rewrite_blob(conn, user: Message, reply: Message) -> None:
+    # json_insert in SQL: the server never ships the blob to the app, yet still rewrites all of it
+    conn.execute("BEGIN")
+    conn.execute("UPDATE ai_conversations SET conversation_data = json_insert(conversation_data, "
+                 "'$.messages[#]', json(?), '$.messages[#]', json(?)), usage_tokens = usage_tokens + ?, "
+                 "updated_at = CURRENT_TIMESTAMP WHERE id = 'c1'",
+                 (json.dumps(user), json.dumps(reply), user['tokens'] + reply['tokens']))
+    conn.execute("COMMIT")
+
+
+def append_messages(conn, user: Message, reply: Message) -> None:
+    conn.execute("BEGIN")
+    count = conn.execute("UPDATE ai_conversations SET message_count = message_count + 2, "
+                         "usage_tokens = usage_tokens + ?, updated_at = CURRENT_TIMESTAMP WHERE id = 'c1' "
+                         "RETURNING message_count", (user['tokens'] + reply['tokens'],)).fetchone()[0]
+    conn.executemany("INSERT INTO ai_messages (conversation_id, seq, role, content, tokens) VALUES ('c1', ?, ?, ?, ?)",
+                     [(count - 2, user['role'], user['content'], user['tokens']),
+                      (count - 1, reply['role'], reply['content'], reply['tokens'])])
+    conn.execute("COMMIT")
+
+
+def play(path: str, turns: List[Tuple[Message, Message]], write: Callable) -> Tuple[sqlite3.Connection, List[int], List[float]]:
+    """Run every turn; returns the connection, WAL bytes and latency (ms) per turn."""
+    conn = open_database(path)
+    wal = path + '-wal'
+    written, latencies = [], []
+    for user, reply in turns:
+        before = os.path.getsize(wal)
+        started = time.perf_counter()
+        write(conn, user, reply)
+        latencies.append((time.perf_counter() - started) * 1000)
+        after = os.path.getsize(wal)
+        written.append(after - before)
+        if after > WAL_LIMIT:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return conn, written, latencies
+
+
+def stored_messages(conn) -> List[Tuple[int, str, str, int]]:
+    return conn.execute("SELECT seq, role, content, tokens FROM ai_messages WHERE conversation_id = 'c1' "
+                        "ORDER BY seq").fetchall()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark jsonb conversation rewrites against append-only messages')
+    parser.add_argument('--turns', type=int, nargs='+', default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    print("=== STRIVE TECH AI MESSAGE STORE BENCHMARK ===\n")
+    with tempfile.TemporaryDirectory() as directory:
+        for count in args.turns:
+            turns = make_turns(count, seed=count)
+            payload = sum(len(json.dumps(message)) for turn in turns for message in turn)
+            print(f"{count:,} turns, {payload / 1024:,.0f} KiB of messages")
+            print("-" * 60)
+            runs = {}
+            for name, write in (('jsonb rewrite', rewrite_blob), ('append-only', append_messages)):
+                path = os.path.join(directory, f'{name.split()[0]}-{count}.db')
+                conn, written, latencies = play(path, turns, write)
+                runs[name] = conn
+                tail = written[-max(count // 10, 1):]
+                print(f"  • {name:<13} {sum(written) / 1024 / 1024:>9,.1f} MiB written "
+                      f"({sum(written) / payload:,.1f}x the messages), last turns {sum(tail) / len(tail) / 1024:,.1f} KiB/turn")
+                print(f"    {'':<13} {format_latency(percentiles(latencies))}, "
+                      f"last turns p50 {percentiles(latencies[-len(tail):])['p50']:.3f}ms")
+
+            # Migrate the blob database and compare with the messages appended directly
+            blob = runs['jsonb rewrite']
+            blob.execute("DELETE FROM ai_messages")
+            started = time.perf_counter()
+            blob.executescript(ai_messages_migration_sql('sqlite'))
+            migrated = stored_messages(blob)
+            matches = migrated == stored_messages(runs['append-only'])
+            recount = blob.execute("SELECT message_count FROM ai_conversations WHERE id = 'c1'").fetchone()[0]
+            print(f"  • migration: {len(migrated):,} messages in {(time.perf_counter() - started) * 1000:,.1f}ms, "
+                  f"{'identical to' if matches and recount == len(migrated) else 'DIFFERENT FROM'} the appended store\n")
+            for conn in runs.values():
+                conn.close()
@@ -0,0 +1,297 @@
+# Latency-aware router over the AI providers of ai_conversations.ai_model
+#
+# Every provider keeps a rolling window of its latencies and outcomes. A
+# request goes to the healthy provider with the lowest rolling median; a
+# provider whose recent error rate passes MAX_ERROR_RATE only gets one probe
+# request every PROBE_INTERVAL seconds until it recovers. If the chosen
+# provider has not answered by its own rolling p95 (or the p95 budget, when
+# that is lower), the router sends a hedged request to the next provider and
+# takes whichever answers first, cancelling the other. Hedges are capped at
+# MAX_HEDGE_RATIO of requests so a slow period cannot double the load, and
+# errors fail over to the next provider straight away.
+#
+# The benchmark drives the router with mock providers whose latencies are
+# log-normal with occasional stalls, with steady providers and with the
+# fastest one degrading halfway, and compares tail latency with sending
+# everything to one provider and with routing without hedges.
+#
+# Usage: python ai_router.py --requests 3000 --concurrency 32
+
+import argparse
+import asyncio
+import math
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from benchmark_utils import format_latency, percentiles
+from schema_spec import load_tables
+
+WINDOW = 200
+MIN_SAMPLES = 10
+MAX_ERROR_RATE = 0.25
+PROBE_INTERVAL = 1.0
+MAX_HEDGE_RATIO = 0.1
+EXPLORE_RATE = 0.02
+
+Provider = Callable[[Any], Awaitable[Any]]
+
+
+class ProviderError(Exception):
+    pass
+
+
+class AllProvidersFailed(Exception):
+    pass
+
+
+class ProviderStats:
+    """Rolling latency (seconds) and outcome window of one provider."""
+
+    def __init__(self, window: int = WINDOW):
+        self.latencies: deque = deque(maxlen=window)
+        self.outcomes: deque = deque(maxlen=window)
+        self.last_probe = -math.inf
+        self._sorted: Optional[List[float]] = None
+
+    def record(self, latency: float, ok: bool) -> None:
+        self.outcomes.append(ok)
+        if ok:
+            self.record_latency(latency)
+
+    def record_latency(self, latency: float) -> None:
+        """A latency without an outcome, e.g. a lower bound from a request that was cancelled."""
+        self.latencies.append(latency)
+        self._sorted = None
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        if self._sorted is None:
+            self._sorted = sorted(self.latencies)
+        return self._sorted[min(int(q * len(self._sorted)), len(self._sorted) - 1)]
+
+    @property
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return len(self.outcomes) < MIN_SAMPLES or self.error_rate <= MAX_ERROR_RATE
+
+
+@dataclass
+class RouterStats:
+    requests: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    failovers: int = 0
+    failures: int = 0
+    served: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class RoutedResponse:
+    provider: str
+    response: Any
+    latency: float
+    hedged: bool
+
+
+class AIRouter:
+    """Routes requests to the fastest healthy provider, hedging slow ones."""
+
+    def __init__(self, providers: Dict[str, Provider], hedge: bool = True, p95_budget: Optional[float] = None,
+                 max_hedge_ratio: float = MAX_HEDGE_RATIO, explore_rate: float = EXPLORE_RATE,
+                 seed: Optional[int] = None):
+        self.providers = providers
+        self.hedge = hedge
+        self.p95_budget = p95_budget
+        self.max_hedge_ratio = max_hedge_ratio
+        self.explore_rate = explore_rate
+        self.health = {name: ProviderStats() for name in providers}
+        self.stats = RouterStats(served={name: 0 for name in providers})
+        self._hedge_tokens = 1.0
+        self._random = random.Random(seed)
+
+    def ranked(self, now: float) -> List[str]:
+        """Providers to try in order: healthy ones by rolling median, then the rest."""
+        healthy, unhealthy = [], []
+        for name, health in self.health.items():
+            if health.healthy:
+                healthy.append(name)
+            elif now - health.last_probe >= PROBE_INTERVAL:
+                # Half-open: one request finds out whether it has recovered; launch() stamps the probe
+                healthy.append(name)
+            else:
+                unhealthy.append(name)
+        # Providers without samples yet sort first so they get measured
+        healthy.sort(key=lambda name: self.health[name].quantile(0.5) or 0.0)
+        unhealthy.sort(key=lambda name: self.health[name].error_rate)
+        order = healthy + unhealthy
+        if len(healthy) > 1 and self._random.random() < self.explore_rate:
+            # Occasionally lead with another healthy provider to keep its numbers fresh
+            pick = self._random.randrange(1, len(healthy))
+            order[0], order[pick] = order[pick], order[0]
+        return order
+
+    def hedge_delay(self, name: str) -> Optional[float]:
+        p95 = self.health[name].quantile(0.95)
+        if p95 is None or len(self.health[name].latencies) < MIN_SAMPLES:
+            return self.p95_budget
+        return p95 if self.p95_budget is None else min(p95, self.p95_budget)
+
+    async def complete(self, request: Any) -> RoutedResponse:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        self.stats.requests += 1
+        self._hedge_tokens = min(self._hedge_tokens + self.max_hedge_ratio, 10.0)
+        remaining = self.ranked(started)
+        pending: Dict[asyncio.Task, tuple] = {}
+        hedged = False
+
+        def launch(name: str) -> float:
+            task = loop.create_task(self.providers[name](request))
+            launched = loop.time()
+            pending[task] = (name, launched)
+            if not self.health[name].healthy:
+                self.health[name].last_probe = launched
+            return launched
+
+        primary = remaining.pop(0)
+        launched = launch(primary)
+        hedge_at = self.hedge_delay(primary) if self.hedge else None
+        try:
+            while pending:
+                timeout = None
+                if hedge_at is not None and remaining:
+                    timeout = max(launched + hedge_at - loop.time(), 0.0)
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedge_at = None
+                    if self._hedge_tokens >= 1.0:
+                        self._hedge_tokens -= 1.0
+                        self.stats.hedges += 1
+                        hedged = True
+                        launch(remaining.pop(0))
+                    continue
+                for task in done:
+                    name, task_started = pending.pop(task)
+                    latency = loop.time() - task_started
+                    if task.exception() is None:
+                        self.health[name].record(latency, ok=True)
+                        self.stats.served[name] += 1
+                        self.stats.hedge_wins += hedged and name != primary
+                        return RoutedResponse(name, task.result(), loop.time() - started, hedged)
+                    self.health[name].record(latency, ok=False)
+                if not pending and remaining:
+                    self.stats.failovers += 1
+                    primary = remaining.pop(0)
+                    launched = launch(primary)
+                    hedge_at = self.hedge_delay(primary) if self.hedge else None
+            self.stats.failures += 1
+            raise AllProvidersFailed(f"no provider answered request {request!r}")
+        finally:
+            for task, (name, task_started) in pending.items():
+                task.cancel()
+                # A cancelled loser took at least this long, which keeps slow providers ranked low, but
+                # it neither succeeded nor failed, so it does not count towards the error rate
+                self.health[name].record_latency(loop.time() - task_started)
+
+
+@dataclass
+class LatencyProfile:
+    """Log-normal latency around median (seconds), plus a stall added to stall_rate of calls."""
+    median: float
+    sigma: float = 0.3
+    stall_rate: float = 0.0
+    stall: float = 0.0
+    error_rate: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        latency = rng.lognormvariate(math.log(self.median), self.sigma)
+        if rng.random() < self.stall_rate:
+            latency += self.stall
+        return latency
+
+
+class MockProvider:
+    def __init__(self, name: str, profile: LatencyProfile, seed: int):
+        self.name = name
+        self.profile = profile
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    async def __call__(self, request: Any) -> str:
+        self.calls += 1
+        profile = self.profile
+        await asyncio.sleep(profile.sample(self._random))
+        if self._random.random() < profile.error_rate:
+            raise ProviderError(f"{self.name} failed")
+        return f"{self.name}: {request}"
+
+
+# Latencies are scaled down about 10x from real completions to keep the run short
+STEADY_PROFILES = {
+    'openai_gpt4': LatencyProfile(0.040, stall_rate=0.04, stall=0.400),
+    'claude_sonnet': LatencyProfile(0.045, stall_rate=0.02, stall=0.300),
+    'gemini': LatencyProfile(0.060, stall_rate=0.02, stall=0.300),
+}
+DEGRADED_PROFILE = LatencyProfile(0.150, sigma=0.5, stall_rate=0.10, stall=0.500, error_rate=0.3)
+
+
+async def run(strategy: str, scenario: str, providers: List[str], requests: int, concurrency: int,
+              p95_budget: Optional[float], seed: int):
+    mocks = {name: MockProvider(name, STEADY_PROFILES[name], seed + index) for index, name in enumerate(providers)}
+    if strategy == 'single provider':
+        router = AIRouter({providers[0]: mocks[providers[0]]}, hedge=False, seed=seed)
+    else:
+        router = AIRouter(mocks, hedge=strategy == 'hedged', p95_budget=p95_budget, seed=seed)
+    latencies, errors = [], 0
+    issued = iter(range(requests))
+
+    async def client():
+        nonlocal errors
+        for index in issued:
+            if scenario == 'degraded' and index == requests // 2:
+                mocks[providers[0]].profile = DEGRADED_PROFILE
+            started = time.perf_counter()
+            try:
+                await router.complete(index)
+            except AllProvidersFailed:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors, router.stats, sum(mock.calls for mock in mocks.values())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark latency-aware AI routing with hedged requests')
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--p95-budget-ms', type=float, default=120.0)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    providers = load_tables()['ai_conversations'].column('ai_model').enum_values
+    print("=== STRIVE TECH AI ROUTER BENCHMARK ===\n")
+    print(f"Providers: {', '.join(providers)}; {args.requests:,} requests from {args.concurrency} clients\n")
+    for scenario in ('steady', 'degraded'):
+        print(f"{scenario} providers" + (f" ({providers[0]} degrades halfway)" if scenario == 'degraded' else ''))
+        print("-" * 60)
+        baseline = None
+        for strategy in ('single provider', 'fastest healthy', 'hedged'):
+            latencies, errors, stats, calls = asyncio.run(run(
+                strategy, scenario, providers, args.requests, args.concurrency, args.p95_budget_ms / 1000, args.seed))
+            summary = percentiles(latencies)
+            baseline = baseline or summary
+            served = ', '.join(f"{name} {count * 100 / max(stats.requests, 1):.0f}%"
+                               for name, count in stats.served.items())
+            print(f"  • {strategy:<16} {format_latency(summary)}  p99 {summary['p99'] / baseline['p99']:.2f}x  "
+                  f"{errors} errors")
+            print(f"    {'':<16} {stats.hedges:,} hedges ({stats.hedge_wins:,} won), {stats.failovers:,} failovers, "
+                  f"{calls / args.requests:.2f} provider calls/request; {served}")
+        print()
@@ -0,0 +1,29 @@
+# Small timing helpers shared by the local benchmark scripts
+
+import statistics
+import time
+from typing import Callable, Dict, List
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 of a list of samples (same unit as the input)."""
+    if len(samples) == 1:
+        return {'p50': samples[0], 'p95': samples[0], 'p99': samples[0]}
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return {'p50': cuts[49], 'p95': cuts[94], 'p99': cuts[98]}
+
+
+def time_calls(fn: Callable[[], object], iterations: int, warmup: int = 3) -> List[float]:
+    """Call fn repeatedly and return per-call latencies in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def format_latency(stats: Dict[str, float]) -> str:
+    return f"p50 {stats['p50']:.3f}ms  p95 {stats['p95']:.3f}ms  p99 {stats['p99']:.3f}ms"
@@ -0,0 +1,232 @@
+# Offline full-text indexer and search benchmark for the CMS content table
+#
+# content.content is Markdown/HTML. The indexer streams rows in id order
+# (keyset batches, so memory stays flat on any table size), strips markup
+# down to plain text and hands each batch to a writer: in PostgreSQL the
+# writer sets content.search_text, which feeds the generated weighted
+# tsvector from schema_ddl.content_search_ddl(); in SQLite it fills the FTS5
+# content_search table.
+#
+# In PostgreSQL a trigger clears search_indexed_at whenever a body changes,
+# and the indexer run with --dsn (psycopg required) only picks up those
+# pending rows, so running it on a schedule keeps search_text current. A
+# row edited again after the indexer read it is left pending: the UPDATE
+# only applies while the body still has the md5 that was stripped.
+#
+# The benchmark generates Markdown/HTML documents, indexes them and times
+# ranked FTS5 searches against ILIKE-style scans (SQLite LIKE is already
+# case-insensitive for ASCII) over title, excerpt and body.
+#
+# Usage: python content_search.py --documents 1000000
+#        python content_search.py --dsn postgresql:///strive
+
+import argparse
+import hashlib
+import html
+import itertools
+import random
+import re
+import sqlite3
+import time
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import psycopg
+except ImportError:
+    psycopg = None
+
+from benchmark_utils import format_latency, percentiles, time_calls
+from schema_ddl import CONTENT_SEARCH_FIELDS, content_search_ddl
+
+INDEX_BATCH = 2000
+
+_HTML_SKIPPED = re.compile(r'<(script|style)\b.*?</\1\s*>|<!--.*?-->', re.IGNORECASE | re.DOTALL)
+_HTML_TAG = re.compile(r'</?[a-zA-Z][^>]*>')
+_CODE_FENCE = re.compile(r'^\s*(?:```|~~~).*$', re.MULTILINE)
+_IMAGE_OR_LINK = re.compile(r'!?\[([^\]]*)\]\([^)]*\)')
+_REFERENCE = re.compile(r'^\s*\[[^\]]+\]:\s+\S+.*$', re.MULTILINE)
+_LINE_MARKER = re.compile(r'^\s*(?:#{1,6}\s+|>\s?|[-*+]\s+|\d+[.)]\s+)', re.MULTILINE)
+_EMPHASIS = re.compile(r'[*_~`|#]+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def strip_markup(text: str) -> str:
+    """Plain text of a Markdown/HTML body: tags, link targets and markers removed."""
+    if not text:
+        return ''
+    text = _HTML_SKIPPED.sub(' ', text)
+    text = _HTML_TAG.sub(' ', text)
+    text = _CODE_FENCE.sub(' ', text)
+    text = _REFERENCE.sub(' ', text)
+    text = _IMAGE_OR_LINK.sub(r'\1', text)
+    text = _LINE_MARKER.sub(' ', text)
+    text = _EMPHASIS.sub(' ', text)
+    return _WHITESPACE.sub(' ', html.unescape(text)).strip()
+
+
+SearchRow = Tuple[str, str, str, str, str, str]  # id, organization_id, title, excerpt, search_text, md5 of content
+
+
+def iter_batches(conn, batch_size: int = INDEX_BATCH, after: Optional[str] = None,
+                 pending: bool = False) -> Iterator[List[SearchRow]]:
+    """Stripped content in id order, batch_size rows at a time; pending limits it to rows marked for indexing."""
+    mark = '?' if isinstance(conn, sqlite3.Connection) else '%s'
+    conditions = ["search_indexed_at IS NULL"] if pending else []
+    while True:
+        where = ' AND '.join(conditions + ([f"id > {mark}"] if after is not None else []))
+        params = ((after,) if after is not None else ()) + (batch_size,)
+        rows = conn.execute(f"SELECT id, organization_id, title, excerpt, content FROM content "
+                            f"{'WHERE ' + where if where else ''} ORDER BY id LIMIT {mark}", params).fetchall()
+        if not rows:
+            return
+        yield [(str(row[0]), str(row[1]), row[2], row[3], strip_markup(row[4]),
+                hashlib.md5((row[4] or '').encode()).hexdigest()) for row in rows]
+        after = rows[-1][0]
+
+
+def sqlite_writer(conn) -> Callable[[List[SearchRow]], None]:
+    def write(batch: List[SearchRow]) -> None:
+        # FTS rows share the content rowid, so replacing one is a rowid lookup
+        conn.executemany("DELETE FROM content_search WHERE rowid = (SELECT rowid FROM content WHERE id = ?)",
+                         ((row[0],) for row in batch))
+        conn.executemany("INSERT INTO content_search (rowid, organization_id, title, excerpt, search_text) "
+                         "VALUES ((SELECT rowid FROM content WHERE id = ?), ?, ?, ?, ?)",
+                         (row[:5] for row in batch))
+        conn.commit()
+    return write
+
+
+# Skipped when the body changed since it was read; the trigger has already marked it pending again
+POSTGRES_SEARCH_TEXT_UPDATE = ("UPDATE content SET search_text = %s, search_indexed_at = now() "
+                               "WHERE id = %s AND md5(coalesce(content, '')) = %s")
+
+
+def postgres_writer(conn) -> Callable[[List[SearchRow]], None]:
+    def write(batch: List[SearchRow]) -> None:
+        with conn.cursor() as cursor:
+            cursor.executemany(POSTGRES_SEARCH_TEXT_UPDATE, [(row[4], row[0], row[5]) for row in batch])
+        conn.commit()
+    return write
+
+
+def index_content(conn, write: Callable[[List[SearchRow]], None], batch_size: int = INDEX_BATCH,
+                  pending: bool = False) -> int:
+    indexed = 0
+    for batch in iter_batches(conn, batch_size, pending=pending):
+        write(batch)
+        indexed += len(batch)
+    return indexed
+
+
+def search_sql(limit: int = 20) -> str:
+    """Ranked FTS5 search; bm25 is lower-is-better, weighted like ts_rank's A/B/C."""
+    weights = ', '.join(str(weight) for _, _, weight in CONTENT_SEARCH_FIELDS)
+    return (f"SELECT content.id, bm25(content_search, 0, {weights}) AS rank "
+            f"FROM content_search JOIN content ON content.rowid = content_search.rowid "
+            f"WHERE content_search MATCH ? ORDER BY rank LIMIT {limit}")
+
+
+def like_sql(terms: Sequence[str], limit: int = 20) -> str:
+    """What ILIKE '%term%' does without an index: every term somewhere in any field."""
+    match = ' AND '.join("(title LIKE ? OR excerpt LIKE ? OR content LIKE ?)" for _ in terms)
+    return f"SELECT id FROM content WHERE {match} ORDER BY published_at DESC LIMIT {limit}"
+
+
+def like_params(terms: Sequence[str]) -> List[str]:
+    return [f'%{term}%' for term in terms for _ in range(3)]
+
+
+def make_vocabulary(size: int, rng: random.Random) -> List[str]:
+    syllables = ['ba', 'co', 'di', 'fe', 'ga', 'hi', 'jo', 'ku', 'la', 'me', 'no', 'pi', 'qu', 'ra',
+                 'se', 'to', 'vu', 'wy', 'xe', 'zo', 'an', 'el', 'in', 'or', 'us']
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    return sorted(words, key=lambda word: (len(word), word))
+
+
+def make_documents(count: int, vocabulary: List[str], rng: random.Random) -> Iterator[tuple]:
+    """(id, organization_id, title, excerpt, content, published_at) with Zipf word frequencies."""
+    cumulative = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+
+    def words(k: int) -> List[str]:
+        return rng.choices(vocabulary, cum_weights=cumulative, k=k)
+    for index in range(count):
+        title = ' '.join(words(rng.randint(3, 8))).capitalize()
+        excerpt = ' '.join(words(rng.randint(10, 20)))
+        paragraphs = [' '.join(words(rng.randint(15, 30))) for _ in range(rng.randint(2, 4))]
+        link = f"[{' '.join(words(2))}](https://example.com/{rng.randrange(10**6)})"
+        if index % 2:
+            body = (f"## {title}\n\n{paragraphs[0]} **{words(1)[0]}** {link}\n\n"
+                    + '\n'.join(f"- {paragraph}" for paragraph in paragraphs[1:])
+                    + f"\n\n```\n{words(1)[0]}()\n```\n")
+        else:
+            body = (f"<h2>{title}</h2><p>{paragraphs[0]} &amp; <em>{words(1)[0]}</em></p>"
+                    + ''.join(f"<p class=\"body\">{paragraph}</p>" for paragraph in paragraphs[1:])
+                    + "<script>track('view')</script>")
+        yield (f'{index:08d}', f'org-{index % 1000}', title, excerpt, body, 1700000000 + rng.randrange(10**8))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark content full-text search against LIKE scans')
+    parser.add_argument('--documents', type=int, default=1_000_000)
+    parser.add_argument('--vocabulary', type=int, default=50_000)
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--dsn', help='index the pending content rows of this PostgreSQL database instead')
+    parser.add_argument('--all', action='store_true', help='with --dsn, reindex every row, not just pending ones')
+    args = parser.parse_args()
+
+    if args.dsn:
+        if psycopg is None:
+            raise SystemExit("--dsn needs psycopg (pip install psycopg)")
+        with psycopg.connect(args.dsn) as pg:
+            started = time.perf_counter()
+            indexed = index_content(pg, postgres_writer(pg), pending=not args.all)
+        print(f"Indexed {indexed:,} content rows in {time.perf_counter() - started:.1f}s")
+        raise SystemExit(0)
+
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(args.vocabulary, rng)
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE content (id TEXT PRIMARY KEY, organization_id TEXT, title TEXT, excerpt TEXT, "
+                 "content TEXT, published_at INTEGER)")
+    conn.executescript(content_search_ddl('sqlite'))
+
+    print("=== STRIVE TECH CONTENT SEARCH BENCHMARK ===\n")
+    started = time.perf_counter()
+    documents = make_documents(args.documents, vocabulary, rng)
+    while True:
+        batch = list(itertools.islice(documents, 50_000))
+        if not batch:
+            break
+        conn.executemany("INSERT INTO content VALUES (?, ?, ?, ?, ?, ?)", batch)
+    conn.commit()
+    print(f"{args.documents:,} documents generated in {time.perf_counter() - started:.0f}s")
+
+    started = time.perf_counter()
+    indexed = index_content(conn, sqlite_writer(conn))
+    elapsed = time.perf_counter() - started
+    print(f"Indexed {indexed:,} documents in {elapsed:.0f}s ({indexed / elapsed:,.0f} docs/s)")
+    sample = conn.execute("SELECT content FROM content WHERE id = '00000001'").fetchone()[0]
+    print(f"  • sample: {strip_markup(sample)[:90]}...")
+    print("-" * 60)
+
+    # Words from the head, middle and tail of the frequency distribution
+    frequent, middle, rare = vocabulary[5], vocabulary[len(vocabulary) // 20], vocabulary[-10]
+    queries = {
+        'rare word': [rare],
+        'mid word': [middle],
+        'frequent word': [frequent],
+        'two words': [vocabulary[50], vocabulary[500]],
+    }
+    search = search_sql()
+    for name, terms in queries.items():
+        match = ' '.join(terms)
+        found = conn.execute("SELECT count(*) FROM content_search WHERE content_search MATCH ?", (match,)).fetchone()[0]
+        substring = conn.execute(f"SELECT count(*) FROM ({like_sql(terms, limit=-1)})", like_params(terms)).fetchone()[0]
+        print(f"  {name} {terms}: {found:,} word matches, {substring:,} substring matches")
+        fts = percentiles(time_calls(lambda: conn.execute(search, (match,)).fetchall(), args.iterations, warmup=1))
+        like = percentiles(time_calls(lambda: conn.execute(like_sql(terms), like_params(terms)).fetchall(),
+                                      max(args.iterations // 5, 1), warmup=0))
+        print(f"    • fts5 top 20 by rank  {format_latency(fts)}")
+        print(f"    • LIKE scan, top 20    {format_latency(like)}")
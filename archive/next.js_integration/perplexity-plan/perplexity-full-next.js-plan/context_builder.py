@@ -0,0 +1,289 @@
+# Token-aware context assembly for AI assistant requests
+#
+# Every ai_model gets a token budget: its context window minus room for the
+# reply and the system prompt, split between conversation history and the
+# CRM records the conversation is linked to (project, customer, tasks).
+#
+# Token counts are computed once per message and once per record version.
+# A message's count travels with it in the window and is stored in
+# ai_messages.tokens, so a restarted builder reads it instead of
+# recounting; record counts are cached by (kind, id, updated_at). History
+# is a sliding window per conversation: a new message is appended and the
+# oldest messages leave once the window is over budget, so a turn costs the
+# same at message 10 as at message 10,000. Records are rendered to short text, capped at
+# RECORD_MAX_TOKENS each and added in priority order while they fit.
+#
+# Counts come from tiktoken's cl100k_base when it is installed (exact for
+# openai_gpt4, close for the others) and from a word-piece estimate otherwise.
+#
+# The benchmark replays long conversations and compares per-turn assembly
+# time and token counting work with recounting the whole history each turn.
+#
+# Usage: python context_builder.py --messages 10000
+
+import argparse
+import random
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+from benchmark_utils import format_latency, percentiles
+
+# Context window per ai_model value in script_1.py
+MODEL_CONTEXT_WINDOWS = {
+    'openai_gpt4': 8_192,
+    'claude_sonnet': 200_000,
+    'gemini': 32_768,
+}
+RESPONSE_RESERVE = 1_024
+RECORD_SHARE = 0.3
+RECORD_MAX_TOKENS = 400
+# Role and separator tokens added around every chat message
+MESSAGE_OVERHEAD = 4
+TRUNCATION_MARK = ' [truncated]'
+
+_WORD_PIECE = re.compile(r'\w+|[^\w\s]')
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly one token per 4 characters of a word, one per punctuation mark."""
+    return sum(1 + (len(piece) - 1) // 4 for piece in _WORD_PIECE.findall(text))
+
+
+class TokenCounter:
+    """Counts tokens, caching counts of keyed texts such as record versions."""
+
+    def __init__(self):
+        self._encoding = tiktoken.get_encoding('cl100k_base') if tiktoken else None
+        self._cache: Dict[tuple, int] = {}
+        self.counted = 0
+
+    def count_text(self, text: str) -> int:
+        self.counted += 1
+        if self._encoding is not None:
+            return len(self._encoding.encode(text))
+        return estimate_tokens(text)
+
+    def count(self, key: tuple, text: str) -> int:
+        tokens = self._cache.get(key)
+        if tokens is None:
+            tokens = self._cache[key] = self.count_text(text)
+        return tokens
+
+    def truncate(self, text: str, tokens: int, budget: int) -> str:
+        """text cut down to about budget tokens, proportionally by length."""
+        keep = max(int(len(text) * budget / max(tokens, 1)) - len(TRUNCATION_MARK), 0)
+        return text[:keep] + TRUNCATION_MARK
+
+
+@dataclass
+class WindowMessage:
+    seq: int
+    role: str
+    content: str
+    tokens: int
+
+
+class ConversationWindow:
+    """Newest messages of one conversation whose tokens fit the budget."""
+
+    def __init__(self, budget: int):
+        self.budget = budget
+        self.messages: deque = deque()
+        self.tokens = 0
+
+    def append(self, message: WindowMessage) -> None:
+        self.messages.append(message)
+        self.tokens += message.tokens
+        # Always keep the newest message; build() truncates it if it alone is over budget
+        while self.tokens > self.budget and len(self.messages) > 1:
+            self.tokens -= self.messages.popleft().tokens
+
+
+@dataclass
+class ContextRecord:
+    """A CRM row linked to the conversation, e.g. the project and its open tasks."""
+    kind: str
+    id: str
+    updated_at: str
+    fields: Dict[str, object]
+
+    def render(self) -> str:
+        details = '; '.join(f"{name}: {value}" for name, value in self.fields.items() if value not in (None, ''))
+        return f"[{self.kind} {self.id}] {details}"
+
+
+@dataclass
+class BuiltContext:
+    messages: List[Dict[str, str]]
+    tokens: int
+    history_messages: int
+    records: List[str] = field(default_factory=list)
+
+
+class ContextBuilder:
+    """Assembles system prompt, CRM records and history within one model's budget."""
+
+    def __init__(self, model: str, system_prompt: str, counter: Optional[TokenCounter] = None):
+        self.model = model
+        self.counter = counter or TokenCounter()
+        self.system_prompt = system_prompt
+        self.system_tokens = self.counter.count_text(system_prompt) + MESSAGE_OVERHEAD
+        available = MODEL_CONTEXT_WINDOWS[model] - RESPONSE_RESERVE - self.system_tokens
+        if available <= 0:
+            raise ValueError(f"system prompt does not fit the {model} context window")
+        self.record_budget = int(available * RECORD_SHARE)
+        self.history_budget = available - self.record_budget
+        self.windows: Dict[str, ConversationWindow] = {}
+
+    def window(self, conversation_id: str) -> ConversationWindow:
+        window = self.windows.get(conversation_id)
+        if window is None:
+            window = self.windows[conversation_id] = ConversationWindow(self.history_budget)
+        return window
+
+    def add_message(self, conversation_id: str, seq: int, role: str, content: str,
+                    tokens: Optional[int] = None) -> int:
+        """Append a message; tokens is ai_messages.tokens when already stored. Returns the count."""
+        if tokens is None:
+            tokens = self.counter.count_text(content)
+        self.window(conversation_id).append(WindowMessage(seq, role, content, tokens + MESSAGE_OVERHEAD))
+        return tokens
+
+    def load(self, conversation_id: str, rows: Iterable[Tuple[int, str, str, Optional[int]]]) -> None:
+        """Rebuild a window from sql_queries.AI_MESSAGES_TAIL rows (seq, role, content, tokens), newest first."""
+        newest_first, total = [], 0
+        for seq, role, content, tokens in rows:
+            if tokens is None:
+                tokens = self.counter.count_text(content)
+            if newest_first and total + tokens + MESSAGE_OVERHEAD > self.history_budget:
+                break
+            newest_first.append((seq, role, content, tokens))
+            total += tokens + MESSAGE_OVERHEAD
+        self.windows.pop(conversation_id, None)
+        for seq, role, content, tokens in reversed(newest_first):
+            self.add_message(conversation_id, seq, role, content, tokens)
+
+    def close(self, conversation_id: str) -> None:
+        self.windows.pop(conversation_id, None)
+
+    def _records(self, records: Sequence[ContextRecord]) -> Tuple[List[str], int]:
+        included, used = [], 0
+        for record in records:
+            text = record.render()
+            tokens = self.counter.count((record.kind, record.id, record.updated_at), text)
+            if tokens > RECORD_MAX_TOKENS:
+                text, tokens = self.counter.truncate(text, tokens, RECORD_MAX_TOKENS), RECORD_MAX_TOKENS
+            if used + tokens <= self.record_budget:
+                included.append(text)
+                used += tokens
+        return included, used
+
+    def build(self, conversation_id: str, records: Sequence[ContextRecord] = ()) -> BuiltContext:
+        record_texts, record_tokens = self._records(records)
+        system = self.system_prompt
+        if record_texts:
+            system += '\n\nContext:\n' + '\n'.join(record_texts)
+        window = self.window(conversation_id)
+        messages = [{'role': 'system', 'content': system}]
+        history_tokens = window.tokens
+        for message in window.messages:
+            content = message.content
+            if message.tokens > self.history_budget:
+                content = self.counter.truncate(content, message.tokens, self.history_budget - MESSAGE_OVERHEAD)
+                history_tokens = self.history_budget
+            messages.append({'role': message.role, 'content': content})
+        return BuiltContext(messages, self.system_tokens + record_tokens + history_tokens,
+                            len(window.messages), record_texts)
+
+
+def recount_history(counter: TokenCounter, history: Sequence[Tuple[int, str, str]], budget: int) -> List[int]:
+    """Baseline: count every message again and pick the newest ones that fit."""
+    counts = [counter.count_text(content) + MESSAGE_OVERHEAD for _, _, content in history]
+    chosen, total = [], 0
+    for index in range(len(history) - 1, -1, -1):
+        if chosen and total + counts[index] > budget:
+            break
+        chosen.append(history[index][0])
+        total += counts[index]
+    return chosen[::-1]
+
+
+WORDS = ('customer project invoice renewal deadline task follow-up meeting budget quarter pipeline churn '
+         'onboarding contract status update summary draft email call notes priority blocked review').split()
+
+
+def make_message(rng: random.Random, seq: int) -> Tuple[int, str, str]:
+    role = 'user' if seq % 2 == 0 else 'assistant'
+    length = rng.randint(5, 60) if role == 'user' else rng.randint(40, 400)
+    return seq, role, ' '.join(rng.choices(WORDS, k=length)).capitalize() + '.'
+
+
+def make_records(rng: random.Random, version: int) -> List[ContextRecord]:
+    records = [ContextRecord('project', 'p1', f'v{version}', {
+        'name': 'Website relaunch', 'status': 'active', 'due_date': '2026-03-01',
+        'description': ' '.join(rng.choices(WORDS, k=120))})]
+    records.append(ContextRecord('customer', 'c1', 'v1', {'company': 'Acme Corp', 'status': 'active', 'tier': 'vip'}))
+    records.extend(ContextRecord('task', f't{index}', 'v1', {'title': f'Task {index}', 'status': 'in_progress',
+                                                            'priority': 'high', 'notes': ' '.join(rng.choices(WORDS, k=30))})
+                   for index in range(8))
+    return records
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark incremental context assembly against recounting history')
+    parser.add_argument('--messages', type=int, default=10_000)
+    parser.add_argument('--record-change-rate', type=float, default=0.02)
+    args = parser.parse_args()
+
+    checkpoints = sorted({10, 100, 1000, args.messages} & set(range(1, args.messages + 1)))
+    print("=== STRIVE TECH CONTEXT BUILDER BENCHMARK ===\n")
+    print(f"Token counts from {'tiktoken cl100k_base' if tiktoken else 'the word-piece estimate (tiktoken not installed)'}\n")
+    for model in MODEL_CONTEXT_WINDOWS:
+        rng = random.Random(42)
+        builder = ContextBuilder(model, "You are the Strive Tech assistant. Answer using the CRM context.")
+        print(f"{model}: {MODEL_CONTEXT_WINDOWS[model]:,} token window, history budget {builder.history_budget:,}, "
+              f"records {builder.record_budget:,}")
+        print("-" * 60)
+        history, version, samples, counted = [], 1, [], {}
+        records = make_records(rng, version)
+        for seq in range(args.messages):
+            message = make_message(rng, seq)
+            history.append(message)
+            if rng.random() < args.record_change_rate:
+                version += 1
+                records = make_records(rng, version)
+            before = builder.counter.counted
+            started = time.perf_counter()
+            builder.add_message('conv', *message)
+            context = builder.build('conv', records)
+            elapsed = (time.perf_counter() - started) * 1000
+            samples.append(elapsed)
+            counted[seq] = builder.counter.counted - before
+            if len(history) in checkpoints:
+                baseline = TokenCounter()
+                started = time.perf_counter()
+                chosen = recount_history(baseline, history, builder.history_budget)
+                recount = (time.perf_counter() - started) * 1000
+                same = chosen == [message.seq for message in builder.window('conv').messages]
+                print(f"  • message {len(history):>6,}: {elapsed:7.3f}ms incremental "
+                      f"({counted[seq]} counted), {recount:9.3f}ms recounting ({baseline.counted:,} counted); "
+                      f"{context.history_messages:,} messages, {context.tokens:,} tokens, "
+                      f"{'same selection' if same else 'SELECTION DIFFERS'}")
+        late = samples[-1000:]
+        print(f"  • incremental per turn, last {len(late):,} turns: {format_latency(percentiles(late))}, "
+              f"{sum(counted.values()) / len(counted):.2f} counts/turn")
+
+        # A restarted builder refills the window from the newest stored messages
+        restarted = ContextBuilder(model, builder.system_prompt)
+        restarted.load('conv', ((seq, role, content, restarted.counter.count_text(content))
+                                for seq, role, content in reversed(history)))
+        same = [m.seq for m in restarted.window('conv').messages] == [m.seq for m in builder.window('conv').messages]
+        print(f"  • reload after restart: {'same window' if same else 'WINDOW DIFFERS'}\n")
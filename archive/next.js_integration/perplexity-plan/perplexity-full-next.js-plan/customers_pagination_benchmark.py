@@ -0,0 +1,91 @@
+# Compare the unbounded, offset and keyset versions of GET /api/customers
+#
+# Loads customers for a synthetic tenant population into SQLite and, for the
+# largest tenant, times the current unbounded findMany (plus its projects
+# include) against LIMIT/OFFSET and keyset pages at increasing depth. Payload
+# size is the JSON the route would send for the rows returned.
+#
+# Usage: python customers_pagination_benchmark.py --organizations 50 --scale 8
+
+import argparse
+import json
+
+from benchmark_utils import format_latency, percentiles, time_calls
+from dashboard_benchmark import pick_tenants, tenant_params
+from schema_ddl import load_sqlite
+from schema_spec import load_tables
+from sql_queries import CUSTOMER_PROJECTS, CUSTOMERS_LIST, CUSTOMERS_PAGE_KEYSET, CUSTOMERS_PAGE_OFFSET
+from synthetic_data import build_plan, load_sqlite_dataset
+
+CUSTOMER_TABLES = ('users', 'organizations', 'organization_members', 'customers', 'projects')
+PAGE_DEPTHS = [1, 10, 100, 1000]
+
+
+def payload_bytes(rows) -> int:
+    return len(json.dumps(rows, default=str))
+
+
+def benchmark(run, iterations):
+    rows = run()
+    return percentiles(time_calls(run, iterations)), len(rows), payload_bytes(rows)
+
+
+def page_cursor(conn, organization_id: str, page: int, limit: int):
+    """(created_at, id) of the last row on the page before `page`, as a client would hold it."""
+    return conn.execute(
+        "SELECT created_at, id FROM customers WHERE organization_id = ? "
+        "ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET ?",
+        (organization_id, (page - 1) * limit - 1)).fetchone()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark customer list pagination on SQLite')
+    parser.add_argument('--organizations', type=int, default=50)
+    parser.add_argument('--scale', type=float, default=8.0)
+    parser.add_argument('--limit', type=int, default=25)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    tables = load_tables()
+    plan = build_plan(tables, args.organizations, args.scale, args.seed)
+    conn = load_sqlite(tables)
+    load_sqlite_dataset(conn, tables, plan, only=CUSTOMER_TABLES)
+    conn.execute("ANALYZE")
+
+    org = pick_tenants(plan, 'customers')['largest']
+    params = tenant_params(conn, tables, plan, org)
+    total = conn.execute("SELECT count(*) FROM customers WHERE organization_id = ?",
+                         (params['organization_id'],)).fetchone()[0]
+    last_page = -(-total // args.limit)
+
+    print("=== STRIVE TECH CUSTOMERS PAGINATION BENCHMARK (SQLite) ===\n")
+    print(f"Largest tenant: {total:,} customers, {args.limit} per page\n")
+
+    def unbounded():
+        customers = conn.execute(CUSTOMERS_LIST, {'user_id': params['user_id']}).fetchall()
+        projects = conn.execute(CUSTOMER_PROJECTS, {'user_id': params['user_id']}).fetchall()
+        return customers + projects
+
+    customers = len(conn.execute(CUSTOMERS_LIST, {'user_id': params['user_id']}).fetchall())
+    if customers != total:
+        raise AssertionError(f"unbounded findMany returned {customers:,} customers, the tenant has {total:,}")
+    stats, count, size = benchmark(unbounded, max(args.iterations // 5, 5))
+    print(f"  • {'unbounded findMany':<22} {format_latency(stats)}  rows {count:>7,}  {size / 1024:>9,.1f} KiB")
+
+    for page in [depth for depth in PAGE_DEPTHS if depth < last_page] + [last_page]:
+        offset_params = {'organization_id': params['organization_id'], 'limit': args.limit,
+                         'offset': (page - 1) * args.limit}
+        stats, count, size = benchmark(
+            lambda: conn.execute(CUSTOMERS_PAGE_OFFSET, offset_params).fetchall(), args.iterations)
+        print(f"  • {f'offset page {page}':<22} {format_latency(stats)}  rows {count:>7,}  {size / 1024:>9,.1f} KiB")
+
+        if page == 1:
+            # No cursor yet: the first keyset page is the offset-0 page
+            continue
+        created_at, customer_id = page_cursor(conn, params['organization_id'], page, args.limit)
+        keyset_params = {'organization_id': params['organization_id'], 'limit': args.limit,
+                         'cursor_created_at': created_at, 'cursor_id': customer_id}
+        stats, count, size = benchmark(
+            lambda: conn.execute(CUSTOMERS_PAGE_KEYSET, keyset_params).fetchall(), args.iterations)
+        print(f"  • {f'keyset page {page}':<22} {format_latency(stats)}  rows {count:>7,}  {size / 1024:>9,.1f} KiB")
@@ -0,0 +1,145 @@
+# Benchmark the dashboard queries from script_2.py against a local SQLite dataset
+#
+# For each dataset scale, loads a synthetic dataset (synthetic_data.py) into
+# an in-memory SQLite database built from schema_ddl.py, picks tenants at
+# several points of the size distribution and replays every query issued by
+# DashboardPage, reporting p50/p95/p99 latency, rows returned and rows touched.
+#
+# Usage: python dashboard_benchmark.py --organizations 200 --scales 0.25 1 4
+
+import argparse
+import csv
+import time
+from typing import Dict, List, Tuple
+
+from benchmark_utils import format_latency, percentiles, time_calls
+from schema_ddl import load_sqlite
+from schema_spec import load_tables
+from sql_queries import DASHBOARD_QUERIES
+from synthetic_data import build_plan, load_sqlite_dataset, row_uuid, table_number
+
+# Table rows each query reads through the indexes chosen by schema_ddl.py
+# (index-only lookups such as the task counts are counted as entries read)
+ROWS_TOUCHED = {
+    'user_with_organizations': """
+        SELECT 1 + 2 * count(m.id) FROM users u
+        LEFT JOIN organization_members m ON m.user_id = u.id
+        WHERE u.clerk_user_id = :clerk_user_id
+    """,
+    'total_customers': "SELECT count(*) FROM customers WHERE organization_id = :organization_id",
+    'total_projects': "SELECT count(*) FROM projects WHERE organization_id = :organization_id",
+    'completed_tasks': """
+        SELECT (SELECT count(*) FROM projects WHERE organization_id = :organization_id)
+             + (SELECT count(*) FROM tasks t JOIN projects p ON p.id = t.project_id
+                WHERE p.organization_id = :organization_id)
+    """,
+    'active_projects': "SELECT count(*) FROM projects WHERE organization_id = :organization_id",
+    # Sorted in a temp b-tree: every project of the org, plus a task count for the top 5
+    'recent_projects': """
+        SELECT (SELECT count(*) FROM projects WHERE organization_id = :organization_id)
+             + (SELECT coalesce(sum(n), 0) FROM (
+                  SELECT (SELECT count(*) FROM tasks t WHERE t.project_id = p.id) AS n
+                  FROM projects p WHERE p.organization_id = :organization_id
+                  ORDER BY p.updated_at DESC LIMIT 5))
+    """,
+    'recent_tasks_user': "SELECT 1",
+    # Every task of the user is sorted, then the top 5 join their project
+    'recent_tasks': "SELECT count(*) + min(count(*), 5) FROM tasks WHERE assigned_to = :user_id",
+    # Walks the (organization_id, created_at) index backwards: 10 logs and their users
+    'recent_activity': """
+        SELECT 2 * min(count(*), 10) FROM activity_logs WHERE organization_id = :organization_id
+    """,
+}
+
+TENANT_PERCENTILES = {'small': 0.10, 'median': 0.50, 'p95': 0.95, 'largest': 1.0}
+
+
+def pick_tenants(plan, table: str = 'tasks') -> Dict[str, int]:
+    """Organizations at fixed points of the size distribution, ranked by `table` rows."""
+    sizes = sorted(range(plan.organizations), key=lambda org: plan.offsets[table][org + 1] - plan.offsets[table][org])
+    return {label: sizes[min(int(fraction * len(sizes)), len(sizes) - 1)]
+            for label, fraction in TENANT_PERCENTILES.items()}
+
+
+def tenant_params(conn, tables, plan, org: int) -> Dict[str, str]:
+    """Query parameters for a member of an organization."""
+    organization_id = row_uuid(table_number(tables, 'organizations'), org)
+    user_id, clerk_user_id = conn.execute(
+        "SELECT u.id, u.clerk_user_id FROM organization_members m JOIN users u ON u.id = m.user_id "
+        "WHERE m.organization_id = ? ORDER BY m.id LIMIT 1", (organization_id,)).fetchone()
+    return {
+        'organization_id': organization_id,
+        'user_id': user_id,
+        'clerk_user_id': clerk_user_id,
+    }
+
+
+def bind(sql: str, params: Dict[str, str]) -> Dict[str, str]:
+    return {name: value for name, value in params.items() if f':{name}' in sql}
+
+
+def run_query_benchmark(conn, queries: Dict[str, str], params: Dict[str, str],
+                        iterations: int, touched: Dict[str, str] = None) -> List[Tuple[str, Dict[str, float], int, int]]:
+    """Return (query, latency percentiles, rows returned, rows touched) per query."""
+    touched = touched or {}
+    results = []
+    for name, sql in queries.items():
+        bound = bind(sql, params)
+        samples = time_calls(lambda: conn.execute(sql, bound).fetchall(), iterations)
+        returned = len(conn.execute(sql, bound).fetchall())
+        touched_sql = touched.get(name)
+        rows_touched = conn.execute(touched_sql, bind(touched_sql, params)).fetchone()[0] if touched_sql else None
+        results.append((name, percentiles(samples), returned, rows_touched))
+    return results
+
+
+def page_latency(conn, params: Dict[str, str], iterations: int) -> Dict[str, float]:
+    """Whole DashboardPage: SQLite runs the Promise.all branches one after another."""
+    statements = [(sql, bind(sql, params)) for sql in DASHBOARD_QUERIES.values()]
+
+    def page():
+        for sql, bound in statements:
+            conn.execute(sql, bound).fetchall()
+    return percentiles(time_calls(page, iterations))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the dashboard queries on SQLite')
+    parser.add_argument('--organizations', type=int, default=200)
+    parser.add_argument('--scales', type=float, nargs='+', default=[0.25, 1.0, 4.0])
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    tables = load_tables()
+    report = []
+    print("=== STRIVE TECH DASHBOARD QUERY BENCHMARK (SQLite) ===\n")
+    for scale in args.scales:
+        plan = build_plan(tables, args.organizations, scale, args.seed)
+        conn = load_sqlite(tables)
+        started = time.perf_counter()
+        counts = load_sqlite_dataset(conn, tables, plan)
+        conn.execute("ANALYZE")
+        print(f"Scale {scale}: {sum(counts.values()):,} rows loaded in {time.perf_counter() - started:.1f}s")
+        print("-" * 60)
+
+        for label, org in pick_tenants(plan).items():
+            params = tenant_params(conn, tables, plan, org)
+            start, end = plan.org_range('tasks', org)
+            print(f"\n{label} tenant (org {org}, {end - start:,} tasks)")
+            for name, stats, returned, touched in run_query_benchmark(
+                    conn, DASHBOARD_QUERIES, params, args.iterations, ROWS_TOUCHED):
+                print(f"  • {name:<24} {format_latency(stats)}  rows {returned:>3}  touched {touched:>8,}")
+                report.append([scale, label, org, name, stats['p50'], stats['p95'], stats['p99'], returned, touched])
+            page = page_latency(conn, params, max(args.iterations // 4, 10))
+            print(f"  • {'whole page':<24} {format_latency(page)}")
+            report.append([scale, label, org, 'whole_page', page['p50'], page['p95'], page['p99'], None, None])
+        conn.close()
+        print()
+
+    with open('strive_tech_dashboard_benchmark.csv', 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['scale', 'tenant', 'organization', 'query', 'p50_ms', 'p95_ms', 'p99_ms',
+                         'rows_returned', 'rows_touched'])
+        writer.writerows(report)
+    print("Benchmark results saved to 'strive_tech_dashboard_benchmark.csv'")
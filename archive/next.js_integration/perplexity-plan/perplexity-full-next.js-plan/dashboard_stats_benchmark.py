@@ -0,0 +1,120 @@
+# Compare the three ways of computing getDashboardStats as task counts grow
+#
+# - four_queries: the current four count() calls (four round trips)
+# - aggregated:   one query with conditional counts (one round trip)
+# - counters:     one primary-key read of the trigger-maintained organization_stats row
+#
+# SQLite has no network hop, so a modeled per-round-trip cost (--rtt-ms) is
+# added to show what the round trips cost against a remote database. The
+# counter cache moves work to the write path, so trigger overhead on task
+# inserts/updates is measured too, and all three variants are checked to
+# return the same stats afterwards. The status literals in
+# lib/dashboard-stats.ts and strive_tech_dashboard_counters.sql are checked
+# against the Prisma spelling of the ones in sql_queries.py.
+#
+# Usage: python dashboard_stats_benchmark.py --organizations 20 --scales 1 4 16
+
+import argparse
+import random
+import re
+import time
+
+from benchmark_utils import format_latency, percentiles, time_calls
+from dashboard_benchmark import pick_tenants, tenant_params
+from schema_ddl import counter_cache_ddl, load_sqlite
+from schema_spec import load_tables
+from sql_queries import (ACTIVE_PROJECT_STATUS, COMPLETED_TASK_STATUS, DASHBOARD_STATS_AGGREGATED,
+                         DASHBOARD_STATS_COUNTERS, DASHBOARD_STATS_QUERIES, prisma_enum)
+from synthetic_data import build_plan, load_sqlite_dataset
+
+STATS_TABLES = ('users', 'organizations', 'organization_members', 'customers', 'projects', 'tasks')
+PRISMA_STATS_FILES = ('strive_tech_dashboard_stats.ts', 'strive_tech_dashboard_counters.sql')
+
+
+def four_queries(conn, params):
+    return tuple(conn.execute(sql, params).fetchone()[0] for sql in DASHBOARD_STATS_QUERIES.values())
+
+
+def aggregated(conn, params):
+    return tuple(conn.execute(DASHBOARD_STATS_AGGREGATED, params).fetchone())
+
+
+def counters(conn, params):
+    return tuple(conn.execute(DASHBOARD_STATS_COUNTERS, params).fetchone())
+
+
+VARIANTS = {
+    'four_queries': (four_queries, len(DASHBOARD_STATS_QUERIES)),
+    'aggregated': (aggregated, 1),
+    'counters': (counters, 1),
+}
+
+
+def status_literals(path: str) -> set:
+    with open(path) as f:
+        return set(re.findall(r"status = '(\w+)'", f.read()))
+
+
+def task_write_latency(conn, organization_id: str, writes: int, seed: int = 7):
+    """Per-write latency (ms) of flipping task statuses in one organization."""
+    rng = random.Random(seed)
+    task_ids = [row[0] for row in conn.execute(
+        "SELECT t.id FROM tasks t JOIN projects p ON p.id = t.project_id WHERE p.organization_id = ?",
+        (organization_id,))]
+    samples = []
+    for _ in range(writes):
+        task_id = rng.choice(task_ids)
+        status = rng.choice(['todo', 'in_progress', 'review', 'done'])
+        started = time.perf_counter()
+        conn.execute("UPDATE tasks SET status = ? WHERE id = ?", (status, task_id))
+        conn.commit()
+        samples.append((time.perf_counter() - started) * 1000)
+    return percentiles(samples)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark getDashboardStats variants on SQLite')
+    parser.add_argument('--organizations', type=int, default=20)
+    parser.add_argument('--scales', type=float, nargs='+', default=[1.0, 4.0, 16.0])
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--writes', type=int, default=500)
+    parser.add_argument('--rtt-ms', type=float, default=0.5, help='modeled network round trip per query')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    tables = load_tables()
+    print("=== STRIVE TECH DASHBOARD STATS BENCHMARK (SQLite) ===\n")
+    print(f"Modeled round trip: {args.rtt_ms}ms per query\n")
+    for scale in args.scales:
+        plan = build_plan(tables, args.organizations, scale, args.seed)
+        conn = load_sqlite(tables)
+        load_sqlite_dataset(conn, tables, plan, only=STATS_TABLES)
+        conn.execute("ANALYZE")
+        org = pick_tenants(plan)['largest']
+        params = {'organization_id': tenant_params(conn, tables, plan, org)['organization_id']}
+        tasks = plan.org_range('tasks', org)[1] - plan.org_range('tasks', org)[0]
+        print(f"Scale {scale}: largest tenant has {tasks:,} tasks")
+        print("-" * 60)
+
+        baseline_write = task_write_latency(conn, params['organization_id'], args.writes)
+        conn.executescript(counter_cache_ddl('sqlite'))
+        for name, (fn, round_trips) in VARIANTS.items():
+            stats = percentiles(time_calls(lambda: fn(conn, params), args.iterations))
+            modeled = {key: value + round_trips * args.rtt_ms for key, value in stats.items()}
+            print(f"  • {name:<13} {format_latency(stats)}  | with round trips: p50 {modeled['p50']:.3f}ms")
+
+        counter_write = task_write_latency(conn, params['organization_id'], args.writes)
+        print(f"  • task update without triggers: {format_latency(baseline_write)}")
+        print(f"  • task update with triggers:    {format_latency(counter_write)}")
+
+        results = {name: fn(conn, params) for name, (fn, _) in VARIANTS.items()}
+        if len(set(results.values())) != 1:
+            raise SystemExit(f"dashboard stats variants disagree: {results}")
+        print(f"  • all variants return {results['counters']} after the writes\n")
+        conn.close()
+
+    expected = {prisma_enum(ACTIVE_PROJECT_STATUS), prisma_enum(COMPLETED_TASK_STATUS)}
+    for path in PRISMA_STATS_FILES:
+        if status_literals(path) != expected:
+            raise SystemExit(f"{path} compares statuses {sorted(status_literals(path))}, expected {sorted(expected)}")
+    print(f"Status literals in {' and '.join(PRISMA_STATS_FILES)} match: {', '.join(sorted(expected))}")
@@ -0,0 +1,247 @@
+# Fractional (LexoRank-style) position keys for kanban task ordering
+#
+# tasks.position holds a base-36 string read as a fraction in (0, 1):
+# "i" sits between "c" and "r", "i8" between "i" and "j". A card moved
+# between two neighbours gets a key strictly between theirs, so a move
+# writes one row instead of renumbering the rest of the column. Keys only
+# use 0-9a-z and never end in "0", so byte order is numeric order; the
+# PostgreSQL column is declared COLLATE "C" (schema_ddl.C_COLLATED_COLUMNS)
+# so a locale collation cannot reorder them.
+#
+# Keys grow when cards keep landing in the same gap. A key longer than
+# MAX_KEY_LENGTH is queued for a background rebalance, which respaces the run
+# of long keys around it between the nearest short neighbours. When that gap
+# cannot give every card a key of at most SHORT_KEY_LENGTH, the window
+# doubles outwards until it can, so respaced keys never feed the next
+# rebalance; the whole column is rewritten only when the run of long keys is
+# wider than REBALANCE_WINDOW cards.
+#
+# The benchmark replays card moves on SQLite boards of 100 to 100k cards and
+# compares rows written and move latency with integer renumbering. A
+# fractional run that rewrites more than MAX_ROWS_PER_MOVE rows per move,
+# rebalances included, is flagged.
+#
+# Usage: python fractional_index.py --cards 100 1000 10000 100000 --moves 300
+
+import argparse
+import math
+import random
+import sqlite3
+import time
+from typing import List, Optional, Sequence, Set, Tuple
+
+from benchmark_utils import format_latency, percentiles
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+MAX_KEY_LENGTH = 12
+SHORT_KEY_LENGTH = MAX_KEY_LENGTH // 2
+REBALANCE_WINDOW = 256
+# Rows a fractional move may rewrite on average, rebalances included; the benchmark flags runs above it
+MAX_ROWS_PER_MOVE = 16
+
+
+def _midpoint(low: str, high: Optional[str]) -> str:
+    """Shortest key strictly between low ('' is 0) and high (None is 1)."""
+    if high is not None:
+        prefix = 0
+        while prefix < len(high) and (low[prefix] if prefix < len(low) else '0') == high[prefix]:
+            prefix += 1
+        if prefix:
+            return high[:prefix] + _midpoint(low[prefix:], high[prefix:])
+    low_digit = DIGITS.index(low[0]) if low else 0
+    high_digit = DIGITS.index(high[0]) if high is not None else BASE
+    if high_digit - low_digit > 1:
+        return DIGITS[(low_digit + high_digit) // 2]
+    if high is not None and len(high) > 1:
+        return high[0]
+    return DIGITS[low_digit] + _midpoint(low[1:], None)
+
+
+def key_between(before: Optional[str], after: Optional[str]) -> str:
+    """Key for a card placed between two neighbours; None means the column edge."""
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f"{before!r} must sort before {after!r}")
+    return _midpoint(before or '', after)
+
+
+def keys_between(before: Optional[str], after: Optional[str], count: int) -> List[str]:
+    """count ascending keys spread evenly between two neighbours, by bisection."""
+    if count == 0:
+        return []
+    middle = count // 2
+    key = key_between(before, after)
+    return keys_between(before, key, middle) + [key] + keys_between(key, after, count - middle - 1)
+
+
+def spaced_key(index: int, count: int) -> str:
+    """The index-th (0-based) of count evenly spaced keys, all of one width."""
+    width = max(1, math.ceil(math.log(count + 1, BASE))) + 1
+    value = (index + 1) * BASE ** width // (count + 1)
+    digits = []
+    for _ in range(width):
+        value, digit = divmod(value, BASE)
+        digits.append(DIGITS[digit])
+    return ''.join(reversed(digits)).rstrip('0')
+
+
+def spaced_keys(count: int) -> List[str]:
+    return [spaced_key(index, count) for index in range(count)]
+
+
+BOARD_DDL = """
+CREATE TABLE tasks (id INTEGER PRIMARY KEY, project_id INTEGER, status TEXT, position {type});
+CREATE INDEX idx_tasks_project_id_status_position ON tasks (project_id, status, position);
+"""
+
+
+class Board:
+    """One kanban column in SQLite. order is the client's view of the card ids."""
+
+    def __init__(self, cards: int, scheme: str):
+        self.scheme = scheme
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.executescript(BOARD_DDL.format(type='INTEGER' if scheme == 'integer' else 'TEXT'))
+        positions: Sequence = range(cards) if scheme == 'integer' else spaced_keys(cards)
+        self.conn.executemany("INSERT INTO tasks VALUES (?, 1, 'todo', ?)", enumerate(positions))
+        self.conn.commit()
+        self.order = list(range(cards))
+        self.needs_rebalance: Set[Tuple[int, str, str]] = set()
+        self.rebalanced_rows = 0
+        self.largest_rebalance = 0
+
+    def move(self, source: int, target: int) -> int:
+        """Move the card at index source to index target; returns rows written."""
+        card = self.order.pop(source)
+        self.order.insert(target, card)
+        if self.scheme == 'integer':
+            if target < source:
+                shifted = self.conn.execute(
+                    "UPDATE tasks SET position = position + 1 WHERE project_id = 1 AND status = 'todo' "
+                    "AND position >= ? AND position < ?", (target, source)).rowcount
+            else:
+                shifted = self.conn.execute(
+                    "UPDATE tasks SET position = position - 1 WHERE project_id = 1 AND status = 'todo' "
+                    "AND position > ? AND position <= ?", (source, target)).rowcount
+            self.conn.execute("UPDATE tasks SET position = ? WHERE id = ?", (target, card))
+            self.conn.commit()
+            return shifted + 1
+
+        before = self.order[target - 1] if target > 0 else None
+        after = self.order[target + 1] if target + 1 < len(self.order) else None
+        positions = dict(self.conn.execute("SELECT id, position FROM tasks WHERE id IN (?, ?)", (before, after)))
+        key = key_between(positions.get(before), positions.get(after))
+        self.conn.execute("UPDATE tasks SET position = ? WHERE id = ?", (key, card))
+        self.conn.commit()
+        if len(key) > MAX_KEY_LENGTH:
+            self.needs_rebalance.add((1, 'todo', key))
+        return 1
+
+    def _neighbours(self, project_id: int, status: str, key: str, side: str, limit: int) -> List[Tuple[int, str]]:
+        """Up to limit (id, position) rows past key on one side, nearest first."""
+        comparison, direction = ('<', 'DESC') if side == 'before' else ('>', 'ASC')
+        return self.conn.execute(
+            f"SELECT id, position FROM tasks WHERE project_id = ? AND status = ? AND position {comparison} ? "
+            f"ORDER BY position {direction} LIMIT ?", (project_id, status, key, limit)).fetchall()
+
+    def _run_edge(self, project_id: int, status: str, key: str, side: str):
+        """Walk from key to the first short key on one side.
+
+        Returns (ids of the long keys passed, the short boundary row or None at
+        the column edge, whether the run ended inside REBALANCE_WINDOW).
+        """
+        rows = self._neighbours(project_id, status, key, side, REBALANCE_WINDOW)
+        ids = []
+        for card, position in rows:
+            if len(position) <= SHORT_KEY_LENGTH:
+                return ids, (card, position), True
+            ids.append(card)
+        # Reached the column edge, or the window ran out before a short key
+        return ids, None, len(rows) < REBALANCE_WINDOW
+
+    def _widen(self, project_id: int, status: str, ids: List[int], low, high):
+        """Take the boundary rows and as many cards again past them into the window."""
+        extra = len(ids)
+        if low is not None:
+            below = self._neighbours(project_id, status, low[1], 'before', extra + 1)
+            ids = [card for card, _ in below[:extra][::-1]] + [low[0]] + ids
+            low = below[extra] if len(below) > extra else None
+        if high is not None:
+            above = self._neighbours(project_id, status, high[1], 'after', extra + 1)
+            ids = ids + [high[0]] + [card for card, _ in above[:extra]]
+            high = above[extra] if len(above) > extra else None
+        return ids, low, high
+
+    def rebalance(self) -> None:
+        """Background job: respace the keys around every queued long key."""
+        for project_id, status, key in self.needs_rebalance:
+            current = self.conn.execute("SELECT id FROM tasks WHERE project_id = ? AND status = ? AND position = ?",
+                                        (project_id, status, key)).fetchone()
+            if current is None:
+                continue
+            left, low, left_found = self._run_edge(project_id, status, key, 'before')
+            right, high, right_found = self._run_edge(project_id, status, key, 'after')
+            if left_found and right_found:
+                ids = left[::-1] + [current[0]] + right
+                keys = keys_between(low and low[1], high and high[1], len(ids))
+                while max(map(len, keys)) > SHORT_KEY_LENGTH and (low or high):
+                    ids, low, high = self._widen(project_id, status, ids, low, high)
+                    keys = keys_between(low and low[1], high and high[1], len(ids))
+            else:
+                ids = [row[0] for row in self.conn.execute(
+                    "SELECT id FROM tasks WHERE project_id = ? AND status = ? ORDER BY position", (project_id, status))]
+                keys = keys_between(None, None, len(ids))
+            self.conn.executemany("UPDATE tasks SET position = ? WHERE id = ?", zip(keys, ids))
+            self.rebalanced_rows += len(ids)
+            self.largest_rebalance = max(self.largest_rebalance, len(ids))
+        self.conn.commit()
+        self.needs_rebalance.clear()
+
+    def check_order(self) -> bool:
+        stored = [row[0] for row in self.conn.execute(
+            "SELECT id FROM tasks WHERE project_id = 1 AND status = 'todo' ORDER BY position")]
+        return stored == self.order
+
+    def max_key_length(self) -> int:
+        return self.conn.execute("SELECT max(length(position)) FROM tasks").fetchone()[0]
+
+
+def replay(cards: int, scheme: str, moves: int, pattern: str, seed: int = 42):
+    rng = random.Random(seed)
+    board = Board(cards, scheme)
+    written, latencies = [], []
+    for _ in range(moves):
+        source = rng.randrange(cards)
+        # 'top' keeps dropping cards into the same gap, the worst case for key growth
+        target = 1 if pattern == 'top' else rng.randrange(cards)
+        started = time.perf_counter()
+        written.append(board.move(source, target))
+        latencies.append((time.perf_counter() - started) * 1000)
+        if board.needs_rebalance:
+            board.rebalance()
+    return board, written, latencies
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark fractional keys against integer renumbering')
+    parser.add_argument('--cards', type=int, nargs='+', default=[100, 1000, 10_000, 100_000])
+    parser.add_argument('--moves', type=int, default=300)
+    args = parser.parse_args()
+
+    print("=== STRIVE TECH KANBAN ORDERING BENCHMARK ===\n")
+    for cards in args.cards:
+        print(f"{cards:,} cards, {args.moves} moves")
+        for pattern in ('random', 'top'):
+            for scheme in ('integer', 'fractional'):
+                board, written, latencies = replay(cards, scheme, args.moves, pattern)
+                detail = ''
+                status = 'ok' if board.check_order() else 'ORDER MISMATCH'
+                if scheme == 'fractional':
+                    per_move = (sum(written) + board.rebalanced_rows) / len(written)
+                    detail = (f"  max key {board.max_key_length()} chars, {board.rebalanced_rows:,} rows rebalanced "
+                              f"(largest {board.largest_rebalance:,}), {per_move:.1f} rows/move in all")
+                    if per_move > MAX_ROWS_PER_MOVE:
+                        status = 'REBALANCE STORM'
+                print(f"  • {pattern:<6} {scheme:<10} {sum(written) / len(written):>10,.1f} rows/move  "
+                      f"{format_latency(percentiles(latencies))}  {status}{detail}")
+        print()
@@ -0,0 +1,362 @@
+# Response cache for the AI assistant, scoped per organization
+#
+# Entries are keyed by organization, model, context_id (the project,
+# customer or task the conversation is about) and the normalized prompt:
+# Unicode NFKC, case-folded, whitespace collapsed and trailing punctuation
+# dropped. An approximate tier, off by default, catches reworded prompts:
+# every entry has a MinHash signature over character 4-grams of its prompt,
+# bucketed by LSH bands, and a lookup that misses the exact key accepts a
+# candidate from the same organization, model and context whose estimated
+# Jaccard similarity reaches the threshold. Keeping context_id in the scope
+# is what stops "summarize project Apollo" answering for project Atlas, and
+# the numbers in the prompt (invoice numbers, amounts, dates) and its
+# negation and qualifier words (GUARD_WORDS: not, don't, except, only, ...)
+# must match exactly for the same reason: "Do not summarize invoice 12" is
+# 0.86 similar to "Summarize invoice 12" on 4-grams.
+#
+# Each organization has a memory quota; inserting past it evicts that
+# organization's least recently used entries, so one busy tenant cannot
+# push out everyone else's. Entries also expire after a TTL. Every request
+# produces a usage_tracking row: misses bill their tokens, hits record
+# usage_amount 0 with the cached token count in metadata.
+#
+# The benchmark replays synthetic assistant traces (popular questions per
+# tenant, reworded repeats, one-off prompts) and reports hit rates, tokens
+# saved and wrong approximate answers for exact-only and MinHash caching.
+# The trace includes near misses (negated and qualified popular questions)
+# whose answers differ from the cached ones; any wrong answer fails the run.
+#
+# Usage: python prompt_cache.py --requests 200000 --organizations 200
+
+import argparse
+import hashlib
+import random
+import re
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from benchmark_utils import format_latency, percentiles
+
+DEFAULT_QUOTA_BYTES = 4 * 1024 * 1024
+DEFAULT_TTL = 24 * 3600
+SIMILARITY_THRESHOLD = 0.8
+SHINGLE_SIZE = 4
+BANDS = 16
+ROWS_PER_BAND = 4
+NUM_HASHES = BANDS * ROWS_PER_BAND
+# Bookkeeping per entry on top of prompt and response text
+ENTRY_OVERHEAD = 256 + 8 * NUM_HASHES
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_hash_random = np.random.default_rng(0x5EED)
+_HASH_A = _hash_random.integers(1, 1 << 31, NUM_HASHES, dtype=np.uint64)
+_HASH_B = _hash_random.integers(0, 1 << 31, NUM_HASHES, dtype=np.uint64)
+
+_WHITESPACE = re.compile(r'\s+')
+_TRAILING = re.compile(r'[\s.!?,;:]+$')
+_NUMBER = re.compile(r'\d+')
+# Words that flip or narrow what a prompt asks for; these, like numbers, must match exactly
+GUARD_WORDS = re.compile(r"\b(?:not|no|never|none|nothing|neither|nor|without|except|excluding|only|\w+n['\u2019]t)\b")
+
+Scope = Tuple[str, str, Optional[str]]  # organization_id, model, context_id
+
+
+def normalize_prompt(prompt: str) -> str:
+    text = unicodedata.normalize('NFKC', prompt).casefold()
+    return _TRAILING.sub('', _WHITESPACE.sub(' ', text).strip())
+
+
+def minhash(text: str) -> np.ndarray:
+    """NUM_HASHES minimum hashes over the character shingles of text."""
+    if len(text) < SHINGLE_SIZE:
+        text = text.ljust(SHINGLE_SIZE)
+    shingles = {zlib.crc32(text[i:i + SHINGLE_SIZE].encode()) for i in range(len(text) - SHINGLE_SIZE + 1)}
+    values = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+    # a * x + b stays below 2**64 for 31-bit a, b and 32-bit x
+    return ((_HASH_A[:, None] * values[None, :] + _HASH_B[:, None]) % _MERSENNE_PRIME).min(axis=1)
+
+
+@dataclass
+class CacheEntry:
+    key: bytes
+    scope: Scope
+    response: str
+    tokens: int
+    size: int
+    expires_at: float
+    signature: Optional[np.ndarray] = None
+    bands: List[tuple] = field(default_factory=list)
+
+
+@dataclass
+class CacheHit:
+    response: str
+    tokens: int
+    match: str  # 'exact' or 'approximate'
+    similarity: float = 1.0
+
+
+@dataclass
+class CacheStats:
+    exact_hits: int = 0
+    approximate_hits: int = 0
+    misses: int = 0
+    evicted: int = 0
+    expired: int = 0
+
+
+class PromptCache:
+    """LRU/TTL response cache with a memory quota per organization."""
+
+    def __init__(self, quota_bytes: int = DEFAULT_QUOTA_BYTES, ttl: float = DEFAULT_TTL,
+                 approximate: bool = False, threshold: float = SIMILARITY_THRESHOLD,
+                 quotas: Optional[Dict[str, int]] = None, clock: Callable[[], float] = time.monotonic):
+        self.quota_bytes = quota_bytes
+        self.quotas = quotas or {}
+        self.ttl = ttl
+        self.approximate = approximate
+        self.threshold = threshold
+        self.clock = clock
+        self.stats = CacheStats()
+        self._entries: Dict[str, OrderedDict] = {}
+        self._used: Dict[str, int] = {}
+        self._buckets: Dict[tuple, Set[bytes]] = {}
+
+    @staticmethod
+    def _key(scope: Scope, normalized: str) -> bytes:
+        organization_id, model, context_id = scope
+        return hashlib.sha256(f"{organization_id}\0{model}\0{context_id or ''}\0{normalized}".encode()).digest()[:16]
+
+    def used_bytes(self, organization_id: str) -> int:
+        return self._used.get(organization_id, 0)
+
+    def _remove(self, organization_id: str, key: bytes) -> None:
+        entry = self._entries[organization_id].pop(key)
+        self._used[organization_id] -= entry.size
+        for band in entry.bands:
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band]
+
+    def _live(self, organization_id: str, key: bytes, now: float) -> Optional[CacheEntry]:
+        entries = self._entries.get(organization_id)
+        entry = entries.get(key) if entries else None
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            self._remove(organization_id, key)
+            self.stats.expired += 1
+            return None
+        return entry
+
+    def get(self, organization_id: str, model: str, context_id: Optional[str], prompt: str) -> Optional[CacheHit]:
+        now = self.clock()
+        scope = (organization_id, model, context_id)
+        normalized = normalize_prompt(prompt)
+        key = self._key(scope, normalized)
+        entry = self._live(organization_id, key, now)
+        if entry is not None:
+            self._entries[organization_id].move_to_end(key)
+            self.stats.exact_hits += 1
+            return CacheHit(entry.response, entry.tokens, 'exact')
+        if self.approximate:
+            signature = minhash(normalized)
+            best, best_similarity = None, self.threshold
+            for band in self._bands(scope, normalized, signature):
+                for candidate_key in list(self._buckets.get(band, ())):
+                    candidate = self._live(organization_id, candidate_key, now)
+                    if candidate is None:
+                        continue
+                    similarity = float(np.mean(candidate.signature == signature))
+                    if similarity >= best_similarity:
+                        best, best_similarity = candidate, similarity
+            if best is not None:
+                self._entries[organization_id].move_to_end(best.key)
+                self.stats.approximate_hits += 1
+                return CacheHit(best.response, best.tokens, 'approximate', best_similarity)
+        self.stats.misses += 1
+        return None
+
+    def put(self, organization_id: str, model: str, context_id: Optional[str], prompt: str,
+            response: str, tokens: int) -> None:
+        scope = (organization_id, model, context_id)
+        normalized = normalize_prompt(prompt)
+        key = self._key(scope, normalized)
+        entries = self._entries.setdefault(organization_id, OrderedDict())
+        if key in entries:
+            self._remove(organization_id, key)
+        entry = CacheEntry(key, scope, response, tokens, len(normalized.encode()) + len(response.encode()) + ENTRY_OVERHEAD,
+                           self.clock() + self.ttl)
+        quota = self.quotas.get(organization_id, self.quota_bytes)
+        if entry.size > quota:
+            return
+        if self.approximate:
+            entry.signature = minhash(normalized)
+            entry.bands = self._bands(scope, normalized, entry.signature)
+            for band in entry.bands:
+                self._buckets.setdefault(band, set()).add(key)
+        entries[key] = entry
+        self._used[organization_id] = self._used.get(organization_id, 0) + entry.size
+        while self._used[organization_id] > quota:
+            self._remove(organization_id, next(iter(entries)))
+            self.stats.evicted += 1
+
+    @staticmethod
+    def _bands(scope: Scope, normalized: str, signature: np.ndarray) -> List[tuple]:
+        exact = (tuple(_NUMBER.findall(normalized)), tuple(GUARD_WORDS.findall(normalized)))
+        rows = signature.reshape(BANDS, ROWS_PER_BAND)
+        return [(scope, exact, band, rows[band].tobytes()) for band in range(BANDS)]
+
+
+def usage_row(organization_id: str, user_id: str, model: str, tokens: int, hit: Optional[CacheHit],
+              billing_period: str) -> dict:
+    """usage_tracking row for one assistant request; cached answers are recorded but not billed."""
+    if hit is None:
+        metadata = {'cache': 'miss'}
+    else:
+        metadata = {'cache': hit.match, 'cached_tokens': hit.tokens, 'similarity': round(hit.similarity, 3)}
+    return {
+        'organization_id': organization_id,
+        'user_id': user_id,
+        'resource_type': 'ai_tokens',
+        'resource_name': model,
+        'usage_amount': 0 if hit else tokens,
+        'billing_period': billing_period,
+        'metadata': metadata,
+    }
+
+
+def cached_completion(cache: PromptCache, usage: List[dict], complete: Callable[[str], Tuple[str, int]],
+                      organization_id: str, user_id: str, model: str, context_id: Optional[str], prompt: str,
+                      billing_period: str) -> Tuple[str, Optional[CacheHit]]:
+    """Answer from the cache or the model, appending the usage_tracking row to usage."""
+    hit = cache.get(organization_id, model, context_id, prompt)
+    if hit is not None:
+        usage.append(usage_row(organization_id, user_id, model, hit.tokens, hit, billing_period))
+        return hit.response, hit
+    response, tokens = complete(prompt)
+    cache.put(organization_id, model, context_id, prompt, response, tokens)
+    usage.append(usage_row(organization_id, user_id, model, tokens, None, billing_period))
+    return response, None
+
+
+TEMPLATES = [
+    "Summarize the current status of project {name}",
+    "What are the overdue tasks in project {name}?",
+    "Draft a follow-up email to {name} about their renewal",
+    "List the open invoices for customer {name}",
+    "Write a short update for the client on {name} this week",
+    "What did we discuss in the last meeting with {name}?",
+]
+REWORDINGS = [
+    lambda text: text.upper(),
+    lambda text: '  ' + text.replace(' ', '   ') + '  ',
+    lambda text: text + '.',
+    lambda text: 'Please ' + text[0].lower() + text[1:],
+    lambda text: text + ' please',
+    lambda text: 'Can you ' + text[0].lower() + text[1:].rstrip('?') + '?',
+    lambda text: text.replace('the ', '', 1),
+]
+# Close rewordings of a popular question that ask for something else
+NEAR_MISSES = [
+    lambda text: 'Do not ' + text[0].lower() + text[1:],
+    lambda text: "Don't " + text[0].lower() + text[1:],
+    lambda text: text.rstrip('?') + ' except the first one',
+    lambda text: text.replace(' the ', ' only the ', 1) if ' the ' in text else 'Only ' + text[0].lower() + text[1:],
+    lambda text: text.replace(' in ', ' not in ', 1) if ' in ' in text else text + ' without details',
+]
+MODELS = ['openai_gpt4', 'claude_sonnet', 'gemini']
+
+
+def make_trace(requests: int, organizations: int, days: int, seed: int = 42) -> List[tuple]:
+    """(time, organization, user, model, context_id, prompt, intent) sorted by time.
+
+    Each tenant has a Zipf-popular set of questions about its own projects
+    and customers; 30% of repeats are reworded, 3% are near misses with an
+    answer of their own and 20% of requests are one-off.
+    """
+    rng = random.Random(seed)
+    weights = [rng.paretovariate(1.1) for _ in range(organizations)]
+    contexts = {org: [f'org{org}-ctx{index}' for index in range(rng.randint(5, 60))] for org in range(organizations)}
+    trace = []
+    for _ in range(requests):
+        org = rng.choices(range(organizations), weights)[0]
+        user = f'org{org}-user{rng.randrange(10)}'
+        if rng.random() < 0.2:
+            context = rng.choice(contexts[org])
+            prompt = f"Explain {rng.choice(['why', 'how', 'when'])} {context} changed: note {rng.randrange(10**9)}"
+            intent = ('one-off', prompt)
+            model = rng.choice(MODELS)
+        else:
+            popular = min(int(rng.paretovariate(1.0)) - 1, len(contexts[org]) * len(TEMPLATES) - 1)
+            context = contexts[org][popular % len(contexts[org])]
+            template = TEMPLATES[popular // len(contexts[org]) % len(TEMPLATES)]
+            model = MODELS[popular % len(MODELS)]
+            prompt = template.format(name=context.split('-')[1].title())
+            intent = (template, context)
+            draw = rng.random()
+            if draw < 0.03:
+                variant = rng.randrange(len(NEAR_MISSES))
+                prompt = NEAR_MISSES[variant](prompt)
+                intent = ('near-miss', variant, template, context)
+            elif draw < 0.33:
+                prompt = rng.choice(REWORDINGS)(prompt)
+        trace.append((rng.uniform(0, days * 86400), f'org{org}', user, model, context, prompt, intent))
+    trace.sort(key=lambda row: row[0])
+    return trace
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay assistant traces through the prompt cache')
+    parser.add_argument('--requests', type=int, default=200_000)
+    parser.add_argument('--organizations', type=int, default=200)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--quota-kb', type=int, nargs='+', default=[64, 1024])
+    args = parser.parse_args()
+
+    trace = make_trace(args.requests, args.organizations, args.days)
+    token_rng = random.Random(7)
+    tokens_for = {}
+    print("=== STRIVE TECH PROMPT CACHE BENCHMARK ===\n")
+    print(f"{len(trace):,} requests from {args.organizations} organizations over {args.days} days, "
+          f"TTL {DEFAULT_TTL // 3600}h\n")
+    for quota_kb in args.quota_kb:
+        print(f"Quota {quota_kb:,} KiB per organization")
+        print("-" * 60)
+        for approximate in (False, True):
+            now = [0.0]
+            cache = PromptCache(quota_bytes=quota_kb * 1024, approximate=approximate, clock=lambda: now[0])
+            usage, latencies, wrong, wrong_near_misses = [], [], 0, 0
+            total_tokens = 0
+            for at, org, user, model, context, prompt, intent in trace:
+                now[0] = at
+                tokens = tokens_for.setdefault(intent, token_rng.randint(200, 800))
+                total_tokens += tokens
+                started = time.perf_counter()
+                response, hit = cached_completion(cache, usage, lambda text: (repr(intent), tokens), org, user,
+                                                  model, context, prompt, '2026-01-01')
+                latencies.append((time.perf_counter() - started) * 1000)
+                mistaken = hit is not None and response != repr(intent)
+                wrong += mistaken
+                wrong_near_misses += mistaken and intent[0] == 'near-miss'
+            billed = sum(row['usage_amount'] for row in usage)
+            stats = cache.stats
+            hits = stats.exact_hits + stats.approximate_hits
+            name = 'exact + minhash' if approximate else 'exact only'
+            print(f"  • {name:<15} hit rate {hits * 100 / len(trace):5.1f}% ({stats.exact_hits:,} exact, "
+                  f"{stats.approximate_hits:,} approximate), {wrong:,} wrong answers "
+                  f"({wrong_near_misses:,} near misses)")
+            print(f"    {'':<15} tokens billed {billed:,} of {total_tokens:,} ({(1 - billed / total_tokens) * 100:.1f}% saved), "
+                  f"{stats.evicted:,} evicted, {stats.expired:,} expired")
+            print(f"    {'':<15} {format_latency(percentiles(latencies))} per request")
+            if wrong:
+                raise SystemExit(f"{name}: {wrong:,} requests answered from another prompt's cache entry")
+        print()
@@ -0,0 +1,257 @@
+# AI tool entitlements and per-organization rate limits
+#
+# Entitlements: every active ai_tools row gets a bit, and every tier gets
+# the mask of tools whose required_tier it meets. An organization's mask is
+# its tier's mask plus any per-organization grants, so "may this
+# organization call this tool" is one shift and AND. The tier comes from
+# the organization's subscription; subscriptions outside ENTITLED_STATUSES
+# fall back to 'free'.
+#
+# Rate limits: one token bucket per organization, with rate and burst from
+# its tier. Refill is lazy: an acquire adds rate * elapsed, caps at burst
+# and takes the cost in one step, under a lock in LocalBucketStore and as a
+# single UPDATE ... RETURNING in SQLiteBucketStore, which lets several
+# worker processes on one host share the buckets. Both stores refuse an
+# organization that has no bucket yet (set_subscription creates it), so a
+# grant alone never lets calls through unmetered.
+#
+# The benchmark runs a stream of checks against 10k organizations and 50
+# tools through both stores. Most of that stream is refused by the
+# entitlement bitset before any bucket is touched, so it then replays only
+# the entitled checks, the path that spends tokens, against CHECK_TARGET.
+# The shared SQLite store pays for one statement per acquire and can fall
+# short of it on one core; the in-process store is the one held to it.
+# Finally it checks that concurrent threads never take more than a bucket
+# holds.
+#
+# Usage: python rate_limiter.py --checks 1000000 --organizations 10000
+
+import argparse
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from schema_spec import load_tables
+
+TIERS = load_tables()['subscriptions'].column('tier').enum_values
+TIER_RANK = {tier: rank for rank, tier in enumerate(TIERS)}
+ENTITLED_STATUSES = ('active', 'past_due')
+
+# Tier -> (tokens per second, burst)
+TIER_LIMITS = {
+    'free': (0.2, 5),
+    'basic': (1.0, 20),
+    'pro': (5.0, 100),
+    'enterprise': (25.0, 500),
+}
+
+ALLOWED = 'allowed'
+NOT_ENTITLED = 'not_entitled'
+RATE_LIMITED = 'rate_limited'
+
+# Entitled checks per second one core must sustain
+CHECK_TARGET = 100_000
+
+
+def effective_tier(tier: Optional[str], status: Optional[str]) -> str:
+    return tier if tier and status in ENTITLED_STATUSES else 'free'
+
+
+class Entitlements:
+    """Bitsets of callable tools per tier and per organization."""
+
+    def __init__(self, tools: Iterable[Tuple[str, str, bool]]):
+        """tools: (id, required_tier, is_active) rows of ai_tools."""
+        self.bit: Dict[str, int] = {}
+        self.tier_masks = {tier: 0 for tier in TIERS}
+        for tool_id, required_tier, is_active in tools:
+            bit = self.bit[tool_id] = len(self.bit)
+            if not is_active:
+                continue
+            for tier in TIERS:
+                if TIER_RANK[tier] >= TIER_RANK[required_tier]:
+                    self.tier_masks[tier] |= 1 << bit
+        self.masks: Dict[str, int] = {}
+        self.grants: Dict[str, int] = {}
+
+    def set_tier(self, organization_id: str, tier: str) -> None:
+        self.masks[organization_id] = self.tier_masks[tier] | self.grants.get(organization_id, 0)
+
+    def grant(self, organization_id: str, tool_id: str, tier: str) -> None:
+        """Give one organization a tool above its tier, e.g. during a trial."""
+        self.grants[organization_id] = self.grants.get(organization_id, 0) | 1 << self.bit[tool_id]
+        self.set_tier(organization_id, tier)
+
+    def allows(self, organization_id: str, tool_id: str) -> bool:
+        bit = self.bit.get(tool_id)
+        return bit is not None and self.masks.get(organization_id, 0) >> bit & 1 == 1
+
+
+class LocalBucketStore:
+    """Token buckets in process memory; each acquire is atomic under one lock."""
+
+    def __init__(self):
+        self._buckets: Dict[str, List[float]] = {}  # [tokens, updated_at, rate, burst]
+        self._lock = threading.Lock()
+
+    def configure(self, key: str, rate: float, burst: float, now: float) -> None:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                self._buckets[key] = [burst, now, rate, burst]
+            else:
+                # A tier change keeps what is left, capped at the new burst
+                tokens = min(bucket[3], bucket[0] + (now - bucket[1]) * bucket[2])
+                self._buckets[key] = [min(tokens, burst), now, rate, burst]
+
+    def acquire(self, key: str, cost: float, now: float) -> bool:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return False
+            tokens = bucket[0] + (now - bucket[1]) * bucket[2]
+            if tokens > bucket[3]:
+                tokens = bucket[3]
+            bucket[1] = now
+            if tokens >= cost:
+                bucket[0] = tokens - cost
+                return True
+            bucket[0] = tokens
+            return False
+
+
+class SQLiteBucketStore:
+    """Token buckets in a SQLite file that processes on one host can share."""
+
+    SCHEMA = """CREATE TABLE IF NOT EXISTS rate_buckets (
+  key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, rate REAL NOT NULL, burst REAL NOT NULL
+) WITHOUT ROWID"""
+
+    # Refill, cap and take in one statement; no row back means not enough tokens
+    ACQUIRE = """UPDATE rate_buckets
+SET tokens = min(burst, tokens + (:now - updated_at) * rate) - :cost, updated_at = :now
+WHERE key = :key AND min(burst, tokens + (:now - updated_at) * rate) >= :cost
+RETURNING tokens"""
+
+    def __init__(self, path: str = ':memory:'):
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute(self.SCHEMA)
+
+    def configure(self, key: str, rate: float, burst: float, now: float) -> None:
+        self.conn.execute(
+            "INSERT INTO rate_buckets VALUES (:key, :burst, :now, :rate, :burst) ON CONFLICT (key) DO UPDATE SET "
+            "tokens = min(:burst, min(burst, tokens + (:now - updated_at) * rate)), updated_at = :now, "
+            "rate = :rate, burst = :burst", {'key': key, 'rate': rate, 'burst': burst, 'now': now})
+
+    def acquire(self, key: str, cost: float, now: float) -> bool:
+        return self.conn.execute(self.ACQUIRE, {'key': key, 'cost': cost, 'now': now}).fetchone() is not None
+
+
+@dataclass
+class CheckStats:
+    allowed: int = 0
+    not_entitled: int = 0
+    rate_limited: int = 0
+
+
+class AccessControl:
+    """Entitlement and rate limit check for an AI tool call."""
+
+    def __init__(self, entitlements: Entitlements, store=None, clock=time.monotonic):
+        self.entitlements = entitlements
+        self.store = store or LocalBucketStore()
+        self.clock = clock
+        self.stats = CheckStats()
+
+    def set_subscription(self, organization_id: str, tier: Optional[str], status: Optional[str]) -> str:
+        tier = effective_tier(tier, status)
+        self.entitlements.set_tier(organization_id, tier)
+        rate, burst = TIER_LIMITS[tier]
+        self.store.configure(organization_id, rate, burst, self.clock())
+        return tier
+
+    def check(self, organization_id: str, tool_id: str, cost: float = 1.0, now: Optional[float] = None) -> str:
+        # Entitlement first, so calls that will be refused do not use up tokens
+        if not self.entitlements.allows(organization_id, tool_id):
+            self.stats.not_entitled += 1
+            return NOT_ENTITLED
+        if not self.store.acquire(organization_id, cost, self.clock() if now is None else now):
+            self.stats.rate_limited += 1
+            return RATE_LIMITED
+        self.stats.allowed += 1
+        return ALLOWED
+
+
+def make_tools(count: int, rng: random.Random) -> List[Tuple[str, str, bool]]:
+    required = load_tables()['ai_tools'].column('required_tier').enum_values
+    return [(f'tool-{index}', rng.choice(required), rng.random() > 0.05) for index in range(count)]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark AI tool entitlement and rate limit checks')
+    parser.add_argument('--checks', type=int, default=1_000_000)
+    parser.add_argument('--organizations', type=int, default=10_000)
+    parser.add_argument('--tools', type=int, default=50)
+    parser.add_argument('--rate', type=float, default=100_000, help='simulated checks per second of traffic')
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    tools = make_tools(args.tools, rng)
+    organizations = [f'org-{index}' for index in range(args.organizations)]
+    subscriptions = [(rng.choices(TIERS, [50, 25, 15, 10])[0], rng.choices(['active', 'past_due', 'cancelled'], [90, 5, 5])[0])
+                     for _ in organizations]
+    weights = [1 / (rank + 1) for rank in range(args.organizations)]
+    stream = list(zip(rng.choices(organizations, weights, k=args.checks),
+                      (tools[index][0] for index in rng.choices(range(args.tools), k=args.checks))))
+
+    print("=== STRIVE TECH RATE LIMITER BENCHMARK ===\n")
+    print(f"{args.checks:,} checks over {args.organizations:,} organizations and {args.tools} tools, "
+          f"simulated traffic at {args.rate:,.0f} checks/s\n")
+    for name, store in (('local', LocalBucketStore()), ('sqlite', SQLiteBucketStore())):
+        control = AccessControl(Entitlements(tools), store, clock=lambda: 0.0)
+        for organization_id, (tier, status) in zip(organizations, subscriptions):
+            control.set_subscription(organization_id, tier, status)
+        check = control.check
+        step = 1 / args.rate
+        started = time.perf_counter()
+        for index, (organization_id, tool_id) in enumerate(stream):
+            check(organization_id, tool_id, 1.0, index * step)
+        elapsed = time.perf_counter() - started
+        stats = control.stats
+        print(f"  • {name:<6} store: {args.checks / elapsed:>10,.0f} checks/s ({elapsed * 1e6 / args.checks:.2f}us each); "
+              f"{stats.allowed:,} allowed, {stats.rate_limited:,} rate limited, {stats.not_entitled:,} not entitled")
+        # Free organizations have no tools, so most of the stream never reaches a bucket; time the entitled checks alone
+        allows = control.entitlements.allows
+        entitled = [(organization_id, tool_id) for organization_id, tool_id in stream if allows(organization_id, tool_id)]
+        before = control.stats.allowed
+        started = time.perf_counter()
+        for index, (organization_id, tool_id) in enumerate(entitled):
+            check(organization_id, tool_id, 1.0, (args.checks + index) * step)
+        elapsed = time.perf_counter() - started
+        rate = len(entitled) / elapsed
+        print(f"    {'':<6} entitled only: {rate:>10,.0f} checks/s ({elapsed * 1e6 / len(entitled):.2f}us each) "
+              f"over {len(entitled):,} checks, {control.stats.allowed - before:,} allowed; "
+              f"target {CHECK_TARGET:,}/s {'ok' if rate >= CHECK_TARGET else 'BELOW TARGET'}")
+
+    # Threads racing on one bucket with the clock stopped can take at most its burst
+    print("-" * 60)
+    for name, store in (('local', LocalBucketStore()), ('sqlite', SQLiteBucketStore())):
+        control = AccessControl(Entitlements([('tool-0', 'basic', True)]), store, clock=lambda: 0.0)
+        control.set_subscription('org-0', 'enterprise', 'active')
+        granted = []
+
+        def hammer():
+            granted.append(sum(control.check('org-0', 'tool-0', now=0.0) == ALLOWED for _ in range(2000)))
+        threads = [threading.Thread(target=hammer) for _ in range(args.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        burst = TIER_LIMITS['enterprise'][1]
+        print(f"  • {name:<6} store, {args.threads} threads x 2,000 calls on one bucket: {sum(granted)} granted "
+              f"(burst {burst}) {'ok' if sum(granted) == burst else 'OVERSPENT'}")
@@ -0,0 +1,281 @@
+# Appointment reminders on a hierarchical timing wheel
+#
+# Instead of scanning appointments every minute, the scheduler loads the
+# reminders falling due in the next LOAD_CHUNK seconds through the
+# appointments.start_time index, keeps them in a hierarchical timing wheel
+# (seconds, minutes, hours, days) and fires each wheel tick as one batch.
+# A batch is claimed with a single conditional UPDATE that writes the
+# reminder kind into reminders_sent and returns only the rows that did not
+# have it yet. Only claimed rows are delivered, so a reminder loaded twice,
+# or reloaded after a restart, goes out once.
+#
+# After a restart, rebuild() reloads every unsent reminder of appointments
+# that have not started yet, so reminders missed while down still go out.
+#
+# The benchmark schedules 10M reminders (two per appointment), runs the
+# clock through all of them with a restart halfway, and checks that every
+# reminder was recorded exactly once.
+#
+# Usage: python reminder_scheduler.py --reminders 10000000
+
+import argparse
+import json
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Reminder kind -> seconds before start_time
+REMINDER_OFFSETS = {'24h': 24 * 3600, '1h': 3600}
+LIVE_STATUSES = ('scheduled', 'confirmed')
+LOAD_CHUNK = 15 * 60
+WHEEL_SIZES = (60, 60, 24, 512)
+CLAIM_BATCH = 5000
+
+
+class TimingWheel:
+    """Hierarchical timing wheel with a one-second tick.
+
+    Level i has WHEEL_SIZES[i] slots of spans[i] seconds. An entry goes in
+    the lowest level whose range covers it, and moves down when the clock
+    reaches the start of its slot, so adding, cascading and firing are O(1)
+    per entry and level.
+    """
+
+    def __init__(self, now: int, sizes: Sequence[int] = WHEEL_SIZES):
+        self.sizes = sizes
+        self.spans = [1]
+        for size in sizes[:-1]:
+            self.spans.append(self.spans[-1] * size)
+        # An entry fits level i while it is due less than limits[i] seconds ahead
+        self.limits = [span * size for span, size in zip(self.spans, sizes)]
+        self.slots = [[[] for _ in range(size)] for size in sizes]
+        self.current = now  # next tick to process
+        self.count = 0
+
+    def _place(self, due: int, item, delta: int, levels: int) -> None:
+        for level in range(levels):
+            if delta < self.limits[level]:
+                self.slots[level][due // self.spans[level] % self.sizes[level]].append((due, item))
+                return
+        raise ValueError(f"{due} is beyond the wheel horizon")
+
+    def add(self, due: int, item) -> bool:
+        """Schedule item at due; False when due has already passed (fire it now)."""
+        delta = due - self.current
+        if delta < 0:
+            return False
+        self._place(due, item, delta, len(self.sizes))
+        self.count += 1
+        return True
+
+    def _cascade(self, tick: int) -> None:
+        """Move the slots starting at tick down, top level first."""
+        for level in range(len(self.sizes) - 1, 0, -1):
+            span = self.spans[level]
+            if tick % span:
+                continue
+            index = tick // span % self.sizes[level]
+            entries, self.slots[level][index] = self.slots[level][index], []
+            for due, item in entries:
+                self._place(due, item, due - tick, level)
+
+    def advance(self, now: int) -> List[Tuple[int, object]]:
+        """Process every tick up to and including now; return (due, item) fired."""
+        fired = []
+        lowest, size = self.slots[0], self.sizes[0]
+        while self.current <= now and self.count:
+            tick = self.current
+            self._cascade(tick)
+            # Level 0 covers exactly one level 1 slot: drain it up to the next cascade
+            stop = min(now, tick - tick % size + size - 1)
+            for second in range(tick, stop + 1):
+                slot = lowest[second % size]
+                if slot:
+                    fired.extend(slot)
+                    slot.clear()
+            self.current = stop + 1
+        if not self.count:
+            self.current = max(self.current, now + 1)
+        self.count -= len(fired)
+        return fired
+
+
+@dataclass
+class SchedulerStats:
+    loaded: int = 0
+    claimed: int = 0
+    skipped: int = 0
+    batches: int = 0
+
+
+def _json_path(kind: str) -> str:
+    return f'$."{kind}"'
+
+
+class ReminderScheduler:
+    """Loads, schedules and fires appointment reminders from one connection.
+
+    deliver(kind, appointment_ids) is called after the batch is claimed.
+    """
+
+    def __init__(self, conn, deliver: Callable[[str, List[str]], None], now: int,
+                 offsets: Dict[str, int] = REMINDER_OFFSETS, load_chunk: int = LOAD_CHUNK):
+        self.conn = conn
+        self.deliver = deliver
+        self.offsets = offsets
+        self.load_chunk = load_chunk
+        self.wheel = TimingWheel(now)
+        self.loaded_until = now
+        self.stats = SchedulerStats()
+
+    def _load(self, low: Optional[int], high: int, now: int) -> None:
+        """Schedule unsent reminders due in (low, high]; low None means any time before."""
+        statuses = ', '.join(f"'{status}'" for status in LIVE_STATUSES)
+        overdue = []
+        for kind, offset in self.offsets.items():
+            bounds = "start_time <= :high" if low is None else "start_time > :low AND start_time <= :high"
+            rows = self.conn.execute(
+                f"SELECT id, start_time FROM appointments WHERE {bounds} AND start_time > :now "
+                f"AND status IN ({statuses}) AND json_extract(reminders_sent, :path) IS NULL",
+                {'low': None if low is None else low + offset, 'high': high + offset, 'now': now,
+                 'path': _json_path(kind)})
+            for appointment_id, start_time in rows:
+                self.stats.loaded += 1
+                if not self.wheel.add(start_time - offset, (kind, appointment_id)):
+                    overdue.append((kind, appointment_id))
+        self._fire(overdue, now)
+
+    def rebuild(self, now: int) -> None:
+        """Fill the wheel from the table after a restart."""
+        self.wheel = TimingWheel(now)
+        self._load(None, now + self.load_chunk, now)
+        self.loaded_until = now + self.load_chunk
+
+    def schedule(self, appointment_id: str, start_time: int, now: int) -> None:
+        """Call when an appointment is created or moved; later chunks pick it up otherwise.
+
+        A moved appointment's old entry stays in the wheel and is dropped when
+        the claim sees that the reminder is not due yet.
+        """
+        for kind, offset in self.offsets.items():
+            due = start_time - offset
+            if due <= self.loaded_until and start_time > now and not self.wheel.add(due, (kind, appointment_id)):
+                self._fire([(kind, appointment_id)], now)
+
+    def run_until(self, now: int) -> None:
+        while self.loaded_until < now + self.load_chunk:
+            self._load(self.loaded_until, self.loaded_until + self.load_chunk, now)
+            self.loaded_until += self.load_chunk
+        self._fire([item for _, item in self.wheel.advance(now)], now)
+
+    def _fire(self, items: Iterable[Tuple[str, str]], now: int) -> None:
+        by_kind: Dict[str, List[str]] = {}
+        for kind, appointment_id in items:
+            by_kind.setdefault(kind, []).append(appointment_id)
+        if not by_kind:
+            return
+        claims = []
+        for kind, ids in by_kind.items():
+            for start in range(0, len(ids), CLAIM_BATCH):
+                batch = ids[start:start + CLAIM_BATCH]
+                claimed = [row[0] for row in self.conn.execute(self._claim_sql(), {
+                    'ids': json.dumps(batch), 'path': _json_path(kind), 'now': now,
+                    'offset': self.offsets[kind]})]
+                self.stats.batches += 1
+                self.stats.claimed += len(claimed)
+                self.stats.skipped += len(batch) - len(claimed)
+                if claimed:
+                    claims.append((kind, claimed))
+        # Deliver only once the claims are durable
+        self.conn.commit()
+        for kind, claimed in claims:
+            self.deliver(kind, claimed)
+
+    @staticmethod
+    def _claim_sql() -> str:
+        statuses = ', '.join(f"'{status}'" for status in LIVE_STATUSES)
+        # PostgreSQL: reminders_sent = coalesce(reminders_sent, '{}') || jsonb_build_object(:kind, now()),
+        # guarded by NOT (coalesce(reminders_sent, '{}') ? :kind)
+        return f"""UPDATE appointments
+SET reminders_sent = json_set(coalesce(reminders_sent, '{{}}'), :path, :now)
+WHERE id IN (SELECT value FROM json_each(:ids))
+  AND json_extract(reminders_sent, :path) IS NULL
+  AND status IN ({statuses})
+  AND start_time - :offset <= :now AND start_time > :now
+RETURNING id"""
+
+
+def create_appointments(conn, count: int, start: int, span: int) -> None:
+    """Appointments with start_time as epoch seconds, spread evenly over span."""
+    conn.execute("CREATE TABLE appointments (id TEXT PRIMARY KEY, start_time INTEGER NOT NULL, "
+                 "status TEXT NOT NULL, reminders_sent TEXT)")
+    conn.executemany("INSERT INTO appointments VALUES (?, ?, 'scheduled', NULL)",
+                     ((f'a{index}', start + index * span // count) for index in range(count)))
+    conn.execute("CREATE INDEX idx_appointments_start_time ON appointments (start_time)")
+    conn.commit()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the timing-wheel reminder scheduler')
+    parser.add_argument('--reminders', type=int, default=10_000_000)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--step', type=int, default=10, help='seconds between scheduler polls')
+    args = parser.parse_args()
+
+    appointments = args.reminders // len(REMINDER_OFFSETS)
+    clock = 1767225600  # 2026-01-01T00:00:00Z
+    first_start = clock + max(REMINDER_OFFSETS.values()) + 60
+    end = first_start + args.days * 86400
+
+    print("=== STRIVE TECH REMINDER SCHEDULER BENCHMARK ===\n")
+    started = time.perf_counter()
+    wheel = TimingWheel(clock)
+    for index in range(args.reminders):
+        wheel.add(clock + index * args.days * 86400 // args.reminders, index)
+    added = time.perf_counter() - started
+    fired = len(wheel.advance(clock + args.days * 86400))
+    print(f"Wheel alone: {args.reminders:,} reminders added at {args.reminders / added / 1e6:.1f}M/s, "
+          f"{fired:,} fired in {time.perf_counter() - started - added:.1f}s")
+
+    conn = sqlite3.connect(':memory:')
+    started = time.perf_counter()
+    create_appointments(conn, appointments, first_start, args.days * 86400)
+    print(f"{appointments:,} appointments ({appointments * len(REMINDER_OFFSETS):,} reminders) "
+          f"over {args.days} days, table built in {time.perf_counter() - started:.1f}s")
+    print("-" * 60)
+
+    delivered = {kind: 0 for kind in REMINDER_OFFSETS}
+
+    def deliver(kind: str, ids: List[str]) -> None:
+        delivered[kind] += len(ids)
+
+    restart_at = clock + (end - clock) // 2
+    scheduler = ReminderScheduler(conn, deliver, clock)
+    totals = SchedulerStats()
+    started = time.perf_counter()
+    now = clock
+    restarted = False
+    while now <= end:
+        scheduler.run_until(now)
+        if not restarted and now >= restart_at:
+            # Lose the in-memory wheel and come back 5 minutes later
+            for field in ('loaded', 'claimed', 'skipped', 'batches'):
+                setattr(totals, field, getattr(totals, field) + getattr(scheduler.stats, field))
+            now += 300
+            scheduler = ReminderScheduler(conn, deliver, now)
+            scheduler.rebuild(now)
+            restarted = True
+        now += args.step
+    elapsed = time.perf_counter() - started
+    for field in ('loaded', 'claimed', 'skipped', 'batches'):
+        setattr(totals, field, getattr(totals, field) + getattr(scheduler.stats, field))
+
+    recorded = {kind: conn.execute("SELECT count(*) FROM appointments WHERE json_extract(reminders_sent, ?) IS NOT NULL",
+                                   (_json_path(kind),)).fetchone()[0] for kind in REMINDER_OFFSETS}
+    print(f"  • {totals.claimed:,} reminders fired in {elapsed:.1f}s ({totals.claimed / elapsed:,.0f}/s), "
+          f"{totals.batches:,} claim batches")
+    print(f"  • loaded {totals.loaded:,} (including reloads after the restart), {totals.skipped:,} skipped as already sent")
+    for kind in REMINDER_OFFSETS:
+        status = 'ok' if delivered[kind] == recorded[kind] == appointments else 'MISMATCH'
+        print(f"  • {kind:<4} delivered {delivered[kind]:,}, recorded {recorded[kind]:,} of {appointments:,}: {status}")
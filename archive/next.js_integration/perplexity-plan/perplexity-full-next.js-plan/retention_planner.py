@@ -0,0 +1,309 @@
+# Retention and tiering planner for the monthly partitioned tables
+#
+# Lists the monthly partitions of activity_logs and usage_tracking (see
+# PARTITIONED_TABLES in schema_ddl.py), exports every month older than the
+# retention window to a compressed columnar file on local disk, reads each
+# export back to check its row count, and writes the DETACH/DROP statements
+# for the verified months. Dropping a partition replaces a large DELETE and
+# the vacuum that follows it.
+#
+# With --dsn (psycopg required) the partitions are read from pg_inherits and
+# exported from the partition tables themselves, and every DROP is guarded
+# by the exported row count, so a partition written to after its export is
+# left in place. Without it the partitions are emulated by month ranges over
+# a synthetic SQLite dataset, and the statements are written commented out
+# to strive_tech_retention_example.sql: they show the shape, not something
+# to run.
+#
+# Exports are Parquet (zstd) when pyarrow is installed, otherwise a zip
+# archive with one LZMA-compressed member per column. psycopg returns UUIDs,
+# timestamps, numerics, JSON and inet values as Python objects; these are
+# written as text (ISO 8601 for timestamps, JSON for json/jsonb) so that
+# either format takes them, and every run first checks that conversion.
+#
+# Usage: python retention_planner.py --dsn postgresql:///strive --keep-months 12
+
+import argparse
+import datetime
+import decimal
+import ipaddress
+import json
+import os
+import re
+import tempfile
+import time
+import uuid
+import zipfile
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+try:
+    import psycopg
+except ImportError:
+    psycopg = None
+
+from schema_ddl import PARTITIONED_TABLES, load_sqlite
+from schema_spec import load_tables
+from synthetic_data import build_plan, load_sqlite_dataset
+
+KEEP_MONTHS = 12
+
+
+@dataclass
+class Partition:
+    table: str
+    month: str  # YYYY-MM
+    rows: int
+    # PostgreSQL partition table; None for a month range emulated over the SQLite table
+    relation: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return self.relation or f"{self.table}_{self.month.replace('-', '_')}"
+
+
+@dataclass
+class Export:
+    partition: Partition
+    path: str
+    bytes: int
+    verified: bool
+
+
+def add_months(month: str, count: int) -> str:
+    year, number = map(int, month.split('-'))
+    index = year * 12 + number - 1 + count
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def month_bounds(month: str) -> tuple:
+    return f"{month}-01", f"{add_months(month, 1)}-01"
+
+
+def list_partitions(conn, table: str) -> List[Partition]:
+    """Month ranges of the synthetic SQLite table, standing in for its partitions."""
+    key = PARTITIONED_TABLES[table]
+    rows = conn.execute(f"SELECT substr({key}, 1, 7), count(*) FROM {table} GROUP BY 1 ORDER BY 1").fetchall()
+    return [Partition(table, month, count) for month, count in rows]
+
+
+_LOWER_BOUND = re.compile(r"FROM \('(\d{4}-\d{2})-01")
+
+PARTITIONS_SQL = """SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+WHERE i.inhparent = %s::regclass
+ORDER BY 1"""
+
+
+def list_postgres_partitions(conn, table: str) -> List[Partition]:
+    """Monthly partitions of a PostgreSQL table by their lower bound; rows are counted once expired."""
+    partitions = []
+    for relation, bound in conn.execute(PARTITIONS_SQL, (table,)).fetchall():
+        match = _LOWER_BOUND.search(bound or '')
+        if match:
+            partitions.append(Partition(table, match.group(1), 0, relation))
+    return sorted(partitions, key=lambda partition: partition.month)
+
+
+def count_rows(conn, partition: Partition) -> int:
+    return conn.execute(f'SELECT count(*) FROM "{partition.relation}"').fetchone()[0]
+
+
+def plan_retention(partitions: Sequence[Partition], as_of: str, keep_months: int = KEEP_MONTHS) -> List[Partition]:
+    """Partitions entirely before the retention window ending at as_of (inclusive)."""
+    cutoff = add_months(as_of, -keep_months + 1)
+    return [partition for partition in partitions if partition.month < cutoff]
+
+
+def _partition_columns(conn, partition: Partition) -> Dict[str, List[Any]]:
+    key = PARTITIONED_TABLES[partition.table]
+    if partition.relation:
+        cursor = conn.execute(f'SELECT * FROM "{partition.relation}" ORDER BY {key}')
+    else:
+        start, end = month_bounds(partition.month)
+        cursor = conn.execute(f"SELECT * FROM {partition.table} WHERE {key} >= ? AND {key} < ? ORDER BY {key}",
+                              (start, end))
+    names = [description[0] for description in cursor.description]
+    rows = cursor.fetchall()
+    return {name: [row[index] for row in rows] for index, name in enumerate(names)}
+
+
+def export_value(value: Any) -> Any:
+    """A database value as None, bool, int, float or str, which Parquet and JSON both store."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str, sort_keys=True)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    # uuid.UUID, decimal.Decimal, ipaddress addresses and networks, timedelta
+    return str(value)
+
+
+def write_columnar(columns: Dict[str, List[Any]], path: str) -> str:
+    columns = {name: [export_value(value) for value in values] for name, values in columns.items()}
+    if pyarrow is not None:
+        path += '.parquet'
+        pyarrow.parquet.write_table(pyarrow.table(columns), path, compression='zstd')
+        return path
+    path += '.columns.zip'
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_LZMA) as archive:
+        archive.writestr('_schema.json', json.dumps({'columns': list(columns)}))
+        for name, values in columns.items():
+            # One JSON value per line keeps NULLs and embedded newlines intact
+            archive.writestr(name, '\n'.join(json.dumps(value) for value in values))
+    return path
+
+
+def read_columnar(path: str) -> Dict[str, List[Any]]:
+    if path.endswith('.parquet'):
+        return pyarrow.parquet.read_table(path).to_pydict()
+    with zipfile.ZipFile(path) as archive:
+        names = json.loads(archive.read('_schema.json'))['columns']
+        return {name: [json.loads(line) for line in archive.read(name).decode().split('\n') if line]
+                for name in names}
+
+
+def check_export_values(out_dir: str) -> None:
+    """Write one row of every type psycopg hands back for these tables and read it back as text."""
+    moment = datetime.datetime(2025, 1, 31, 23, 59, 59, 123456, tzinfo=datetime.timezone.utc)
+    row = {
+        'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'created_at': moment,
+        'billing_period': moment.date(),
+        'usage_amount': decimal.Decimal('12.500'),
+        'metadata': {'events': 3, 'batch': 'b1'},
+        'ip_address': ipaddress.ip_address('203.0.113.7'),
+        'old_data': None,
+    }
+    expected = {'id': '12345678-1234-5678-1234-567812345678', 'created_at': '2025-01-31T23:59:59.123456+00:00',
+                'billing_period': '2025-01-31', 'usage_amount': '12.500',
+                'metadata': '{"batch": "b1", "events": 3}', 'ip_address': '203.0.113.7', 'old_data': None}
+    path = write_columnar({name: [value] for name, value in row.items()}, os.path.join(out_dir, 'value_check'))
+    try:
+        stored = {name: values[0] for name, values in read_columnar(path).items()}
+    finally:
+        os.remove(path)
+    if stored != expected:
+        raise AssertionError(f"export values do not round-trip: {stored} != {expected}")
+
+
+def count_columnar_rows(path: str) -> int:
+    if path.endswith('.parquet'):
+        return pyarrow.parquet.ParquetFile(path).metadata.num_rows
+    with zipfile.ZipFile(path) as archive:
+        first = json.loads(archive.read('_schema.json'))['columns'][0]
+        data = archive.read(first)
+    return data.count(b'\n') + 1 if data else 0
+
+
+def export_partition(conn, partition: Partition, out_dir: str) -> Export:
+    columns = _partition_columns(conn, partition)
+    path = write_columnar(columns, os.path.join(out_dir, partition.name))
+    verified = count_columnar_rows(path) == partition.rows
+    return Export(partition, path, os.path.getsize(path), verified)
+
+
+def retention_sql(exports: Sequence[Export], example: bool = False) -> str:
+    """DETACH/DROP for exported partitions; months whose export did not verify are left alone.
+
+    The DROP only runs if the detached partition still holds the exported
+    rows. example comments every statement out, for exports that were not
+    taken from these partitions.
+    """
+    statements = []
+    for export in exports:
+        name = export.partition.name
+        if not export.verified:
+            statements.append(f"-- {name}: export row count mismatch, not dropped")
+            continue
+        statements.append(f"-- {name}: {export.partition.rows} rows archived to {os.path.basename(export.path)}")
+        statements.append(f"ALTER TABLE {export.partition.table} DETACH PARTITION {name} CONCURRENTLY;")
+        statements.append(f"""DO $$
+BEGIN
+  IF (SELECT count(*) FROM {name}) <> {export.partition.rows} THEN
+    RAISE EXCEPTION '{name} changed after its export; not dropped';
+  END IF;
+  DROP TABLE {name};
+END
+$$;""")
+    if example:
+        header = "-- Example only: exported from a synthetic SQLite dataset, not from these partitions"
+        return header + '\n' + '\n'.join(f"-- {line}" if line and not line.startswith('--') else line
+                                         for statement in statements for line in statement.split('\n')) + '\n'
+    return '\n'.join(statements) + '\n'
+
+
+def raw_size(conn, partition: Partition) -> int:
+    """Bytes of the partition as plain CSV text, the uncompressed baseline."""
+    columns = _partition_columns(conn, partition)
+    return sum(len(str(value)) + 1 for values in columns.values() for value in values if value is not None)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Archive and drop monthly partitions past the retention window')
+    parser.add_argument('--dsn', help='PostgreSQL database to export from; a synthetic SQLite dataset when omitted')
+    parser.add_argument('--organizations', type=int, default=50)
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--keep-months', type=int, default=KEEP_MONTHS)
+    parser.add_argument('--as-of', help='current month (YYYY-MM); defaults to the newest month in the data')
+    parser.add_argument('--out', default='strive_tech_archive')
+    args = parser.parse_args()
+
+    if args.dsn:
+        if psycopg is None:
+            raise SystemExit("--dsn needs psycopg (pip install psycopg)")
+        conn = psycopg.connect(args.dsn)
+        list_table_partitions = list_postgres_partitions
+    else:
+        tables = load_tables()
+        plan = build_plan(tables, args.organizations, args.scale, 42)
+        conn = load_sqlite(tables)
+        load_sqlite_dataset(conn, tables, plan, only=tuple(PARTITIONED_TABLES))
+        list_table_partitions = list_partitions
+    os.makedirs(args.out, exist_ok=True)
+    with tempfile.TemporaryDirectory() as directory:
+        check_export_values(directory)
+
+    print("=== STRIVE TECH RETENTION PLAN ===\n")
+    print(f"Source: {'PostgreSQL partitions' if args.dsn else 'synthetic SQLite dataset (example output only)'}")
+    print(f"Export format: {'Parquet (zstd)' if pyarrow is not None else 'columnar zip (LZMA), pyarrow not installed'}; "
+          f"UUID, timestamp, numeric, JSON and inet values checked")
+    exports: List[Export] = []
+    for table in PARTITIONED_TABLES:
+        partitions = list_table_partitions(conn, table)
+        if not partitions:
+            print(f"\n{table}: no monthly partitions")
+            continue
+        as_of: Optional[str] = args.as_of or partitions[-1].month
+        expired = plan_retention(partitions, as_of, args.keep_months)
+        print(f"\n{table}: {len(partitions)} monthly partitions, keeping {args.keep_months} months up to {as_of}")
+        print("-" * 60)
+        for partition in expired:
+            if partition.relation:
+                partition.rows = count_rows(conn, partition)
+            started = time.perf_counter()
+            export = export_partition(conn, partition, args.out)
+            elapsed = time.perf_counter() - started
+            raw = raw_size(conn, partition)
+            status = 'verified' if export.verified else 'ROW COUNT MISMATCH'
+            print(f"  • {partition.name}: {partition.rows:,} rows, {raw / 1024:,.0f} KiB raw -> "
+                  f"{export.bytes / 1024:,.0f} KiB ({raw / max(export.bytes, 1):.1f}x) in {elapsed:.2f}s, {status}")
+            exports.append(export)
+
+    path = 'strive_tech_retention.sql' if args.dsn else 'strive_tech_retention_example.sql'
+    with open(path, 'w') as f:
+        f.write(retention_sql(exports, example=not args.dsn))
+    if args.dsn:
+        print(f"\n{sum(export.verified for export in exports)} partitions ready to drop; statements saved to '{path}'")
+    else:
+        print(f"\nExample statements for {sum(export.verified for export in exports)} synthetic months saved, "
+              f"commented out, to '{path}'")
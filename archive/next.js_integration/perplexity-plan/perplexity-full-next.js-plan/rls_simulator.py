@@ -0,0 +1,161 @@
+# Per-row cost of organization isolation policies, simulated on SQLite
+#
+# SQLite has no row-level security, so each policy becomes the filter of a
+# view-like source over the table, and the scans run through it as a
+# request would through the policy. auth_uid() and is_member() are
+# application functions, as auth.uid() and a plpgsql membership check are
+# in PostgreSQL, and count their calls. The policies compared:
+#
+#   • none: no filter; the cost of scanning every row
+#   • script_1.py: organization_id IN (SELECT ... WHERE user_id = auth_uid())
+#   • per-row function: is_member(organization_id), one membership query per row
+#   • correlated EXISTS: a membership probe and an auth_uid() call per row
+#   • bound org set: the rls_<table> views from schema_ddl.rls_ddl('sqlite'),
+#     reading the org set bound once per session in temp.session_orgs
+#
+# Every policy runs large aggregate scans over activity_logs and customers
+# for a member of one organization and for one of ORG_SET_SIZES
+# organizations. The report shows the access path, rows examined, function
+# calls and time per examined row, and checks that every policy sees the
+# same rows.
+#
+# Usage: python rls_simulator.py --organizations 200 --scale 1
+
+import argparse
+import sqlite3
+import time
+from typing import List, Tuple
+
+from benchmark_utils import format_latency, percentiles, time_calls
+from schema_ddl import load_sqlite, rls_ddl
+from schema_spec import load_tables
+from synthetic_data import build_plan, load_sqlite_dataset, row_uuid, table_number
+
+SCAN_TABLES = ('activity_logs', 'customers')
+LOADED_TABLES = ('users', 'organizations', 'organization_members') + SCAN_TABLES
+ORG_SET_SIZES = (1, 20)
+
+POLICIES = {
+    'none': "{table}",
+    'script_1.py': ("{table} WHERE organization_id IN (SELECT organization_id FROM organization_members "
+                    "WHERE user_id = auth_uid())"),
+    'per-row function': "{table} WHERE is_member(organization_id)",
+    'correlated EXISTS': ("{table} t WHERE EXISTS (SELECT 1 FROM organization_members m "
+                          "WHERE m.organization_id = t.organization_id AND m.user_id = auth_uid())"),
+    'bound org set': "rls_{table}",
+}
+# length(id) makes every scan read the table rows, not just the (organization_id, created_at) index
+SCAN_SQL = "SELECT count(*), max(created_at), sum(length(id)) FROM {source}"
+
+
+class Session:
+    """The signed-in user of a connection, with counters for the functions policies call."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.user_id = None
+        self.calls = 0
+        conn.create_function('auth_uid', 0, self.auth_uid)
+        conn.create_function('is_member', 1, self.is_member)
+        conn.executescript(rls_ddl(load_tables(), 'sqlite'))
+
+    def auth_uid(self) -> str:
+        self.calls += 1
+        return self.user_id
+
+    def is_member(self, organization_id: str) -> int:
+        self.calls += 1
+        return self.conn.execute("SELECT count(*) FROM organization_members WHERE user_id = ? AND organization_id = ?",
+                                 (self.user_id, organization_id)).fetchone()[0]
+
+    def sign_in(self, user_id: str) -> List[str]:
+        """Set the user and bind their organizations once, as SET LOCAL app.org_ids would."""
+        self.user_id = user_id
+        organizations = [row[0] for row in self.conn.execute(
+            "SELECT organization_id FROM organization_members WHERE user_id = ?", (user_id,))]
+        self.conn.execute("DELETE FROM temp.session_orgs")
+        self.conn.executemany("INSERT INTO temp.session_orgs VALUES (?)", [(org,) for org in organizations])
+        return organizations
+
+
+def access_path(conn: sqlite3.Connection, sql: str) -> str:
+    steps = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+    main = [step for step in steps if step.startswith(('SCAN', 'SEARCH')) and 'organization_members' not in step
+            and 'session_orgs' not in step]
+    return main[0] if main else steps[0]
+
+
+def rows_examined(conn: sqlite3.Connection, table: str, organizations: List[str], path: str) -> int:
+    if path.startswith('SEARCH'):
+        marks = ', '.join('?' for _ in organizations)
+        return conn.execute(f"SELECT count(*) FROM {table} WHERE organization_id IN ({marks})",
+                            organizations).fetchone()[0]
+    return conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+
+
+def add_memberships(conn: sqlite3.Connection, user_id: str, organizations: List[str]) -> None:
+    """Make user_id a member of organizations too, as for an agency working for several clients."""
+    conn.executemany("INSERT INTO organization_members (id, organization_id, user_id, role) VALUES (?, ?, ?, 'member')",
+                     [(f"extra-{user_id}-{org}", org, user_id) for org in organizations])
+    conn.commit()
+
+
+def run(conn: sqlite3.Connection, session: Session, iterations: int) -> List[Tuple]:
+    organizations = session.sign_in(session.user_id)
+    report = []
+    for table in SCAN_TABLES:
+        results = {}
+        for name, template in POLICIES.items():
+            sql = SCAN_SQL.format(source=template.format(table=table))
+            path = access_path(conn, sql)
+            session.calls = 0
+            results[name] = conn.execute(sql).fetchone()
+            calls = session.calls
+            stats = percentiles(time_calls(lambda: conn.execute(sql).fetchone(), iterations, warmup=1))
+            examined = rows_examined(conn, table, organizations, path)
+            report.append((table, name, path, examined, calls, stats, results[name]))
+        visible = {result for name, result in results.items() if name != 'none'}
+        if len(visible) != 1:
+            raise AssertionError(f"policies disagree on {table}: {results}")
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simulate the per-row cost of RLS policies on SQLite')
+    parser.add_argument('--organizations', type=int, default=200)
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    tables = load_tables()
+    plan = build_plan(tables, args.organizations, args.scale, args.seed)
+    conn = load_sqlite(tables)
+    started = time.perf_counter()
+    counts = load_sqlite_dataset(conn, tables, plan, only=LOADED_TABLES)
+    conn.execute("ANALYZE")
+    session = Session(conn)
+    organization_no = table_number(tables, 'organizations')
+    # A user of the median organization by activity
+    by_size = sorted(range(plan.organizations), key=lambda org: plan.org_range('activity_logs', org)[1] -
+                     plan.org_range('activity_logs', org)[0])
+    home = by_size[len(by_size) // 2]
+    session.user_id = conn.execute("SELECT user_id FROM organization_members WHERE organization_id = ? LIMIT 1",
+                                   (row_uuid(organization_no, home),)).fetchone()[0]
+
+    print("=== STRIVE TECH RLS POLICY SIMULATOR (SQLite) ===\n")
+    print(f"{counts['activity_logs']:,} activity_logs and {counts['customers']:,} customers in "
+          f"{args.organizations:,} organizations, loaded in {time.perf_counter() - started:.1f}s\n")
+    members = 1
+    for size in ORG_SET_SIZES:
+        extra = [row_uuid(organization_no, org) for org in by_size[::-1] if org != home][:size - members]
+        add_memberships(conn, session.user_id, extra)
+        members = size
+        print(f"Member of {size} organization{'s' if size > 1 else ''}")
+        print("-" * 60)
+        for table, name, path, examined, calls, stats, (visible, *_) in run(conn, session, args.iterations):
+            per_row = stats['p50'] * 1e6 / max(examined, 1)
+            print(f"  • {table:<13} {name:<17} {format_latency(stats)}  {visible:>8,} visible, "
+                  f"{examined:>8,} examined, {per_row:6.3f}ns/row, {calls:>8,} calls")
+            print(f"    {'':<13} {'':<17} {path}")
+        print()
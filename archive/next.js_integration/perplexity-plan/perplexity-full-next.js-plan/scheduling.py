@@ -0,0 +1,301 @@
+# Appointment conflict detection and free-slot search
+#
+# Keeps one interval tree per assignee: a treap ordered by start time where
+# every node also stores the latest end time in its subtree, so an overlap
+# query skips whole subtrees that end before the proposed booking starts.
+# Times are epoch seconds and intervals are half-open, [start, end), like the
+# tstzrange in schema_ddl.appointment_overlap_ddl(), which enforces the same
+# rule in PostgreSQL.
+#
+# The benchmark builds a year of dense working-hours calendars for thousands
+# of staff and times booking checks and free-slot searches against a linear
+# scan and an indexed SQLite query.
+#
+# Usage: python scheduling.py --staff 2000 --checks 20000
+
+import argparse
+import random
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from benchmark_utils import format_latency, percentiles
+from schema_ddl import FREED_APPOINTMENT_STATUSES
+
+
+@dataclass(frozen=True)
+class Booking:
+    start: int
+    end: int
+    appointment_id: str
+
+
+class _Node:
+    __slots__ = ('booking', 'priority', 'max_end', 'left', 'right')
+
+    def __init__(self, booking: Booking, priority: float):
+        self.booking = booking
+        self.priority = priority
+        self.max_end = booking.end
+        self.left: Optional['_Node'] = None
+        self.right: Optional['_Node'] = None
+
+    def update(self) -> '_Node':
+        max_end = self.booking.end
+        if self.left is not None and self.left.max_end > max_end:
+            max_end = self.left.max_end
+        if self.right is not None and self.right.max_end > max_end:
+            max_end = self.right.max_end
+        self.max_end = max_end
+        return self
+
+
+def _order(booking: Booking) -> Tuple[int, str]:
+    return booking.start, booking.appointment_id
+
+
+def _split(node: Optional[_Node], key: Tuple[int, str], inclusive: bool):
+    """(nodes before key, the rest); with inclusive, key itself goes left."""
+    if node is None:
+        return None, None
+    own = _order(node.booking)
+    if own < key or (inclusive and own == key):
+        node.right, right = _split(node.right, key, inclusive)
+        return node.update(), right
+    left, node.left = _split(node.left, key, inclusive)
+    return left, node.update()
+
+
+def _merge(left: Optional[_Node], right: Optional[_Node]) -> Optional[_Node]:
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        return left.update()
+    right.left = _merge(left, right.left)
+    return right.update()
+
+
+class IntervalTree:
+    """Bookings of one assignee, with overlap and gap queries in O(log n + k)."""
+
+    def __init__(self, bookings: Iterable[Booking] = (), seed: Optional[int] = None):
+        self._random = random.Random(seed).random
+        self._root = self._build(sorted(bookings, key=_order))
+        self._size = self._count(self._root)
+
+    def _build(self, bookings: List[Booking]) -> Optional[_Node]:
+        """Balanced tree from sorted bookings. Priorities are random values
+        handed out in breadth-first order, largest first, so later inserts with
+        fresh random priorities keep the heap property."""
+        if not bookings:
+            return None
+        priorities = sorted((self._random() for _ in bookings), reverse=True)
+        nodes: List[Optional[_Node]] = [None] * len(bookings)
+        queue = [(0, len(bookings), None, False)]
+        next_priority = 0
+        for low, high, parent, is_right in queue:
+            middle = (low + high) // 2
+            node = nodes[middle] = _Node(bookings[middle], priorities[next_priority])
+            next_priority += 1
+            if parent is not None:
+                if is_right:
+                    parent.right = node
+                else:
+                    parent.left = node
+            if low < middle:
+                queue.append((low, middle, node, False))
+            if middle + 1 < high:
+                queue.append((middle + 1, high, node, True))
+        for node in reversed(nodes):
+            node.update()
+        return nodes[len(bookings) // 2]
+
+    @staticmethod
+    def _count(node: Optional[_Node]) -> int:
+        return 0 if node is None else 1 + IntervalTree._count(node.left) + IntervalTree._count(node.right)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def insert(self, booking: Booking) -> None:
+        left, right = _split(self._root, _order(booking), inclusive=False)
+        self._root = _merge(_merge(left, _Node(booking, self._random())), right)
+        self._size += 1
+
+    def remove(self, booking: Booking) -> bool:
+        left, rest = _split(self._root, _order(booking), inclusive=False)
+        found, right = _split(rest, _order(booking), inclusive=True)
+        self._root = _merge(left, right)
+        if found is not None:
+            self._size -= 1
+        return found is not None
+
+    def overlapping(self, start: int, end: int, limit: Optional[int] = None) -> List[Booking]:
+        """Bookings intersecting [start, end), in start order."""
+        found: List[Booking] = []
+        stack: List[Tuple[_Node, bool]] = [(self._root, False)] if self._root else []
+        # Iterative in-order walk, pruning subtrees that end too early or start too late
+        while stack and (limit is None or len(found) < limit):
+            node, visited = stack.pop()
+            if visited:
+                if node.booking.end > start:
+                    found.append(node.booking)
+                if node.right is not None and node.right.max_end > start:
+                    stack.append((node.right, False))
+                continue
+            if node.max_end <= start:
+                continue
+            if node.booking.start < end:
+                stack.append((node, True))
+            if node.left is not None:
+                stack.append((node.left, False))
+        return found
+
+    def conflicts(self, start: int, end: int) -> bool:
+        return bool(self.overlapping(start, end, limit=1))
+
+    def free_slots(self, start: int, end: int, duration: int) -> Iterator[Tuple[int, int]]:
+        """Gaps of at least duration inside [start, end)."""
+        cursor = start
+        for booking in self.overlapping(start, end):
+            if booking.start - cursor >= duration:
+                yield cursor, booking.start
+            cursor = max(cursor, booking.end)
+        if end - cursor >= duration:
+            yield cursor, end
+
+
+class Calendar:
+    """Interval trees for every assignee."""
+
+    def __init__(self):
+        self.trees: Dict[str, IntervalTree] = {}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[str, int, int, str, str]]) -> 'Calendar':
+        """Build from (assigned_to, start, end, appointment_id, status) rows, skipping freed slots."""
+        grouped: Dict[str, List[Booking]] = {}
+        for assignee, start, end, appointment_id, status in rows:
+            if status not in FREED_APPOINTMENT_STATUSES:
+                grouped.setdefault(assignee, []).append(Booking(start, end, appointment_id))
+        calendar = cls()
+        calendar.trees = {assignee: IntervalTree(bookings) for assignee, bookings in grouped.items()}
+        return calendar
+
+    def tree(self, assignee: str) -> IntervalTree:
+        tree = self.trees.get(assignee)
+        if tree is None:
+            tree = self.trees[assignee] = IntervalTree()
+        return tree
+
+    def book(self, assignee: str, booking: Booking) -> List[Booking]:
+        """Add the booking unless it overlaps; returns the conflicts (empty when booked)."""
+        tree = self.tree(assignee)
+        conflicts = tree.overlapping(booking.start, booking.end)
+        if not conflicts:
+            tree.insert(booking)
+        return conflicts
+
+    def cancel(self, assignee: str, booking: Booking) -> bool:
+        return self.tree(assignee).remove(booking)
+
+    def first_free_slot(self, assignee: str, after: int, duration: int, horizon: int) -> Optional[Tuple[int, int]]:
+        for slot_start, _ in self.tree(assignee).free_slots(after, after + horizon, duration):
+            return slot_start, slot_start + duration
+        return None
+
+
+DAY = 86400
+SLOT = 15 * 60
+YEAR_START = 1767225600  # 2026-01-01T00:00:00Z, a Thursday
+
+
+def working_days(days: int = 365) -> List[int]:
+    return [YEAR_START + day * DAY for day in range(days) if (3 + day) % 7 < 5]
+
+
+def dense_calendar(rng: random.Random, days: List[int], occupancy: float) -> List[Tuple[int, int]]:
+    """A 9:00-17:00 working day packed with 30-90 minute appointments."""
+    bookings = []
+    for day in days:
+        cursor, close = day + 9 * 3600, day + 17 * 3600
+        while cursor < close:
+            if rng.random() < occupancy:
+                length = rng.choice((2, 3, 4, 6)) * SLOT
+                bookings.append((cursor, min(cursor + length, close)))
+                cursor += length
+            else:
+                cursor += SLOT
+    return bookings
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark appointment conflict checks')
+    parser.add_argument('--staff', type=int, default=2000)
+    parser.add_argument('--occupancy', type=float, default=0.8)
+    parser.add_argument('--checks', type=int, default=20_000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    days = working_days()
+    print("=== STRIVE TECH APPOINTMENT CONFLICT BENCHMARK ===\n")
+    started = time.perf_counter()
+    schedules = {f'user-{staff}': dense_calendar(rng, days, args.occupancy) for staff in range(args.staff)}
+    rows = [(assignee, start, end, f'{assignee}/{index}', 'scheduled')
+            for assignee, bookings in schedules.items() for index, (start, end) in enumerate(bookings)]
+    print(f"{args.staff:,} staff, {len(rows):,} appointments over {len(days)} working days "
+          f"(generated in {time.perf_counter() - started:.1f}s)")
+
+    started = time.perf_counter()
+    calendar = Calendar.from_rows(rows)
+    print(f"  • interval trees built in {time.perf_counter() - started:.1f}s")
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE appointments (id TEXT PRIMARY KEY, assigned_to TEXT, start_time INTEGER, end_time INTEGER)")
+    conn.executemany("INSERT INTO appointments VALUES (?, ?, ?, ?)", ((r[3], r[0], r[1], r[2]) for r in rows))
+    conn.execute("CREATE INDEX idx_appointments_assigned_to_start_time ON appointments (assigned_to, start_time)")
+
+    proposals = []
+    for _ in range(args.checks):
+        assignee = f'user-{rng.randrange(args.staff)}'
+        start = rng.choice(days) + 9 * 3600 + rng.randrange(32) * SLOT
+        proposals.append((assignee, start, start + rng.choice((2, 4)) * SLOT))
+
+    methods = {
+        'interval tree': lambda a, s, e: calendar.trees[a].conflicts(s, e),
+        'linear scan': lambda a, s, e: any(bs < e and be > s for bs, be in schedules[a]),
+        'sqlite index': lambda a, s, e: conn.execute(
+            "SELECT 1 FROM appointments WHERE assigned_to = ? AND start_time < ? AND end_time > ? LIMIT 1",
+            (a, e, s)).fetchone() is not None,
+    }
+    print("-" * 60)
+    answers = {}
+    for name, check in methods.items():
+        samples, results = [], []
+        for assignee, start, end in proposals:
+            began = time.perf_counter()
+            results.append(check(assignee, start, end))
+            samples.append((time.perf_counter() - began) * 1000)
+        answers[name] = results
+        print(f"  • {name:<14} {format_latency(percentiles(samples))}  {sum(results):,} conflicts")
+    agree = all(result == answers['interval tree'] for result in answers.values())
+    print(f"  • all methods {'agree' if agree else 'DISAGREE'}")
+
+    samples, found = [], 0
+    for assignee, start, _ in proposals[:5000]:
+        began = time.perf_counter()
+        found += calendar.first_free_slot(assignee, start, 60 * 60, 14 * DAY) is not None
+        samples.append((time.perf_counter() - began) * 1000)
+    print(f"  • first free hour within two weeks: {format_latency(percentiles(samples))}  "
+          f"({found:,}/{min(len(proposals), 5000):,} found)")
+
+    samples, booked = [], 0
+    for assignee, start, end in proposals[:5000]:
+        began = time.perf_counter()
+        booked += not calendar.book(assignee, Booking(start, end, f'new/{assignee}/{start}'))
+        samples.append((time.perf_counter() - began) * 1000)
+    print(f"  • check and book: {format_latency(percentiles(samples))}  ({booked:,} booked)")
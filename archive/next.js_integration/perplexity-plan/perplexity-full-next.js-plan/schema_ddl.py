@@ -0,0 +1,920 @@
+# Generate SQL DDL and the index set from the schema design in script_1.py
+#
+# Emits PostgreSQL DDL to strive_tech_schema.sql, then loads the SQLite
+# flavour of the same schema into memory and runs EXPLAIN QUERY PLAN on the
+# dashboard and customer queries. Exits non-zero if any of them full-scans.
+# The monthly range-partitioned variant of the schema is written to
+# strive_tech_schema_partitioned.sql.
+
+import re
+import sqlite3
+import sys
+from dataclasses import dataclass, replace
+from typing import Dict, List, Tuple
+
+from schema_spec import Column, Table, load_secondary_indexes, load_tables
+from sql_queries import (ACTIVE_PROJECT_STATUS, AI_MESSAGE_QUERIES, COMPLETED_TASK_STATUS, CUSTOMER_QUERIES,
+                         DASHBOARD_QUERIES, DASHBOARD_STATS_VARIANTS, TASK_HIERARCHY_QUERIES, prisma_enum)
+
+POSTGRES_TYPES = {
+    'uuid': 'UUID',
+    'string': 'TEXT',
+    'text': 'TEXT',
+    'jsonb': 'JSONB',
+    'boolean': 'BOOLEAN',
+    'timestamp': 'TIMESTAMPTZ',
+    'date': 'DATE',
+    'decimal': 'NUMERIC(12, 2)',
+    'integer': 'INTEGER',
+    'inet': 'INET',
+    'string[]': 'TEXT[]',
+}
+
+# SQLite has no uuid/json/array types; they are stored as TEXT (arrays as JSON)
+SQLITE_TYPES = {
+    'uuid': 'TEXT',
+    'string': 'TEXT',
+    'text': 'TEXT',
+    'jsonb': 'TEXT',
+    'boolean': 'INTEGER',
+    'timestamp': 'TEXT',
+    'date': 'TEXT',
+    'decimal': 'NUMERIC',
+    'integer': 'INTEGER',
+    'inet': 'TEXT',
+    'string[]': 'TEXT',
+    'enum': 'TEXT',
+}
+
+BOOLEAN_LITERALS = {
+    'postgres': {'true': 'TRUE', 'false': 'FALSE'},
+    'sqlite': {'true': '1', 'false': '0'},
+}
+
+
+@dataclass
+class Index:
+    name: str
+    table: str
+    columns: List[str]
+    unique: bool = False
+    # Access method for PostgreSQL-only indexes (e.g. 'gin'); None is a B-tree
+    method: str = None
+
+    def sql(self) -> str:
+        unique = 'UNIQUE ' if self.unique else ''
+        using = f"USING {self.method} " if self.method else ''
+        return f"CREATE {unique}INDEX {self.name} ON {self.table} {using}({', '.join(self.columns)});"
+
+
+# Fractional index keys (fractional_index.py) order by their bytes; a locale
+# collation could sort them differently, so these compare under "C"
+C_COLLATED_COLUMNS = {('tasks', 'position')}
+
+
+def enum_type_name(table: str, column: Column) -> str:
+    return f"{table}_{column.name}"
+
+
+def column_sql(table: Table, column: Column, dialect: str) -> str:
+    if column.type == 'enum' and dialect == 'postgres':
+        sql_type = enum_type_name(table.name, column)
+    else:
+        sql_type = (POSTGRES_TYPES if dialect == 'postgres' else SQLITE_TYPES)[column.type]
+
+    parts = [column.name, sql_type]
+    if dialect == 'postgres' and (table.name, column.name) in C_COLLATED_COLUMNS:
+        parts.append('COLLATE "C"')
+    if column.primary_key:
+        parts.append('PRIMARY KEY')
+    if column.not_null:
+        parts.append('NOT NULL')
+    if column.unique:
+        parts.append('UNIQUE')
+    if column.default is not None:
+        parts.append(f"DEFAULT {BOOLEAN_LITERALS[dialect].get(column.default, column.default)}")
+    if column.references:
+        ref_table, ref_column = column.references
+        parts.append(f"REFERENCES {ref_table}({ref_column})")
+    if column.type == 'enum' and dialect == 'sqlite':
+        values = ', '.join(f"'{value}'" for value in column.enum_values)
+        parts.append(f"CHECK ({column.name} IN ({values}))")
+    if column.value_range:
+        low, high = column.value_range
+        parts.append(f"CHECK ({column.name} BETWEEN {low} AND {high})")
+    return ' '.join(parts)
+
+
+# Append-only tables stored as monthly range partitions, with their partition key
+PARTITIONED_TABLES = {
+    'activity_logs': 'created_at',
+    'usage_tracking': 'billing_period',
+}
+PARTITION_MONTHS_AHEAD = 3
+
+
+def create_table_sql(table: Table, dialect: str, partition_key: str = None) -> str:
+    """CREATE TABLE, or for partition_key a table PARTITION BY RANGE on it.
+
+    PostgreSQL requires the partition key in the primary key, so a partitioned
+    table gets (id, key) instead, and the key itself becomes NOT NULL.
+    """
+    columns = table.columns
+    if partition_key:
+        columns = [replace(column, primary_key=False, not_null=column.not_null or column.name == partition_key)
+                   for column in columns]
+    lines = [f"  {column_sql(table, column, dialect)}" for column in columns]
+    if not partition_key:
+        return f"CREATE TABLE {table.name} (\n" + ',\n'.join(lines) + "\n);"
+    primary_key = next(column.name for column in table.columns if column.primary_key)
+    lines.append(f"  PRIMARY KEY ({primary_key}, {partition_key})")
+    return f"CREATE TABLE {table.name} (\n" + ',\n'.join(lines) + f"\n) PARTITION BY RANGE ({partition_key});"
+
+
+def partition_maintenance_sql(months_ahead: int = PARTITION_MONTHS_AHEAD) -> List[str]:
+    """A function creating monthly partitions, run now and daily through pg_cron when installed.
+
+    There is no DEFAULT partition: rows in it would block creating the
+    partition for their month, so a missing partition fails the insert instead.
+    When an existing unpartitioned table was renamed to <table>_unpartitioned
+    first, partitions start at the month of its oldest row so every
+    historical row has one to land in.
+    """
+    keys = ', '.join(f"('{table}', '{key}')" for table, key in PARTITIONED_TABLES.items())
+    calls = ' '.join(f"SELECT create_monthly_partitions('{table}');" for table in PARTITIONED_TABLES)
+    return [
+        f"""CREATE FUNCTION create_monthly_partitions(
+  parent TEXT,
+  from_month DATE DEFAULT date_trunc('month', now())::date,
+  months_ahead INTEGER DEFAULT {months_ahead}
+) RETURNS void AS $$
+DECLARE
+  partition_month DATE := date_trunc('month', from_month)::date;
+BEGIN
+  WHILE partition_month <= (date_trunc('month', now()) + make_interval(months => months_ahead))::date LOOP
+    EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                   parent || '_' || to_char(partition_month, 'YYYY_MM'), parent, partition_month, (partition_month + interval '1 month')::date);
+    partition_month := (partition_month + interval '1 month')::date;
+  END LOOP;
+END;
+$$ LANGUAGE plpgsql;""",
+        f"""-- Existing data: rename each table to <table>_unpartitioned before running this file, then copy it
+-- with INSERT INTO <table> SELECT * FROM <table>_unpartitioned once the partitions exist.
+DO $$
+DECLARE
+  parent TEXT;
+  key TEXT;
+  oldest DATE;
+BEGIN
+  FOR parent, key IN SELECT * FROM (VALUES {keys}) AS partitioned (parent, key) LOOP
+    oldest := NULL;
+    IF to_regclass(parent || '_unpartitioned') IS NOT NULL THEN
+      EXECUTE format('SELECT min(%I)::date FROM %I', key, parent || '_unpartitioned') INTO oldest;
+    END IF;
+    PERFORM create_monthly_partitions(parent, coalesce(oldest, date_trunc('month', now())::date));
+  END LOOP;
+END
+$$;""",
+        f"""DO $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+    PERFORM cron.schedule('create-monthly-partitions', '0 3 * * *', $cron${calls}$cron$);
+  END IF;
+END
+$$;""",
+    ]
+
+
+def create_enum_types_sql(tables: Dict[str, Table]) -> List[str]:
+    statements = []
+    for table in tables.values():
+        for column in table.columns:
+            if column.type == 'enum':
+                values = ', '.join(f"'{value}'" for value in column.enum_values)
+                statements.append(f"CREATE TYPE {enum_type_name(table.name, column)} AS ENUM ({values});")
+    return statements
+
+
+def build_indexes(tables: Dict[str, Table]) -> List[Index]:
+    """Composite indexes from the strategy, one per foreign key column, and a
+    GIN index per array column for containment filters (tags @> ARRAY[...]).
+
+    A single-column index is dropped when a composite index already leads with
+    that column or a UNIQUE constraint already indexes it.
+    """
+    strategy = load_secondary_indexes()
+    composites = [(table, columns) for table, columns in strategy if len(columns) > 1]
+    singles = [(table, columns) for table, columns in strategy if len(columns) == 1]
+    for table in tables.values():
+        for column in table.foreign_keys:
+            singles.append((table.name, [column.name]))
+
+    indexes = [Index(f"idx_{table}_{'_'.join(columns)}", table, columns) for table, columns in composites]
+    seen = {(table, columns[0]) for table, columns in composites}
+    for table_name, (column_name,) in singles:
+        column = tables[table_name].column(column_name)
+        if (table_name, column_name) in seen or column.unique or column.primary_key:
+            continue
+        seen.add((table_name, column_name))
+        indexes.append(Index(f"idx_{table_name}_{column_name}", table_name, [column_name]))
+    for table in tables.values():
+        for column in table.columns:
+            if column.is_array:
+                indexes.append(Index(f"idx_{table.name}_{column.name}_gin", table.name, [column.name], method='gin'))
+    return indexes
+
+
+def generate_ddl(tables: Dict[str, Table], dialect: str = 'postgres', partitioned: bool = False) -> str:
+    """Schema DDL; partitioned (PostgreSQL only) splits PARTITIONED_TABLES by month.
+
+    Indexes on a partitioned table are created on every partition.
+    """
+    partition_keys = PARTITIONED_TABLES if partitioned and dialect == 'postgres' else {}
+    statements = []
+    if dialect == 'postgres':
+        statements.extend(create_enum_types_sql(tables))
+    statements.extend(create_table_sql(table, dialect, partition_keys.get(table.name)) for table in tables.values())
+    # SQLite stores arrays as JSON text and has no GIN
+    statements.extend(index.sql() for index in build_indexes(tables) if dialect == 'postgres' or not index.method)
+    if partition_keys:
+        statements.extend(partition_maintenance_sql())
+    return '\n\n'.join(statements) + '\n'
+
+
+def load_sqlite(tables: Dict[str, Table], conn: sqlite3.Connection = None) -> sqlite3.Connection:
+    conn = conn or sqlite3.connect(':memory:')
+    conn.executescript(generate_ddl(tables, 'sqlite'))
+    return conn
+
+
+def explain(conn: sqlite3.Connection, sql: str) -> List[str]:
+    # Every parameter is bound to NULL; only the plan matters here
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", _null_params(sql)).fetchall()
+    return [row[3] for row in rows]
+
+
+def _null_params(sql: str) -> Dict[str, None]:
+    return {name: None for name in re.findall(r':(\w+)', sql)}
+
+
+CTE_NAME_PATTERN = re.compile(r'(?:WITH(?: RECURSIVE)?|,)\s*(\w+)\s*(?:\([^)]*\))?\s+AS\s*\(', re.IGNORECASE)
+
+
+def check_query_plans(conn: sqlite3.Connection, queries: Dict[str, str]) -> Dict[str, Tuple[List[str], List[str]]]:
+    """Return {query: (full_scans, temp_sorts)} for each query."""
+    results = {}
+    for name, sql in queries.items():
+        plan = explain(conn, sql)
+        # Scanning a CTE reads its working set, not a table
+        ctes = set(CTE_NAME_PATTERN.findall(sql))
+        full_scans = [step for step in plan if step.startswith('SCAN ') and step != 'SCAN CONSTANT ROW'
+                      and step.split()[1] not in ctes]
+        temp_sorts = [step for step in plan if step.startswith('USE TEMP B-TREE')]
+        results[name] = (full_scans, temp_sorts)
+    return results
+
+
+# Denormalized per-organization dashboard counters, kept current by triggers.
+# Each counter: (source table, counted when, delta, columns whose update can
+# change it). Rows are written as R.<column> and expanded to OLD/NEW;
+# {active} and {done} are the status literals from sql_queries.py.
+ORGANIZATION_STATS_COUNTERS = {
+    'total_customers': ('customers', None, '1', ['organization_id']),
+    'total_projects': ('projects', None, '1', ['organization_id']),
+    'active_projects': ('projects', "R.status = {active}", '1', ['organization_id', 'status']),
+    'completed_tasks': ('tasks', "R.status = {done}", '1', ['project_id', 'status']),
+    # A project moving organizations takes its completed tasks along
+    'completed_tasks_by_project': (
+        'projects', None, "(SELECT count(*) FROM tasks WHERE project_id = R.id AND status = {done})",
+        ['organization_id']),
+}
+
+# How a source row finds its organization
+ORGANIZATION_OF = {
+    'customers': 'R.organization_id',
+    'projects': 'R.organization_id',
+    'tasks': '(SELECT organization_id FROM projects WHERE id = R.project_id)',
+}
+
+
+def _stats_column(counter: str) -> str:
+    return 'completed_tasks' if counter.startswith('completed_tasks') else counter
+
+
+def _status_literals(enums: str) -> Dict[str, str]:
+    spell = prisma_enum if enums == 'prisma' else str
+    return {'active': f"'{spell(ACTIVE_PROJECT_STATUS)}'", 'done': f"'{spell(COMPLETED_TASK_STATUS)}'"}
+
+
+def _stats_update(table: str, row: str, sign: str, enums: str) -> str:
+    """One UPDATE applying every counter fed by `table` for the OLD or NEW row."""
+    assignments = {}
+    for counter, (source, condition, delta, _) in ORGANIZATION_STATS_COUNTERS.items():
+        if source != table:
+            continue
+        term = delta if condition is None else f"CASE WHEN {condition} THEN {delta} ELSE 0 END"
+        column = _stats_column(counter)
+        term = term.format(**_status_literals(enums))
+        assignments.setdefault(column, []).append(term.replace('R.', f'{row}.'))
+    sets = ', '.join(f"{column} = {column} {sign} {terms[0] if len(terms) == 1 else '(' + ' + '.join(terms) + ')'}"
+                     for column, terms in assignments.items())
+    organization = ORGANIZATION_OF[table].replace('R.', f'{row}.')
+    return (f"UPDATE organization_stats SET {sets}, updated_at = CURRENT_TIMESTAMP "
+            f"WHERE organization_id = {organization};")
+
+
+def counter_cache_ddl(dialect: str = 'postgres', enums: str = 'schema') -> str:
+    """organization_stats table, its triggers and a backfill from the live tables.
+
+    Every write to customers/projects/tasks also updates its organization's
+    stats row, so concurrent writers in one organization serialize on that row.
+    enums='prisma' spells statuses as the Prisma-managed database stores them
+    and keys organizations by TEXT, the type of its cuid() ids.
+    """
+    uuid_type, timestamp_type = ('UUID', 'TIMESTAMPTZ') if dialect == 'postgres' else ('TEXT', 'TEXT')
+    key_type = 'TEXT' if enums == 'prisma' else uuid_type
+    statements = [f"""CREATE TABLE organization_stats (
+  organization_id {key_type} PRIMARY KEY REFERENCES organizations(id),
+  total_customers INTEGER NOT NULL DEFAULT 0,
+  total_projects INTEGER NOT NULL DEFAULT 0,
+  active_projects INTEGER NOT NULL DEFAULT 0,
+  completed_tasks INTEGER NOT NULL DEFAULT 0,
+  updated_at {timestamp_type} NOT NULL DEFAULT CURRENT_TIMESTAMP
+);"""]
+
+    create_row = "INSERT INTO organization_stats (organization_id) VALUES (NEW.id);"
+    if dialect == 'postgres':
+        statements.append(f"""CREATE FUNCTION organizations_organization_stats() RETURNS trigger AS $$
+BEGIN
+  {create_row}
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;""")
+        statements.append("CREATE TRIGGER organizations_organization_stats AFTER INSERT ON organizations "
+                          "FOR EACH ROW EXECUTE FUNCTION organizations_organization_stats();")
+    else:
+        statements.append(f"CREATE TRIGGER organizations_organization_stats AFTER INSERT ON organizations BEGIN\n"
+                          f"  {create_row}\nEND;")
+
+    for table in ORGANIZATION_OF:
+        watched = []
+        for source, _, _, columns in ORGANIZATION_STATS_COUNTERS.values():
+            if source == table:
+                watched.extend(column for column in columns if column not in watched)
+        remove, add = _stats_update(table, 'OLD', '-', enums), _stats_update(table, 'NEW', '+', enums)
+        name = f"{table}_organization_stats"
+        if dialect == 'postgres':
+            statements.append(f"""CREATE FUNCTION {name}() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    {remove}
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    {add}
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;""")
+            statements.append(f"CREATE TRIGGER {name} AFTER INSERT OR DELETE OR UPDATE OF {', '.join(watched)} "
+                              f"ON {table} FOR EACH ROW EXECUTE FUNCTION {name}();")
+        else:
+            statements.append(f"CREATE TRIGGER {name}_insert AFTER INSERT ON {table} BEGIN\n  {add}\nEND;")
+            statements.append(f"CREATE TRIGGER {name}_delete AFTER DELETE ON {table} BEGIN\n  {remove}\nEND;")
+            statements.append(f"CREATE TRIGGER {name}_update AFTER UPDATE OF {', '.join(watched)} ON {table} BEGIN\n"
+                              f"  {remove}\n  {add}\nEND;")
+
+    statements.append("""INSERT INTO organization_stats (organization_id, total_customers, total_projects, active_projects, completed_tasks)
+SELECT o.id,
+  (SELECT count(*) FROM customers c WHERE c.organization_id = o.id),
+  (SELECT count(*) FROM projects p WHERE p.organization_id = o.id),
+  (SELECT count(*) FROM projects p WHERE p.organization_id = o.id AND p.status = {active}),
+  (SELECT count(*) FROM tasks t JOIN projects p ON p.id = t.project_id
+   WHERE p.organization_id = o.id AND t.status = {done})
+FROM organizations o;""".format(**_status_literals(enums)))
+    return '\n\n'.join(statements) + '\n'
+
+
+# Insert a task's closure rows: itself, then every ancestor of its parent
+_CLOSURE_INSERT = """INSERT INTO task_closure (ancestor_id, descendant_id, depth)
+    SELECT NEW.id, NEW.id, 0
+    UNION ALL
+    SELECT ancestor_id, NEW.id, depth + 1 FROM task_closure WHERE descendant_id = NEW.parent_task_id;"""
+
+# Move a subtree: drop the paths from outside it into it, then join every
+# ancestor of the new parent with every node of the subtree
+_CLOSURE_MOVE = """DELETE FROM task_closure
+    WHERE descendant_id IN (SELECT descendant_id FROM task_closure WHERE ancestor_id = NEW.id)
+      AND ancestor_id NOT IN (SELECT descendant_id FROM task_closure WHERE ancestor_id = NEW.id);
+    INSERT INTO task_closure (ancestor_id, descendant_id, depth)
+    SELECT above.ancestor_id, below.descendant_id, above.depth + below.depth + 1
+    FROM task_closure above, task_closure below
+    WHERE above.descendant_id = NEW.parent_task_id AND below.ancestor_id = NEW.id;"""
+
+_CLOSURE_CYCLE = "SELECT 1 FROM task_closure WHERE ancestor_id = NEW.id AND descendant_id = NEW.parent_task_id"
+
+
+def task_closure_ddl(dialect: str = 'postgres') -> str:
+    """task_closure(ancestor_id, descendant_id, depth) next to tasks, kept in sync by triggers.
+
+    Every task has a depth-0 row for itself. Inserts add one row per
+    ancestor; moving a task (UPDATE OF parent_task_id) rewrites the paths
+    into its subtree and refuses to move a task under its own descendant.
+    """
+    uuid_type = 'UUID' if dialect == 'postgres' else 'TEXT'
+    cascade = ' ON DELETE CASCADE' if dialect == 'postgres' else ''
+    statements = [f"""CREATE TABLE task_closure (
+  ancestor_id {uuid_type} NOT NULL REFERENCES tasks(id){cascade},
+  descendant_id {uuid_type} NOT NULL REFERENCES tasks(id){cascade},
+  depth INTEGER NOT NULL,
+  PRIMARY KEY (ancestor_id, descendant_id)
+);""", "CREATE INDEX idx_task_closure_descendant_id ON task_closure (descendant_id, ancestor_id);"]
+
+    if dialect == 'postgres':
+        statements.append(f"""CREATE FUNCTION tasks_task_closure() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    {_CLOSURE_INSERT}
+  ELSIF NEW.parent_task_id IS DISTINCT FROM OLD.parent_task_id THEN
+    IF EXISTS ({_CLOSURE_CYCLE}) THEN
+      RAISE EXCEPTION 'task % cannot move under its own subtask', NEW.id;
+    END IF;
+    {_CLOSURE_MOVE}
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;""")
+        statements.append("CREATE TRIGGER tasks_task_closure AFTER INSERT OR UPDATE OF parent_task_id ON tasks "
+                          "FOR EACH ROW EXECUTE FUNCTION tasks_task_closure();")
+    else:
+        statements.append(f"CREATE TRIGGER tasks_task_closure_insert AFTER INSERT ON tasks BEGIN\n"
+                          f"  {_CLOSURE_INSERT}\nEND;")
+        statements.append(f"CREATE TRIGGER tasks_task_closure_cycle BEFORE UPDATE OF parent_task_id ON tasks "
+                          f"WHEN EXISTS ({_CLOSURE_CYCLE}) BEGIN\n"
+                          f"  SELECT RAISE(ABORT, 'task cannot move under its own subtask');\nEND;")
+        statements.append(f"CREATE TRIGGER tasks_task_closure_move AFTER UPDATE OF parent_task_id ON tasks "
+                          f"WHEN NEW.parent_task_id IS NOT OLD.parent_task_id BEGIN\n  {_CLOSURE_MOVE}\nEND;")
+        statements.append("CREATE TRIGGER tasks_task_closure_delete AFTER DELETE ON tasks BEGIN\n"
+                          "  DELETE FROM task_closure WHERE descendant_id = OLD.id OR ancestor_id = OLD.id;\nEND;")
+
+    statements.append("""INSERT INTO task_closure (ancestor_id, descendant_id, depth)
+WITH RECURSIVE paths (ancestor_id, descendant_id, depth) AS (
+  SELECT id, id, 0 FROM tasks
+  UNION ALL
+  SELECT paths.ancestor_id, t.id, paths.depth + 1 FROM paths JOIN tasks t ON t.parent_task_id = paths.descendant_id
+)
+SELECT ancestor_id, descendant_id, depth FROM paths;""")
+    return '\n\n'.join(statements) + '\n'
+
+
+# Appointment statuses that no longer hold the assignee's time
+FREED_APPOINTMENT_STATUSES = ('cancelled', 'no_show')
+
+
+def appointment_overlap_ddl() -> str:
+    """PostgreSQL only: a tstzrange over start/end and an exclusion constraint
+    rejecting overlapping live appointments for the same assignee.
+
+    The constraint's GiST index (btree_gist supplies = on uuid) also serves
+    overlap and free-slot queries with the && operator.
+    """
+    freed = ', '.join(f"'{status}'" for status in FREED_APPOINTMENT_STATUSES)
+    return f"""CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+ALTER TABLE appointments ADD CONSTRAINT appointments_end_after_start CHECK (end_time > start_time);
+
+ALTER TABLE appointments ADD COLUMN during TSTZRANGE
+  GENERATED ALWAYS AS (tstzrange(start_time, end_time, '[)')) STORED;
+
+ALTER TABLE appointments ADD CONSTRAINT appointments_no_double_booking
+  EXCLUDE USING gist (assigned_to WITH =, during WITH &&)
+  WHERE (status NOT IN ({freed}));
+
+-- Conflicts for a proposed booking:
+-- SELECT id, start_time, end_time FROM appointments
+-- WHERE assigned_to = :user_id AND during && tstzrange(:start, :end, '[)')
+--   AND status NOT IN ({freed});
+"""
+
+
+TEXT_SEARCH_CONFIG = 'english'
+# (column, ts_rank weight label, relative weight) for content search. The
+# relative weights are ts_rank's defaults for A/B/C, reused as FTS5 bm25 weights.
+CONTENT_SEARCH_FIELDS = (('title', 'A', 1.0), ('excerpt', 'B', 0.4), ('search_text', 'C', 0.2))
+
+
+def content_search_ddl(dialect: str = 'postgres') -> str:
+    """Full-text search over content titles, excerpts and bodies.
+
+    content.content is Markdown/HTML, so the body is indexed from
+    search_text, the plain text written by the offline indexer in
+    content_search.py. PostgreSQL gets a weighted generated tsvector with a
+    GIN index, and a trigger that marks a row pending for the indexer when
+    its body changes; SQLite gets an FTS5 table keyed by the content rowid,
+    which the indexer fills directly.
+    """
+    if dialect == 'sqlite':
+        columns = ', '.join(column for column, _, _ in CONTENT_SEARCH_FIELDS)
+        return f"""CREATE VIRTUAL TABLE content_search USING fts5(
+  organization_id UNINDEXED, {columns}, tokenize = 'porter unicode61'
+);
+"""
+    vector = '\n    || '.join(
+        f"setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce({column}, '')), '{label}')"
+        for column, label, _ in CONTENT_SEARCH_FIELDS)
+    return f"""ALTER TABLE content ADD COLUMN search_text TEXT;
+
+ALTER TABLE content ADD COLUMN search_vector TSVECTOR GENERATED ALWAYS AS (
+  {vector}
+) STORED;
+
+CREATE INDEX idx_content_search_vector_gin ON content USING gin (search_vector);
+
+-- NULL until the indexer has stripped the current body; the old search_text stays searchable meanwhile
+ALTER TABLE content ADD COLUMN search_indexed_at TIMESTAMPTZ;
+
+CREATE INDEX idx_content_search_pending ON content (id) WHERE search_indexed_at IS NULL;
+
+CREATE FUNCTION content_search_pending() RETURNS trigger AS $$
+BEGIN
+  IF NEW.content IS DISTINCT FROM OLD.content THEN
+    NEW.search_indexed_at := NULL;
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER content_search_pending BEFORE UPDATE OF content ON content
+  FOR EACH ROW EXECUTE FUNCTION content_search_pending();
+
+-- Ranked search within an organization:
+-- SELECT id, title, ts_rank(search_vector, query) AS rank
+-- FROM content, websearch_to_tsquery('{TEXT_SEARCH_CONFIG}', :q) AS query
+-- WHERE organization_id = :organization_id AND search_vector @@ query
+-- ORDER BY rank DESC LIMIT 20;
+"""
+
+
+AI_MESSAGE_ROLES = ('system', 'user', 'assistant', 'tool')
+
+
+def ai_messages_migration_sql(dialect: str = 'postgres') -> str:
+    """Copy conversation_data into ai_messages and set message_count; safe to rerun."""
+    migration = []
+    if dialect == 'postgres':
+        migration.append("""INSERT INTO ai_messages (conversation_id, seq, role, content, tokens, metadata, created_at)
+SELECT c.id, m.ordinality - 1, m.value->>'role', coalesce(m.value->>'content', ''), (m.value->>'tokens')::integer,
+       nullif(m.value - 'role' - 'content' - 'tokens', '{}'::jsonb), c.created_at
+FROM ai_conversations c
+CROSS JOIN LATERAL jsonb_array_elements(CASE jsonb_typeof(c.conversation_data)
+  WHEN 'array' THEN c.conversation_data
+  ELSE coalesce(c.conversation_data->'messages', '[]'::jsonb) END) WITH ORDINALITY AS m
+ON CONFLICT (conversation_id, seq) DO NOTHING;""")
+    else:
+        migration.append("""INSERT OR IGNORE INTO ai_messages (conversation_id, seq, role, content, tokens, metadata, created_at)
+SELECT c.id, m.key, json_extract(m.value, '$.role'), coalesce(json_extract(m.value, '$.content'), ''),
+       json_extract(m.value, '$.tokens'),
+       nullif(json_remove(m.value, '$.role', '$.content', '$.tokens'), '{}'), c.created_at
+FROM ai_conversations c, json_each(CASE json_type(c.conversation_data)
+  WHEN 'array' THEN c.conversation_data
+  ELSE coalesce(json_extract(c.conversation_data, '$.messages'), '[]') END) AS m;""")
+    migration.append("""UPDATE ai_conversations SET message_count = (
+  SELECT count(*) FROM ai_messages m WHERE m.conversation_id = ai_conversations.id
+);""")
+    return '\n\n'.join(migration)
+
+
+def ai_messages_ddl(dialect: str = 'postgres') -> str:
+    """Append-only ai_messages(conversation_id, seq) replacing conversation_data.
+
+    ai_conversations.message_count allocates seq: a turn bumps it with
+    UPDATE ... RETURNING and inserts its messages below the new count, so no
+    earlier message is ever rewritten. The migration copies each blob (a
+    message array, bare or under "messages") with seq = array index and can
+    be rerun; conversation_data is dropped once nothing reads it.
+    """
+    postgres = dialect == 'postgres'
+    uuid_type, json_type, timestamp_type = ('UUID', 'JSONB', 'TIMESTAMPTZ') if postgres else ('TEXT', 'TEXT', 'TEXT')
+    now = 'now()' if postgres else 'CURRENT_TIMESTAMP'
+    cascade = ' ON DELETE CASCADE' if postgres else ''
+    roles = ', '.join(f"'{role}'" for role in AI_MESSAGE_ROLES)
+    statements = [
+        "ALTER TABLE ai_conversations ADD COLUMN message_count INTEGER NOT NULL DEFAULT 0;",
+        f"""CREATE TABLE ai_messages (
+  conversation_id {uuid_type} NOT NULL REFERENCES ai_conversations(id){cascade},
+  seq INTEGER NOT NULL,
+  role TEXT NOT NULL CHECK (role IN ({roles})),
+  content TEXT NOT NULL,
+  tokens INTEGER,
+  metadata {json_type},
+  created_at {timestamp_type} NOT NULL DEFAULT {now},
+  PRIMARY KEY (conversation_id, seq)
+);""",
+    ]
+    statements.append(ai_messages_migration_sql(dialect))
+    statements.append("""-- Appending a turn of :n messages (one transaction):
+-- UPDATE ai_conversations SET message_count = message_count + :n, usage_tokens = usage_tokens + :tokens,
+--   updated_at = now() WHERE id = :conversation_id RETURNING message_count;
+-- INSERT INTO ai_messages (conversation_id, seq, role, content, tokens)
+--   VALUES (:conversation_id, message_count - :n, ...), ..., (:conversation_id, message_count - 1, ...);
+--
+-- Once the application reads ai_messages:
+-- ALTER TABLE ai_conversations DROP COLUMN conversation_data;""")
+    return '\n\n'.join(statements) + '\n'
+
+
+def activity_log_diff_ddl() -> str:
+    """Columns and index for storing activity_logs history as JSON patches (activity_diff.py).
+
+    Written for the monthly partitioned activity_logs: the ALTERs and the
+    index on the parent reach every partition. Rebuilding an entry reads the
+    nearest checkpoint at or before it and the patches after it; bounding
+    created_at by the checkpoint's lets PostgreSQL skip older partitions.
+    Retention drops whole months, so writers start a new checkpoint with a
+    resource's first entry of each month and no patch outlives its base.
+    """
+    return """ALTER TABLE activity_logs ADD COLUMN resource_seq INTEGER;
+ALTER TABLE activity_logs ADD COLUMN is_checkpoint BOOLEAN NOT NULL DEFAULT TRUE;
+ALTER TABLE activity_logs ADD COLUMN data_patch JSONB;
+
+CREATE INDEX idx_activity_logs_resource_seq
+  ON activity_logs (organization_id, resource_type, resource_id, resource_seq);
+
+-- Rebuild input for entry :seq: the checkpoint, then the patches to apply in order
+-- WITH checkpoint AS (
+--   SELECT resource_seq, created_at FROM activity_logs
+--   WHERE organization_id = :org AND resource_type = :type AND resource_id = :id
+--     AND resource_seq <= :seq AND is_checkpoint
+--   ORDER BY resource_seq DESC LIMIT 1
+-- )
+-- SELECT l.resource_seq, l.is_checkpoint, l.new_data, l.data_patch FROM activity_logs l, checkpoint c
+-- WHERE l.organization_id = :org AND l.resource_type = :type AND l.resource_id = :id
+--   AND l.resource_seq BETWEEN c.resource_seq AND :seq AND l.created_at >= c.created_at
+-- ORDER BY l.resource_seq;
+"""
+
+
+# Session setting in which the app server binds the caller's organizations for one request, as a
+# uuid[] literal: SET LOCAL app.org_ids = '{...}'. Ignored on connections with a signed-in auth.uid().
+RLS_ORG_SETTING = 'app.org_ids'
+# The same for the organizations in which the caller is an owner or admin
+RLS_ADMIN_ORG_SETTING = 'app.admin_org_ids'
+RLS_ADMIN_ROLES = ('owner', 'admin')
+
+# Billing and audit rows: members read them, and only the service role (Stripe webhooks, usage ingestion,
+# audit writers) changes them, so a member cannot upgrade its tier or erase usage and history
+RLS_READ_ONLY_TABLES = ('subscriptions', 'usage_tracking', 'activity_logs')
+# Commands only owners and admins may run; members read these tables. New organizations and their first
+# owner come from create_organization(), deletions from the service role
+RLS_ADMIN_COMMANDS = {
+    'organizations': ('UPDATE',),
+    'organization_members': ('INSERT', 'UPDATE', 'DELETE'),
+}
+# Rows of those tables that admins may create, change or remove; the rest (owner memberships) are the
+# owners' alone, so an admin can neither make anyone an owner nor demote or remove one
+RLS_ADMIN_ROWS = {'organization_members': "role IS DISTINCT FROM 'owner'"}
+RLS_OWNER_ORG_SETTING = 'app.owner_org_ids'
+RLS_OWNER_ROLES = ('owner',)
+# Columns that stay with the service role even where admins may update the row
+RLS_SERVICE_COLUMNS = {'organizations': ('id', 'subscription_status', 'created_at')}
+# Tables from task_closure_ddl() and ai_messages_ddl(), which reach their organization through a parent row
+RLS_CHILD_PREDICATES = {
+    'task_closure': ("descendant_id IN (SELECT t.id FROM tasks t JOIN projects p ON p.id = t.project_id "
+                     "WHERE p.organization_id {member})"),
+    'ai_messages': "conversation_id IN (SELECT id FROM ai_conversations WHERE organization_id {member})",
+}
+
+
+def rls_predicates(tables: Dict[str, Table], dialect: str = 'postgres', org_ids: str = 'app_org_ids') -> Dict[str, str]:
+    """Row filter per tenant table: every table with organization_id, organizations, tasks and RLS_CHILD_PREDICATES.
+
+    The organization set is computed once per statement, not per row:
+    PostgreSQL wraps org_ids() (app_org_ids, app_admin_org_ids or
+    app_owner_org_ids) in a
+    scalar subquery (an InitPlan), and SQLite reads the temp.session_orgs
+    table bound for the connection. Both forms are plain comparisons on
+    organization_id, so its indexes apply.
+    """
+    if dialect == 'postgres':
+        member = f'= ANY ((SELECT {org_ids}()))'
+    else:
+        member = 'IN (SELECT organization_id FROM temp.session_orgs)'
+    predicates = {'organizations': f"id {member}"}
+    for table in tables.values():
+        if any(column.name == 'organization_id' for column in table.columns):
+            predicates[table.name] = f"organization_id {member}"
+    # tasks reach their organization through the project
+    predicates['tasks'] = f"project_id IN (SELECT id FROM projects WHERE organization_id {member})"
+    predicates.update((table, predicate.format(member=member)) for table, predicate in RLS_CHILD_PREDICATES.items())
+    return predicates
+
+
+def _org_ids_function(name: str, setting: str, roles: Tuple[str, ...] = ()) -> str:
+    role_filter = f" AND role IN ({', '.join(repr(role) for role in roles)})" if roles else ''
+    return f"""CREATE OR REPLACE FUNCTION {name}() RETURNS UUID[]
+LANGUAGE plpgsql STABLE SECURITY DEFINER SET search_path = public AS $$
+DECLARE
+  bound TEXT := current_setting('{setting}', true);
+BEGIN
+  IF auth.uid() IS NULL AND bound IS NOT NULL AND bound <> '' THEN
+    RETURN bound::UUID[];
+  END IF;
+  RETURN ARRAY(SELECT organization_id FROM organization_members WHERE user_id = auth.uid(){role_filter});
+END
+$$;"""
+
+
+def rls_ddl(tables: Dict[str, Table], dialect: str = 'postgres') -> str:
+    """Organization isolation for every tenant table.
+
+    PostgreSQL: app_org_ids(), app_admin_org_ids() and app_owner_org_ids()
+    are SECURITY DEFINER, so reading organization_members inside them
+    bypasses that table's own policy instead of recursing into it. They
+    return the memberships (owner and admin ones, owner ones) of auth.uid()
+    and, on server connections without one, the org sets bound with
+    RLS_ORG_SETTING, RLS_ADMIN_ORG_SETTING and RLS_OWNER_ORG_SETTING, so a
+    client cannot widen its own set. Members read and write their
+    organizations' rows, except that RLS_READ_ONLY_TABLES are read-only and
+    RLS_ADMIN_COMMANDS need an owner or admin, limited to RLS_ADMIN_ROWS
+    where those are set and with the rest left to owners;
+    create_organization() is the one way to create an organization and its
+    first owner. The child tables of RLS_CHILD_PREDICATES come from
+    strive_tech_task_closure.sql and strive_tech_ai_messages.sql, which run
+    first.
+    SQLite has no RLS: each table in tables gets a temp view rls_<table>
+    filtered by the org set bound in temp.session_orgs, which
+    rls_simulator.py uses to measure the policy's cost.
+    """
+    predicates = rls_predicates(tables, dialect)
+    if dialect == 'sqlite':
+        statements = ["CREATE TEMP TABLE IF NOT EXISTS session_orgs (organization_id TEXT PRIMARY KEY) WITHOUT ROWID;"]
+        statements.extend(f"CREATE TEMP VIEW IF NOT EXISTS rls_{table} AS SELECT * FROM {table} WHERE {predicate};"
+                          for table, predicate in predicates.items() if table in tables)
+        return '\n\n'.join(statements) + '\n'
+    admin = rls_predicates(tables, dialect, org_ids='app_admin_org_ids')
+    owner = rls_predicates(tables, dialect, org_ids='app_owner_org_ids')
+    statements = [f"-- Run after strive_tech_task_closure.sql and strive_tech_ai_messages.sql, which create "
+                  f"{' and '.join(RLS_CHILD_PREDICATES)}"]
+    for name, setting, roles in (('app_org_ids', RLS_ORG_SETTING, ()),
+                                 ('app_admin_org_ids', RLS_ADMIN_ORG_SETTING, RLS_ADMIN_ROLES),
+                                 ('app_owner_org_ids', RLS_OWNER_ORG_SETTING, RLS_OWNER_ROLES)):
+        statements.extend([_org_ids_function(name, setting, roles),
+                           f"REVOKE ALL ON FUNCTION {name}() FROM PUBLIC;",
+                           f"GRANT EXECUTE ON FUNCTION {name}() TO authenticated;"])
+    statements.extend(["""CREATE OR REPLACE FUNCTION create_organization(org_name TEXT, org_slug TEXT DEFAULT NULL) RETURNS UUID
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public AS $$
+DECLARE
+  organization UUID := gen_random_uuid();
+BEGIN
+  IF auth.uid() IS NULL THEN
+    RAISE EXCEPTION 'create_organization() needs a signed-in user';
+  END IF;
+  INSERT INTO organizations (id, name, slug, subscription_status, created_at, updated_at)
+  VALUES (organization, org_name, org_slug, 'trial', now(), now());
+  INSERT INTO organization_members (id, user_id, organization_id, role, joined_at, created_at)
+  VALUES (gen_random_uuid(), auth.uid(), organization, 'owner', now(), now());
+  RETURN organization;
+END
+$$;""",
+                       "REVOKE ALL ON FUNCTION create_organization(TEXT, TEXT) FROM PUBLIC;",
+                       "GRANT EXECUTE ON FUNCTION create_organization(TEXT, TEXT) TO authenticated;"])
+    for table, predicate in predicates.items():
+        if table in RLS_READ_ONLY_TABLES or table in RLS_ADMIN_COMMANDS:
+            policies = [f"""CREATE POLICY organization_read ON {table}
+  FOR SELECT USING ({predicate});"""]
+        else:
+            policies = [f"""CREATE POLICY organization_isolation ON {table}
+  FOR ALL USING ({predicate})
+  WITH CHECK ({predicate});"""]
+        admin_rows = f"{admin[table]} AND {RLS_ADMIN_ROWS[table]}" if table in RLS_ADMIN_ROWS else admin[table]
+        grants = [('admin', admin_rows)] + ([('owner', owner[table])] if table in RLS_ADMIN_ROWS else [])
+        for role, rows in grants:
+            for command in RLS_ADMIN_COMMANDS.get(table, ()):
+                using = f" USING ({rows})" if command != 'INSERT' else ''
+                check = f"\n  WITH CHECK ({rows})" if command != 'DELETE' else ''
+                policies.append(f"""CREATE POLICY organization_{role}_{command.lower()} ON {table}
+  FOR {command}{using}{check};""")
+        statements.append(f"ALTER TABLE {table} ENABLE ROW LEVEL SECURITY;\n" + '\n'.join(policies))
+    for table, reserved in RLS_SERVICE_COLUMNS.items():
+        columns = ', '.join(column.name for column in tables[table].columns if column.name not in reserved)
+        statements.append(f"""REVOKE UPDATE ON {table} FROM authenticated;
+GRANT UPDATE ({columns}) ON {table} TO authenticated;""")
+    statements.append(f"""-- Per request, from the app server's pooled connection once it has authenticated the caller
+-- (the server's database role needs EXECUTE on app_org_ids(), app_admin_org_ids() and app_owner_org_ids() as well):
+-- BEGIN; SET LOCAL {RLS_ORG_SETTING} = '{{<organization ids>}}';
+--   SET LOCAL {RLS_ADMIN_ORG_SETTING} = '{{<ids of those where the caller is {' or '.join(RLS_ADMIN_ROLES)}>}}';
+--   SET LOCAL {RLS_OWNER_ORG_SETTING} = '{{<ids of those where the caller is {' or '.join(RLS_OWNER_ROLES)}>}}'; ...; COMMIT;
+-- Writes to {', '.join(RLS_READ_ONLY_TABLES[:-1])} and {RLS_READ_ONLY_TABLES[-1]} go through the service role,
+-- which bypasses RLS.""")
+    return '\n\n'.join(statements) + '\n'
+
+
+POLICY_PATTERN = re.compile(r"^CREATE POLICY (\w+) ON (\w+)\n  FOR (\w+)(?: USING \((.*)\))?(?:\n  WITH CHECK \((.*)\))?;$",
+                            re.MULTILINE)
+
+
+def check_rls_policies(ddl: str, tables: Dict[str, Table]) -> List[str]:
+    """Return the problems found in rls_ddl(tables, 'postgres') output.
+
+    Every table of rls_predicates() must have RLS enabled, and on
+    RLS_ADMIN_ROWS tables each admin policy must hold the row limit on the
+    old row (USING) and the new one (WITH CHECK), with owner policies for
+    the same commands covering the rest.
+    """
+    problems = []
+    enabled = set(re.findall(r"^ALTER TABLE (\w+) ENABLE ROW LEVEL SECURITY;$", ddl, re.MULTILINE))
+    problems.extend(f"{table}: RLS not enabled" for table in rls_predicates(tables) if table not in enabled)
+    policies = {(table, name): (command, using, check) for name, table, command, using, check in POLICY_PATTERN.findall(ddl)}
+    for table, rows in RLS_ADMIN_ROWS.items():
+        for command in RLS_ADMIN_COMMANDS[table]:
+            for role, expected in (('admin', rows), ('owner', 'app_owner_org_ids()')):
+                name = f"organization_{role}_{command.lower()}"
+                if (table, name) not in policies:
+                    problems.append(f"{table}: no {name} policy")
+                    continue
+                _, using, check = policies[table, name]
+                if command != 'INSERT' and expected not in using:
+                    problems.append(f"{table}.{name}: USING does not hold {expected}")
+                if command != 'DELETE' and expected not in check:
+                    problems.append(f"{table}.{name}: WITH CHECK does not hold {expected}")
+    return problems
+
+
+if __name__ == '__main__':
+    tables = load_tables()
+    ddl = generate_ddl(tables, 'postgres')
+
+    with open('strive_tech_schema.sql', 'w') as f:
+        f.write(ddl)
+
+    indexes = build_indexes(tables)
+    print("=== STRIVE TECH SCHEMA DDL ===\n")
+    print(f"Tables: {len(tables)}")
+    print(f"Indexes: {len(indexes)}")
+    for index in indexes:
+        using = f" USING {index.method}" if index.method else ''
+        print(f"  • {index.name} ON {index.table}{using} ({', '.join(index.columns)})")
+    print("\nPostgreSQL DDL saved to 'strive_tech_schema.sql'")
+
+    with open('strive_tech_schema_partitioned.sql', 'w') as f:
+        f.write(generate_ddl(tables, 'postgres', partitioned=True))
+    print(f"Monthly partitioned DDL ({', '.join(PARTITIONED_TABLES)}) saved to 'strive_tech_schema_partitioned.sql'")
+
+    # Installed next to lib/dashboard-stats.ts, on the database Prisma manages
+    with open('strive_tech_dashboard_counters.sql', 'w') as f:
+        f.write(counter_cache_ddl('postgres', enums='prisma'))
+    print("Dashboard counter cache DDL saved to 'strive_tech_dashboard_counters.sql'")
+
+    with open('strive_tech_task_closure.sql', 'w') as f:
+        f.write(task_closure_ddl('postgres'))
+    print("Subtask closure table DDL saved to 'strive_tech_task_closure.sql'")
+
+    with open('strive_tech_appointment_overlap.sql', 'w') as f:
+        f.write(appointment_overlap_ddl())
+    print("Appointment double-booking constraint saved to 'strive_tech_appointment_overlap.sql'")
+
+    with open('strive_tech_content_search.sql', 'w') as f:
+        f.write(content_search_ddl('postgres'))
+    print("Content full-text search DDL saved to 'strive_tech_content_search.sql'")
+
+    with open('strive_tech_ai_messages.sql', 'w') as f:
+        f.write(ai_messages_ddl('postgres'))
+    print("Append-only AI message store and migration saved to 'strive_tech_ai_messages.sql'")
+
+    with open('strive_tech_activity_log_diff.sql', 'w') as f:
+        f.write(activity_log_diff_ddl())
+    print("Activity log patch storage for the partitioned activity_logs saved to 'strive_tech_activity_log_diff.sql'")
+
+    rls = rls_ddl(tables, 'postgres')
+    with open('strive_tech_rls_policies.sql', 'w') as f:
+        f.write(rls)
+    print("Organization isolation policies saved to 'strive_tech_rls_policies.sql'")
+    rls_problems = check_rls_policies(rls, tables)
+    for problem in rls_problems:
+        print(f"  • {problem}")
+    if rls_problems:
+        sys.exit(1)
+
+    conn = load_sqlite(tables)
+    conn.executescript(counter_cache_ddl('sqlite'))
+    conn.executescript(task_closure_ddl('sqlite'))
+    conn.executescript(ai_messages_ddl('sqlite'))
+    print("\n=== EXPLAIN QUERY PLAN (SQLite) ===\n")
+    failures = 0
+    for group, queries in (('Dashboard', DASHBOARD_QUERIES), ('Dashboard stats variants', DASHBOARD_STATS_VARIANTS),
+                           ('Customers', CUSTOMER_QUERIES), ('Task hierarchy', TASK_HIERARCHY_QUERIES),
+                           ('AI messages', AI_MESSAGE_QUERIES)):
+        print(f"{group}:")
+        for name, (full_scans, temp_sorts) in check_query_plans(conn, queries).items():
+            status = 'FULL SCAN' if full_scans else 'ok'
+            print(f"  • {name}: {status}")
+            for step in full_scans:
+                print(f"      {step}")
+            for step in temp_sorts:
+                print(f"      note: {step}")
+            failures += bool(full_scans)
+        print()
+
+    if failures:
+        print(f"{failures} queries fall back to a full scan")
+        sys.exit(1)
+    print("All queries are served by an index")
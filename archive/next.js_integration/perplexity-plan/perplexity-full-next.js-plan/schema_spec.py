@@ -0,0 +1,136 @@
+# Parse the Strive Tech schema design from script_1.py into structured columns
+#
+# script_1.py is a print-and-save script, so importing it would rewrite
+# strive_tech_database_schema.txt. The `tables` dict and the `relationships`
+# prose are read from its source with ast instead.
+
+import ast
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SCHEMA_SCRIPT = os.path.join(SCRIPT_DIR, 'script_1.py')
+
+COLUMN_PATTERN = re.compile(r'^(\w+)\s*\(([^)]*)\)\s*(?:-\s*(.*))?$')
+FOREIGN_KEY_PATTERN = re.compile(r'^foreign key\s*->\s*(\w+)\.(\w+)$')
+RANGE_PATTERN = re.compile(r'^(-?\d+)-(-?\d+)$')
+QUALIFIED_COLUMN_PATTERN = re.compile(r'(\w+)\.(\w+)')
+
+
+@dataclass
+class Column:
+    name: str
+    type: str
+    enum_values: List[str] = field(default_factory=list)
+    primary_key: bool = False
+    unique: bool = False
+    not_null: bool = False
+    nullable: bool = False
+    default: Optional[str] = None
+    references: Optional[Tuple[str, str]] = None
+    value_range: Optional[Tuple[int, int]] = None
+    comment: Optional[str] = None
+
+    @property
+    def is_array(self) -> bool:
+        return self.type.endswith('[]')
+
+    @property
+    def required(self) -> bool:
+        return self.primary_key or self.not_null
+
+
+@dataclass
+class Table:
+    name: str
+    description: str
+    columns: List[Column]
+
+    def column(self, name: str) -> Column:
+        for column in self.columns:
+            if column.name == name:
+                return column
+        raise KeyError(f"{self.name} has no column '{name}'")
+
+    def has_column(self, name: str) -> bool:
+        return any(column.name == name for column in self.columns)
+
+    @property
+    def foreign_keys(self) -> List[Column]:
+        return [column for column in self.columns if column.references]
+
+
+def _read_literal(name: str, path: str = SCHEMA_SCRIPT):
+    with open(path) as f:
+        tree = ast.parse(f.read(), filename=path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Name) and target.id == name:
+                    return ast.literal_eval(node.value)
+    raise ValueError(f"'{name}' is not defined in {path}")
+
+
+def parse_column(spec: str) -> Column:
+    """Parse a column spec such as "assigned_to (uuid, foreign key -> users.id)"."""
+    match = COLUMN_PATTERN.match(spec.strip())
+    if not match:
+        raise ValueError(f"Unrecognised column spec: {spec!r}")
+    name, details, comment = match.groups()
+    parts = [part.strip() for part in details.split(',')]
+
+    # Enum values are comma separated too, so they swallow the whole list
+    if parts[0].startswith('enum:'):
+        values = [parts[0][len('enum:'):].strip()] + parts[1:]
+        return Column(name=name, type='enum', enum_values=values, comment=comment)
+
+    column = Column(name=name, type=parts[0], comment=comment)
+    for modifier in parts[1:]:
+        fk = FOREIGN_KEY_PATTERN.match(modifier)
+        value_range = RANGE_PATTERN.match(modifier)
+        if modifier == 'primary key':
+            column.primary_key = True
+        elif modifier == 'unique':
+            column.unique = True
+        elif modifier == 'not null':
+            column.not_null = True
+        elif modifier == 'nullable':
+            column.nullable = True
+        elif modifier.startswith('default '):
+            column.default = modifier[len('default '):]
+        elif fk:
+            column.references = (fk.group(1), fk.group(2))
+        elif value_range:
+            column.value_range = (int(value_range.group(1)), int(value_range.group(2)))
+        else:
+            raise ValueError(f"Unrecognised modifier {modifier!r} in {spec!r}")
+    return column
+
+
+def load_tables(path: str = SCHEMA_SCRIPT) -> Dict[str, Table]:
+    tables = {}
+    for name, info in _read_literal('tables', path).items():
+        columns = [parse_column(spec) for spec in info['columns']]
+        tables[name] = Table(name=name, description=info['description'], columns=columns)
+    return tables
+
+
+def load_secondary_indexes(path: str = SCHEMA_SCRIPT) -> List[Tuple[str, List[str]]]:
+    """Return (table, columns) pairs from the "Secondary Indexes" section of the strategy."""
+    relationships = _read_literal('relationships', path)
+    section = relationships.split('Secondary Indexes:', 1)[1].split('===', 1)[0]
+    indexes = []
+    for line in section.splitlines():
+        line = line.strip()
+        if not line.startswith('-'):
+            continue
+        # "- tasks.status + tasks.assigned_to for dashboard queries"
+        columns = QUALIFIED_COLUMN_PATTERN.findall(line.split(' for ', 1)[0])
+        table_names = {table for table, _ in columns}
+        if len(table_names) != 1:
+            raise ValueError(f"Index spans several tables: {line!r}")
+        indexes.append((columns[0][0], [column for _, column in columns]))
+    return indexes
+
@@ -111,7 +111,7 @@ tables = {
             "estimated_hours (decimal, nullable)",
             "actual_hours (decimal, nullable)",
             "tags (string[])",
-            "position (integer) - For kanban ordering",
+            "position (string) - Fractional index key (LexoRank-style) for kanban ordering",
             "created_at (timestamp)",
             "updated_at (timestamp)"
         ]
@@ -279,6 +279,9 @@ Secondary Indexes:
 - ai_conversations.user_id + ai_conversations.created_at
 - activity_logs.organization_id + activity_logs.created_at
 - usage_tracking.organization_id + usage_tracking.billing_period
+- customers.organization_id + customers.created_at + customers.id for keyset pagination
+- tasks.project_id + tasks.status + tasks.position for kanban columns
+- appointments.start_time for reminder scheduling
 
 === ROW-LEVEL SECURITY (RLS) POLICIES ===
 
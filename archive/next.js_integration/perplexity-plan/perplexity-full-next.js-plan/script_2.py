@@ -170,12 +170,202 @@ enum Priority {
 }
 """
 
+# Shared resolver for the signed-in user and their organizations
+current_user = """
+// lib/current-user.ts
+import { cache } from 'react'
+import { auth } from '@clerk/nextjs'
+import { prisma } from '@/lib/prisma'
+
+// Every route and page needs the signed-in user with their organization
+// memberships. Resolution goes through two layers so the lookup runs at most
+// once per request, and usually not at all:
+// - React cache() memoizes it for the current server request, so the page,
+//   its data helpers and server actions share one result
+// - a small cross-request LRU keyed by Clerk user id with a short TTL, so a
+//   burst of API calls from one client does not repeat it. Route handlers
+//   only get this layer: cache() does not memoize outside a React render
+// Call invalidateCurrentUser() after changing a user's memberships.
+
+const TTL_MS = 30_000
+const MAX_ENTRIES = 1_000
+
+// findUnique with a nested include runs three queries in Prisma
+// (users, organization_members, organizations)
+const ROUND_TRIPS_PER_LOAD = 3
+
+const loadUser = (clerkUserId: string) =>
+  prisma.user.findUnique({
+    where: { clerkUserId },
+    include: {
+      organizationMembers: {
+        include: { organization: true }
+      }
+    }
+  })
+
+export type CurrentUser = NonNullable<Awaited<ReturnType<typeof loadUser>>>
+
+type Entry = { user: Promise<CurrentUser | null>; expiresAt: number }
+
+const recentUsers = new Map<string, Entry>()
+
+const totals = { lookups: 0, dbLoads: 0 }
+
+// cache() hands every caller in the same request the same counters
+const requestStats = cache(() => ({ lookups: 0, dbLoads: 0 }))
+
+function fromRecentUsers(clerkUserId: string) {
+  const entry = recentUsers.get(clerkUserId)
+  if (!entry) return null
+  if (entry.expiresAt <= Date.now()) {
+    recentUsers.delete(clerkUserId)
+    return null
+  }
+  // Map keeps insertion order: re-inserting marks the entry most recently used
+  recentUsers.delete(clerkUserId)
+  recentUsers.set(clerkUserId, entry)
+  return entry.user
+}
+
+function resolveUser(clerkUserId: string) {
+  const recent = fromRecentUsers(clerkUserId)
+  if (recent) return recent
+
+  totals.dbLoads++
+  requestStats().dbLoads++
+  const user = loadUser(clerkUserId)
+  recentUsers.set(clerkUserId, { user, expiresAt: Date.now() + TTL_MS })
+  if (recentUsers.size > MAX_ENTRIES) {
+    recentUsers.delete(recentUsers.keys().next().value)
+  }
+
+  // Users still being onboarded and failed lookups are not kept
+  const forget = () => {
+    if (recentUsers.get(clerkUserId)?.user === user) recentUsers.delete(clerkUserId)
+  }
+  user.then(found => { if (!found) forget() }, forget)
+  return user
+}
+
+const resolveForRequest = cache(resolveUser)
+
+export async function getCurrentUser(): Promise<CurrentUser | null> {
+  const { userId } = auth()
+  if (!userId) return null
+
+  totals.lookups++
+  requestStats().lookups++
+  return resolveForRequest(userId)
+}
+
+export function invalidateCurrentUser(clerkUserId: string) {
+  recentUsers.delete(clerkUserId)
+}
+
+// Each lookup served from either layer saves the queries of a fresh load
+function withSavings({ lookups, dbLoads }: { lookups: number; dbLoads: number }) {
+  return { lookups, dbLoads, roundTripsSaved: (lookups - dbLoads) * ROUND_TRIPS_PER_LOAD }
+}
+
+export function getRequestResolverStats() {
+  return withSavings(requestStats())
+}
+
+export function getResolverStats() {
+  return withSavings(totals)
+}
+"""
+
+# Buffered activity log writer used by the API routes
+activity_log_writer = """
+// lib/activity-log-writer.ts
+import { Prisma } from '@prisma/client'
+import { prisma } from '@/lib/prisma'
+
+// Activity logs are written off the request path: logActivity() queues the
+// entry in process and a flush writes queued entries with one createMany,
+// once MAX_BATCH entries are waiting or FLUSH_INTERVAL_MS after the first.
+// The queue is bounded: when it is full, logActivity() waits for a flush to
+// free space (backpressure) instead of growing without limit.
+// On serverless platforms the process can be frozen once the response is
+// sent; await flushActivityLogs() before returning where that matters.
+// activity_log_writer.py is the reference implementation and benchmark.
+
+const MAX_BATCH = 500
+const MAX_QUEUE = 10_000
+const FLUSH_INTERVAL_MS = 250
+const MAX_ATTEMPTS = 3
+
+export type ActivityLogEntry = Prisma.ActivityLogCreateManyInput
+
+const queue: ActivityLogEntry[] = []
+let waiting: Array<() => void> = []
+let timer: NodeJS.Timeout | null = null
+let flushing: Promise<void> | null = null
+
+export async function logActivity(entry: ActivityLogEntry) {
+  while (queue.length >= MAX_QUEUE) {
+    await new Promise<void>(resolve => waiting.push(resolve))
+  }
+  queue.push(entry)
+
+  if (queue.length >= MAX_BATCH) {
+    void flushActivityLogs()
+  } else if (!timer) {
+    timer = setTimeout(() => void flushActivityLogs(), FLUSH_INTERVAL_MS)
+  }
+}
+
+export function flushActivityLogs(): Promise<void> {
+  if (timer) {
+    clearTimeout(timer)
+    timer = null
+  }
+  if (!flushing) {
+    flushing = drain().finally(() => {
+      flushing = null
+    })
+  }
+  return flushing
+}
+
+async function drain() {
+  while (queue.length > 0) {
+    const batch = queue.splice(0, MAX_BATCH)
+    const released = waiting
+    waiting = []
+    released.forEach(resolve => resolve())
+    await writeBatch(batch)
+  }
+}
+
+async function writeBatch(batch: ActivityLogEntry[]) {
+  for (let attempt = 1; ; attempt++) {
+    try {
+      await prisma.activityLog.createMany({ data: batch })
+      return
+    } catch (error) {
+      if (attempt >= MAX_ATTEMPTS) {
+        console.error(`Dropping ${batch.length} activity log entries:`, error)
+        return
+      }
+      await new Promise(resolve => setTimeout(resolve, 100 * 2 ** attempt))
+    }
+  }
+}
+
+process.once('beforeExit', () => void flushActivityLogs())
+"""
+
 # Sample API route for CRM functionality
 api_route_example = """
 // app/api/customers/route.ts
 import { NextRequest, NextResponse } from 'next/server'
 import { auth } from '@clerk/nextjs'
 import { prisma } from '@/lib/prisma'
+import { getCurrentUser } from '@/lib/current-user'
+import { logActivity } from '@/lib/activity-log-writer'
 import { z } from 'zod'
 
 const createCustomerSchema = z.object({
@@ -197,14 +387,7 @@ export async function GET(request: NextRequest) {
     }
 
     // Get user's organization(s)
-    const user = await prisma.user.findUnique({
-      where: { clerkUserId: userId },
-      include: {
-        organizationMembers: {
-          include: { organization: true }
-        }
-      }
-    })
+    const user = await getCurrentUser()
 
     if (!user || user.organizationMembers.length === 0) {
       return NextResponse.json({ error: 'No organization found' }, { status: 403 })
@@ -245,14 +428,7 @@ export async function POST(request: NextRequest) {
     const validatedData = createCustomerSchema.parse(body)
 
     // Get user's primary organization
-    const user = await prisma.user.findUnique({
-      where: { clerkUserId: userId },
-      include: {
-        organizationMembers: {
-          include: { organization: true }
-        }
-      }
-    })
+    const user = await getCurrentUser()
 
     if (!user || user.organizationMembers.length === 0) {
       return NextResponse.json({ error: 'No organization found' }, { status: 403 })
@@ -273,18 +449,17 @@ export async function POST(request: NextRequest) {
       }
     })
 
-    // Log activity
-    await prisma.activityLog.create({
-      data: {
-        organizationId,
-        userId: user.id,
-        action: 'customer_created',
-        resourceType: 'customer',
-        resourceId: customer.id,
-        newData: customer,
-        ipAddress: request.ip || 'unknown',
-        userAgent: request.headers.get('user-agent') || 'unknown'
-      }
+    // Log activity off the request path; newData is the validated input, not
+    // the full record with its includes
+    await logActivity({
+      organizationId,
+      userId: user.id,
+      action: 'customer_created',
+      resourceType: 'customer',
+      resourceId: customer.id,
+      newData: validatedData,
+      ipAddress: request.ip || 'unknown',
+      userAgent: request.headers.get('user-agent') || 'unknown'
     })
 
     return NextResponse.json(customer, { status: 201 })
@@ -299,12 +474,185 @@ export async function POST(request: NextRequest) {
 }
 """
 
+# Keyset-paginated variant of the customers GET route
+api_route_paginated = """
+// app/api/customers/route.ts (keyset-paginated GET)
+import { NextRequest, NextResponse } from 'next/server'
+import { auth } from '@clerk/nextjs'
+import { prisma } from '@/lib/prisma'
+import { getCurrentUser } from '@/lib/current-user'
+import { z } from 'zod'
+
+// Pages walk the (organization_id, created_at, id) index, so page 100 costs
+// the same as page 1:
+//   CREATE INDEX idx_customers_organization_id_created_at_id
+//     ON customers (organization_id, created_at, id);
+// The cursor is the (createdAt, id) of the last customer sent; id breaks ties
+// between customers created in the same millisecond.
+
+const MAX_PAGE_SIZE = 100
+
+const listCustomersSchema = z.object({
+  organizationId: z.string().optional(),
+  cursor: z.string().optional(),
+  limit: z.coerce.number().int().min(1).max(MAX_PAGE_SIZE).default(25)
+})
+
+const cursorSchema = z.tuple([z.string().datetime(), z.string()])
+
+function encodeCursor(customer: { createdAt: Date; id: string }) {
+  return Buffer.from(JSON.stringify([customer.createdAt.toISOString(), customer.id])).toString('base64url')
+}
+
+function decodeCursor(cursor: string) {
+  let decoded: unknown
+  try {
+    decoded = JSON.parse(Buffer.from(cursor, 'base64url').toString())
+  } catch {
+    decoded = null
+  }
+  const [createdAt, id] = cursorSchema.parse(decoded)
+  return { createdAt: new Date(createdAt), id }
+}
+
+export async function GET(request: NextRequest) {
+  try {
+    const { userId } = auth()
+    if (!userId) {
+      return NextResponse.json({ error: 'Unauthorized' }, { status: 401 })
+    }
+
+    const params = listCustomersSchema.parse(Object.fromEntries(request.nextUrl.searchParams))
+
+    const user = await getCurrentUser()
+
+    if (!user || user.organizationMembers.length === 0) {
+      return NextResponse.json({ error: 'No organization found' }, { status: 403 })
+    }
+
+    // One organization per request: a single index range serves the ORDER BY,
+    // where an IN over several organizations would need a sort
+    const membership = params.organizationId
+      ? user.organizationMembers.find(member => member.organizationId === params.organizationId)
+      : user.organizationMembers[0]
+
+    if (!membership) {
+      return NextResponse.json({ error: 'No organization found' }, { status: 403 })
+    }
+
+    const after = params.cursor ? decodeCursor(params.cursor) : null
+
+    const rows = await prisma.customer.findMany({
+      where: {
+        organizationId: membership.organizationId,
+        ...(after && {
+          OR: [
+            { createdAt: { lt: after.createdAt } },
+            { createdAt: after.createdAt, id: { lt: after.id } }
+          ]
+        })
+      },
+      include: {
+        assignedTo: {
+          select: { name: true, email: true }
+        },
+        // Project lists belong on the customer detail route; the list only needs a count
+        _count: {
+          select: { projects: true }
+        }
+      },
+      orderBy: [{ createdAt: 'desc' }, { id: 'desc' }],
+      take: params.limit + 1
+    })
+
+    const hasMore = rows.length > params.limit
+    const customers = hasMore ? rows.slice(0, params.limit) : rows
+
+    return NextResponse.json({
+      customers,
+      nextCursor: hasMore ? encodeCursor(customers[customers.length - 1]) : null
+    })
+  } catch (error) {
+    if (error instanceof z.ZodError) {
+      return NextResponse.json({ error: 'Invalid input', details: error.errors }, { status: 400 })
+    }
+
+    console.error('Error fetching customers:', error)
+    return NextResponse.json({ error: 'Internal server error' }, { status: 500 })
+  }
+}
+"""
+
+# Alternatives to the four count() queries behind the dashboard stats
+dashboard_stats = """
+// lib/dashboard-stats.ts
+import { prisma } from '@/lib/prisma'
+
+// getDashboardStats used to fire four count() queries, two of them on
+// projects and one joining tasks through projects. Two replacements:
+// - getDashboardStatsAggregated: the same counts in a single round trip
+// - getDashboardStatsFromCounters: a primary-key read of organization_stats,
+//   a row kept current by triggers (strive_tech_dashboard_counters.sql).
+//   Cheapest to read, but every customer/project/task write also updates it.
+// Enum values are the uppercase names Prisma stores: ACTIVE_PROJECT_STATUS and
+// COMPLETED_TASK_STATUS from sql_queries.py through prisma_enum(), the same
+// literals the counter triggers compare against.
+
+export type DashboardStats = {
+  totalCustomers: number
+  totalProjects: number
+  completedTasks: number
+  activeProjects: number
+}
+
+type StatsRow = { [K in keyof DashboardStats]: bigint | number }
+
+function toStats(row: StatsRow): DashboardStats {
+  return {
+    totalCustomers: Number(row.totalCustomers),
+    totalProjects: Number(row.totalProjects),
+    completedTasks: Number(row.completedTasks),
+    activeProjects: Number(row.activeProjects)
+  }
+}
+
+export async function getDashboardStatsAggregated(organizationId: string): Promise<DashboardStats> {
+  const [row] = await prisma.$queryRaw<StatsRow[]>`
+    SELECT
+      (SELECT count(*) FROM customers WHERE organization_id = ${organizationId}) AS "totalCustomers",
+      count(*) AS "totalProjects",
+      (SELECT count(*) FROM tasks t JOIN projects tp ON tp.id = t.project_id
+       WHERE tp.organization_id = ${organizationId} AND t.status = 'DONE') AS "completedTasks",
+      count(*) FILTER (WHERE p.status = 'ACTIVE') AS "activeProjects"
+    FROM projects p
+    WHERE p.organization_id = ${organizationId}
+  `
+  return toStats(row)
+}
+
+export async function getDashboardStatsFromCounters(organizationId: string): Promise<DashboardStats> {
+  const [row] = await prisma.$queryRaw<StatsRow[]>`
+    SELECT
+      total_customers AS "totalCustomers",
+      total_projects AS "totalProjects",
+      completed_tasks AS "completedTasks",
+      active_projects AS "activeProjects"
+    FROM organization_stats
+    WHERE organization_id = ${organizationId}
+  `
+  // Organizations created before the counters were installed and not yet backfilled
+  return row ? toStats(row) : getDashboardStatsAggregated(organizationId)
+}
+"""
+
 # Component example for dashboard
 dashboard_component = """
 // app/(dashboard)/dashboard/page.tsx
 import { auth } from '@clerk/nextjs'
 import { redirect } from 'next/navigation'
 import { prisma } from '@/lib/prisma'
+import { getCurrentUser, getRequestResolverStats } from '@/lib/current-user'
+import { getDashboardStatsAggregated } from '@/lib/dashboard-stats'
 import { DashboardStats } from '@/components/dashboard/dashboard-stats'
 import { RecentActivity } from '@/components/dashboard/recent-activity'
 import { ProjectOverview } from '@/components/dashboard/project-overview'
@@ -317,14 +665,7 @@ export default async function DashboardPage() {
     redirect('/sign-in')
   }
 
-  const user = await prisma.user.findUnique({
-    where: { clerkUserId: userId },
-    include: {
-      organizationMembers: {
-        include: { organization: true }
-      }
-    }
-  })
+  const user = await getCurrentUser()
 
   if (!user || user.organizationMembers.length === 0) {
     redirect('/onboarding')
@@ -334,12 +675,16 @@ export default async function DashboardPage() {
 
   // Fetch dashboard data in parallel
   const [stats, recentProjects, recentTasks, recentActivity] = await Promise.all([
-    getDashboardStats(organizationId),
+    getDashboardStatsAggregated(organizationId),
     getRecentProjects(organizationId),
-    getRecentTasks(userId),
+    getRecentTasks(),
     getRecentActivity(organizationId)
   ])
 
+  if (process.env.NODE_ENV !== 'production') {
+    console.debug('[current-user]', getRequestResolverStats())
+  }
+
   return (
     <div className="flex-1 space-y-4 p-8 pt-6">
       <div className="flex items-center justify-between space-y-2">
@@ -367,32 +712,6 @@ export default async function DashboardPage() {
   )
 }
 
-async function getDashboardStats(organizationId: string) {
-  const [totalCustomers, totalProjects, completedTasks, activeProjects] = await Promise.all([
-    prisma.customer.count({ where: { organizationId } }),
-    prisma.project.count({ where: { organizationId } }),
-    prisma.task.count({ 
-      where: { 
-        project: { organizationId },
-        status: 'DONE'
-      }
-    }),
-    prisma.project.count({ 
-      where: { 
-        organizationId,
-        status: 'ACTIVE'
-      }
-    })
-  ])
-
-  return {
-    totalCustomers,
-    totalProjects,
-    completedTasks,
-    activeProjects
-  }
-}
-
 async function getRecentProjects(organizationId: string) {
   return prisma.project.findMany({
     where: { organizationId },
@@ -412,10 +731,9 @@ async function getRecentProjects(organizationId: string) {
   })
 }
 
-async function getRecentTasks(userId: string) {
-  const user = await prisma.user.findUnique({
-    where: { clerkUserId: userId }
-  })
+async function getRecentTasks() {
+  // Served by the request cache: DashboardPage already resolved the user
+  const user = await getCurrentUser()
 
   if (!user) return []
 
@@ -450,7 +768,11 @@ files_content = {
     'next.config.js': nextjs_config,
     '.env.example': env_template,
     'prisma_schema.prisma': prisma_schema,
+    'current_user.ts': current_user,
+    'activity_log_writer.ts': activity_log_writer,
+    'dashboard_stats.ts': dashboard_stats,
     'api_route_example.ts': api_route_example,
+    'api_route_paginated.ts': api_route_paginated,
     'dashboard_component.tsx': dashboard_component
 }
 
@@ -0,0 +1,257 @@
+# Shard placement planner for organizations
+#
+# Every tenant table carries organization_id (tasks through their project),
+# so an organization's rows can live together on one shard; users and
+# ai_tools stay global. Organizations are placed with consistent hashing:
+# every shard owns VNODES tokens on a 64-bit ring and an organization goes
+# to the owner of the first token after the hash of its id. Adding a shard
+# therefore only moves the organizations on the arcs it takes over.
+#
+# Hashing balances organization counts, not rows, and tenant sizes are
+# heavy-tailed. After growth is projected HORIZON_MONTHS ahead, every shard
+# above (1 + TOLERANCE) x the mean load gives up tenants to the least
+# loaded shard, choosing the smallest tenant that clears the excess, or the
+# largest that fits when none does, so each rebalance moves as few bytes as
+# it can. Moved tenants are pinned. The routing table is the ring tokens
+# plus the pins, a few thousand entries for a million organizations, and a
+# tenant too large for any shard is reported as needing a dedicated one.
+#
+# Sizes come from ORG_SIZES_SQL exported as CSV (\copy (...) TO 'sizes.csv'
+# CSV HEADER) or from the heavy-tailed distribution synthetic_data.py uses.
+#
+# Usage: python shard_planner.py --organizations 1000000 --shards 16 --add-shards 4
+
+import argparse
+import bisect
+import csv
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from schema_spec import load_tables
+from synthetic_data import ROWS_PER_ORGANIZATION, row_uuid, table_number
+
+VNODES = 256
+TOLERANCE = 0.10
+HORIZON_MONTHS = 6
+AVG_ROW_BYTES = 350
+GLOBAL_TABLES = ('users', 'organizations', 'ai_tools')
+
+
+def org_sizes_sql() -> str:
+    """PostgreSQL query for rows, bytes and rows added in the last 30 days per organization."""
+    parts = []
+    for name, table in load_tables().items():
+        columns = {column.name for column in table.columns}
+        recent = "COUNT(*) FILTER (WHERE t.created_at >= now() - interval '30 days')"
+        if 'organization_id' in columns:
+            parts.append(f"  SELECT t.organization_id, COUNT(*) AS row_count, SUM(pg_column_size(t.*)) AS bytes, "
+                         f"{recent} AS recent_rows\n  FROM {name} t GROUP BY t.organization_id")
+        elif name == 'tasks':
+            parts.append(f"  SELECT p.organization_id, COUNT(*), SUM(pg_column_size(t.*)), {recent}\n"
+                         f"  FROM tasks t JOIN projects p ON p.id = t.project_id GROUP BY p.organization_id")
+    return ("SELECT organization_id, SUM(row_count) AS row_count, SUM(bytes) AS bytes, "
+            "SUM(recent_rows) AS recent_rows FROM (\n" + "\n  UNION ALL\n".join(parts) +
+            "\n) sizes GROUP BY organization_id")
+
+
+ORG_SIZES_SQL = org_sizes_sql()
+
+
+@dataclass
+class Tenants:
+    ids: List[str]
+    bytes: np.ndarray
+    monthly_growth: np.ndarray
+
+    def projected(self, months: float) -> np.ndarray:
+        return self.bytes * (1 + self.monthly_growth) ** months
+
+
+def load_sizes(path: str) -> Tenants:
+    """Tenants from an ORG_SIZES_SQL export."""
+    ids, sizes, growth = [], [], []
+    with open(path, newline='') as handle:
+        for row in csv.DictReader(handle):
+            rows, recent = int(row['row_count']), int(row['recent_rows'])
+            ids.append(row['organization_id'])
+            sizes.append(float(row['bytes'] or rows * AVG_ROW_BYTES))
+            growth.append(recent / max(rows - recent, 1))
+    return Tenants(ids, np.array(sizes), np.array(growth))
+
+
+def synthetic_tenants(organizations: int, seed: int = 42) -> Tenants:
+    """Pareto(1.2) sizes as in synthetic_data.build_plan, with log-normal monthly growth and a few fast growers."""
+    rng = np.random.default_rng(seed)
+    weights = rng.pareto(1.2, organizations) + 1
+    rows_per_org = sum(count for table, count in ROWS_PER_ORGANIZATION.items() if table not in GLOBAL_TABLES)
+    sizes = weights / weights.mean() * rows_per_org * AVG_ROW_BYTES
+    growth = rng.lognormal(np.log(0.03), 0.6, organizations)
+    fast = rng.random(organizations) < 0.005
+    growth[fast] = rng.uniform(0.15, 0.40, fast.sum())
+    number = table_number(load_tables(), 'organizations')
+    return Tenants([row_uuid(number, index) for index in range(organizations)], sizes, growth)
+
+
+def ring_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little')
+
+
+class RoutingTable:
+    """Consistent-hash ring over the shards plus pinned organizations."""
+
+    def __init__(self, shards: int, vnodes: int = VNODES):
+        self.shards = 0
+        self.vnodes = vnodes
+        self.tokens = np.empty(0, dtype=np.uint64)
+        self.owners = np.empty(0, dtype=np.int32)
+        self.pins: Dict[str, int] = {}
+        self.add_shards(shards)
+
+    def add_shards(self, count: int) -> None:
+        new = [(ring_hash(f"shard-{shard}#{vnode}"), shard)
+               for shard in range(self.shards, self.shards + count) for vnode in range(self.vnodes)]
+        tokens = np.concatenate([self.tokens, np.array([token for token, _ in new], dtype=np.uint64)])
+        owners = np.concatenate([self.owners, np.array([shard for _, shard in new], dtype=np.int32)])
+        order = np.argsort(tokens, kind='stable')
+        self.tokens, self.owners = tokens[order], owners[order]
+        self.shards += count
+        self._token_list = self.tokens.tolist()
+
+    def ring_shards(self, hashes: np.ndarray) -> np.ndarray:
+        return self.owners[np.searchsorted(self.tokens, hashes, side='right') % len(self.tokens)]
+
+    def place(self, ids: Sequence[str], hashes: np.ndarray) -> np.ndarray:
+        placement = self.ring_shards(hashes)
+        if self.pins:
+            positions = {organization_id: index for index, organization_id in enumerate(ids)}
+            for organization_id, shard in self.pins.items():
+                placement[positions[organization_id]] = shard
+        return placement
+
+    def shard_for(self, organization_id: str) -> int:
+        shard = self.pins.get(organization_id)
+        if shard is not None:
+            return shard
+        index = bisect.bisect_right(self._token_list, ring_hash(organization_id)) % len(self._token_list)
+        return int(self.owners[index])
+
+    def to_json(self) -> Dict[str, object]:
+        return {'shards': self.shards, 'vnodes': self.vnodes, 'hash': 'blake2b-64-le',
+                'tokens': [[str(token), int(owner)] for token, owner in zip(self._token_list, self.owners.tolist())],
+                'pins': self.pins}
+
+
+@dataclass
+class Rebalance:
+    moves: List[Tuple[int, int, int]]  # (organization index, from shard, to shard)
+    oversized: List[int]
+
+
+def rebalance(routing: RoutingTable, tenants: Tenants, placement: np.ndarray, sizes: np.ndarray,
+              tolerance: float = TOLERANCE) -> Rebalance:
+    """Move tenants off shards above (1 + tolerance) x the mean load, pinning them where they go."""
+    loads = np.bincount(placement, weights=sizes, minlength=routing.shards)
+    target = loads.sum() / routing.shards * (1 + tolerance)
+    moves, oversized = [], []
+    for shard in np.argsort(-loads):
+        if loads[shard] <= target:
+            break
+        members = np.flatnonzero(placement == shard)
+        members = members[np.argsort(sizes[members])]
+        member_sizes = sizes[members]
+        available = np.ones(len(members), dtype=bool)
+        oversized.extend(int(org) for org in members[member_sizes > target])
+        while loads[shard] > target:
+            destination = int(np.argmin(loads))
+            room = target - loads[destination]
+            excess = loads[shard] - target
+            fits = available & (member_sizes <= room)
+            if not fits.any():
+                break
+            # Smallest tenant that clears the excess; otherwise the largest that fits
+            clears = np.flatnonzero(fits & (member_sizes >= excess))
+            pick = clears[0] if len(clears) else np.flatnonzero(fits)[-1]
+            org = int(members[pick])
+            available[pick] = False
+            loads[shard] -= member_sizes[pick]
+            loads[destination] += member_sizes[pick]
+            placement[org] = destination
+            routing.pins[tenants.ids[org]] = destination
+            moves.append((org, int(shard), destination))
+    return Rebalance(moves, oversized)
+
+
+def imbalance(placement: np.ndarray, sizes: np.ndarray, shards: int) -> float:
+    loads = np.bincount(placement, weights=sizes, minlength=shards)
+    return float(loads.max() / loads.mean())
+
+
+def gib(value: float) -> str:
+    return f"{value / 1024 ** 3:,.1f} GiB"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Plan organization placement across database shards')
+    parser.add_argument('--organizations', type=int, default=1_000_000)
+    parser.add_argument('--sizes', help='CSV export of ORG_SIZES_SQL; synthetic tenants when omitted')
+    parser.add_argument('--shards', type=int, default=16)
+    parser.add_argument('--add-shards', type=int, default=4)
+    parser.add_argument('--months', type=int, default=HORIZON_MONTHS)
+    parser.add_argument('--out', help='write the final routing table as JSON')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    tenants = load_sizes(args.sizes) if args.sizes else synthetic_tenants(args.organizations)
+    hashes = np.array([ring_hash(organization_id) for organization_id in tenants.ids], dtype=np.uint64)
+    loaded = time.perf_counter() - started
+    count = len(tenants.ids)
+    print("=== STRIVE TECH SHARD PLANNER ===\n")
+    print(f"{count:,} organizations, {gib(tenants.bytes.sum())} now, {gib(tenants.projected(args.months).sum())} "
+          f"projected in {args.months} months; largest {gib(tenants.bytes.max())} ({loaded:.2f}s to load and hash)\n")
+
+    routing = RoutingTable(args.shards)
+    steps = [('initial placement', 0, 0), (f'after {args.months} months of growth', args.months, 0),
+             (f'adding {args.add_shards} shards', args.months, args.add_shards)]
+    placement = None
+    for name, months, added in steps:
+        step_started = time.perf_counter()
+        print(f"{name}")
+        print("-" * 60)
+        now, ahead = tenants.projected(months), tenants.projected(months + args.months)
+        if added:
+            before = placement.copy()
+            modulo_moved = now[(hashes % np.uint64(routing.shards)) != (hashes % np.uint64(routing.shards + added))].sum()
+            routing.add_shards(added)
+            placement = routing.place(tenants.ids, hashes)
+            moved = now[placement != before].sum()
+            print(f"  • ring: {moved / now.sum():.1%} of data moves to the new shards "
+                  f"({gib(moved)}); modulo hashing would move {modulo_moved / now.sum():.1%}")
+        elif placement is None:
+            placement = routing.place(tenants.ids, hashes)
+        counts = np.bincount(placement, minlength=routing.shards)
+        print(f"  • {routing.shards} shards, {counts.min():,}-{counts.max():,} organizations each; "
+              f"max/mean load {imbalance(placement, now, routing.shards):.2f} now, "
+              f"{imbalance(placement, ahead, routing.shards):.2f} in {args.months} months")
+        result = rebalance(routing, tenants, placement, ahead)
+        print(f"  • rebalance for {args.months} months ahead: {len(result.moves):,} tenants moved, "
+              f"{gib(now[[org for org, _, _ in result.moves]].sum())} of data to copy today; "
+              f"max/mean {imbalance(placement, ahead, routing.shards):.2f}")
+        if result.oversized:
+            print(f"  • {len(result.oversized)} tenant(s) larger than a whole shard need dedicated shards")
+        print(f"  • routing table: {len(routing.tokens):,} tokens + {len(routing.pins):,} pins "
+              f"({time.perf_counter() - step_started:.2f}s)\n")
+
+    # The compact table routes every organization exactly as the plan placed it
+    sample = np.random.default_rng(7).choice(count, min(count, 100_000), replace=False)
+    agrees = all(routing.shard_for(tenants.ids[index]) == placement[index] for index in sample)
+    print(f"Routing check on {len(sample):,} organizations: {'all agree' if agrees else 'MISMATCH'}; "
+          f"total {time.perf_counter() - started:.2f}s")
+    if args.out:
+        with open(args.out, 'w') as handle:
+            json.dump(routing.to_json(), handle)
+        print(f"Routing table written to {args.out}")
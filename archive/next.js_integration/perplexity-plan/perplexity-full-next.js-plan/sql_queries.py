@@ -0,0 +1,240 @@
+# SQL equivalents of the Prisma queries in the script_2.py route and page templates
+#
+# Written for SQLite with named parameters so they can be EXPLAINed and
+# benchmarked locally; enum values use the lower-case spellings from script_1.py.
+
+# prisma.user.findUnique({ where: { clerkUserId }, include: organizationMembers -> organization })
+USER_WITH_ORGANIZATIONS = """
+SELECT u.id, u.email, u.name, m.organization_id, m.role, o.name AS organization_name
+FROM users u
+LEFT JOIN organization_members m ON m.user_id = u.id
+LEFT JOIN organizations o ON o.id = m.organization_id
+WHERE u.clerk_user_id = :clerk_user_id
+"""
+
+# getRecentTasks repeats the lookup without the include
+USER_BY_CLERK_ID = """
+SELECT id FROM users WHERE clerk_user_id = :clerk_user_id
+"""
+
+# Statuses getDashboardStats counts, spelled as in script_1.py. The Prisma
+# schema declares the same enums in upper case and Prisma stores the names,
+# so queries against its database spell them with prisma_enum(); the
+# counter triggers (schema_ddl.counter_cache_ddl) and lib/dashboard-stats.ts
+# take their literals from here too.
+ACTIVE_PROJECT_STATUS = 'active'
+COMPLETED_TASK_STATUS = 'done'
+
+
+def prisma_enum(value: str) -> str:
+    return value.upper()
+
+
+# getDashboardStats
+TOTAL_CUSTOMERS = """
+SELECT count(*) FROM customers WHERE organization_id = :organization_id
+"""
+
+TOTAL_PROJECTS = """
+SELECT count(*) FROM projects WHERE organization_id = :organization_id
+"""
+
+COMPLETED_TASKS = f"""
+SELECT count(*)
+FROM tasks t
+JOIN projects p ON p.id = t.project_id
+WHERE p.organization_id = :organization_id AND t.status = '{COMPLETED_TASK_STATUS}'
+"""
+
+ACTIVE_PROJECTS = f"""
+SELECT count(*) FROM projects WHERE organization_id = :organization_id AND status = '{ACTIVE_PROJECT_STATUS}'
+"""
+
+# getDashboardStats in one round trip: projects are counted in a single pass
+# with conditional counts, customers and completed tasks as scalar subqueries
+DASHBOARD_STATS_AGGREGATED = f"""
+SELECT
+  (SELECT count(*) FROM customers WHERE organization_id = :organization_id) AS total_customers,
+  count(*) AS total_projects,
+  (SELECT count(*) FROM tasks t JOIN projects tp ON tp.id = t.project_id
+   WHERE tp.organization_id = :organization_id AND t.status = '{COMPLETED_TASK_STATUS}') AS completed_tasks,
+  count(*) FILTER (WHERE p.status = '{ACTIVE_PROJECT_STATUS}') AS active_projects
+FROM projects p
+WHERE p.organization_id = :organization_id
+"""
+
+# ...or read from the trigger-maintained counter row (schema_ddl.counter_cache_ddl)
+DASHBOARD_STATS_COUNTERS = """
+SELECT total_customers, total_projects, completed_tasks, active_projects
+FROM organization_stats
+WHERE organization_id = :organization_id
+"""
+
+# getRecentProjects, including _count: { select: { tasks: true } }
+RECENT_PROJECTS = """
+SELECT p.id, p.name, p.status, p.updated_at,
+       c.name AS customer_name,
+       pm.name AS project_manager_name,
+       (SELECT count(*) FROM tasks t WHERE t.project_id = p.id) AS task_count
+FROM projects p
+LEFT JOIN customers c ON c.id = p.customer_id
+LEFT JOIN users pm ON pm.id = p.project_manager_id
+WHERE p.organization_id = :organization_id
+ORDER BY p.updated_at DESC
+LIMIT 5
+"""
+
+# getRecentTasks
+RECENT_TASKS = """
+SELECT t.id, t.title, t.status, t.updated_at, p.name AS project_name
+FROM tasks t
+JOIN projects p ON p.id = t.project_id
+WHERE t.assigned_to = :user_id
+ORDER BY t.updated_at DESC
+LIMIT 5
+"""
+
+# getRecentActivity
+RECENT_ACTIVITY = """
+SELECT a.id, a.action, a.resource_type, a.created_at, u.name, u.email
+FROM activity_logs a
+LEFT JOIN users u ON u.id = a.user_id
+WHERE a.organization_id = :organization_id
+ORDER BY a.created_at DESC
+LIMIT 10
+"""
+
+# GET /api/customers: findMany over every organization of the user
+CUSTOMERS_LIST = """
+SELECT c.id, c.name, c.email, c.status, c.created_at, u.name AS assignee_name, u.email AS assignee_email
+FROM customers c
+LEFT JOIN users u ON u.id = c.assigned_to
+WHERE c.organization_id IN (
+  SELECT organization_id FROM organization_members WHERE user_id = :user_id
+)
+ORDER BY c.created_at DESC
+"""
+
+# ...and the projects include Prisma loads for those customers in a second query
+CUSTOMER_PROJECTS = """
+SELECT id, name, status, customer_id
+FROM projects
+WHERE customer_id IN (
+  SELECT c.id FROM customers c
+  WHERE c.organization_id IN (
+    SELECT organization_id FROM organization_members WHERE user_id = :user_id
+  )
+)
+"""
+
+# Paginated variants of GET /api/customers for a single organization, both
+# ordered by (created_at, id) so they can walk the composite index
+CUSTOMERS_PAGE_OFFSET = """
+SELECT c.id, c.name, c.email, c.status, c.created_at, u.name AS assignee_name, u.email AS assignee_email,
+       (SELECT count(*) FROM projects p WHERE p.customer_id = c.id) AS project_count
+FROM customers c
+LEFT JOIN users u ON u.id = c.assigned_to
+WHERE c.organization_id = :organization_id
+ORDER BY c.created_at DESC, c.id DESC
+LIMIT :limit OFFSET :offset
+"""
+
+CUSTOMERS_PAGE_KEYSET = """
+SELECT c.id, c.name, c.email, c.status, c.created_at, u.name AS assignee_name, u.email AS assignee_email,
+       (SELECT count(*) FROM projects p WHERE p.customer_id = c.id) AS project_count
+FROM customers c
+LEFT JOIN users u ON u.id = c.assigned_to
+WHERE c.organization_id = :organization_id
+  AND (c.created_at, c.id) < (:cursor_created_at, :cursor_id)
+ORDER BY c.created_at DESC, c.id DESC
+LIMIT :limit
+"""
+
+# Every subtask of a task, at any depth: a recursive walk of parent_task_id...
+TASK_SUBTREE_RECURSIVE = """
+WITH RECURSIVE subtree (id, depth) AS (
+  SELECT id, 0 FROM tasks WHERE id = :task_id
+  UNION ALL
+  SELECT t.id, subtree.depth + 1 FROM tasks t JOIN subtree ON t.parent_task_id = subtree.id
+)
+SELECT t.id, t.title, t.status, subtree.depth
+FROM subtree JOIN tasks t ON t.id = subtree.id
+"""
+
+# ...or one range of the closure table (schema_ddl.task_closure_ddl)
+TASK_SUBTREE_CLOSURE = """
+SELECT t.id, t.title, t.status, c.depth
+FROM task_closure c JOIN tasks t ON t.id = c.descendant_id
+WHERE c.ancestor_id = :task_id
+"""
+
+# Estimated and actual hours rolled up over a task and all its subtasks
+TASK_ROLLUP_RECURSIVE = """
+WITH RECURSIVE subtree (id) AS (
+  SELECT id FROM tasks WHERE id = :task_id
+  UNION ALL
+  SELECT t.id FROM tasks t JOIN subtree ON t.parent_task_id = subtree.id
+)
+SELECT count(*), sum(t.estimated_hours), sum(t.actual_hours)
+FROM subtree JOIN tasks t ON t.id = subtree.id
+"""
+
+TASK_ROLLUP_CLOSURE = """
+SELECT count(*), sum(t.estimated_hours), sum(t.actual_hours)
+FROM task_closure c JOIN tasks t ON t.id = c.descendant_id
+WHERE c.ancestor_id = :task_id
+"""
+
+# Latest messages of a conversation from the append-only store (schema_ddl.ai_messages_ddl)
+AI_MESSAGES_TAIL = """
+SELECT seq, role, content, tokens FROM ai_messages
+WHERE conversation_id = :conversation_id
+ORDER BY seq DESC LIMIT :limit
+"""
+
+# Messages a client has not seen yet
+AI_MESSAGES_AFTER = """
+SELECT seq, role, content, tokens FROM ai_messages
+WHERE conversation_id = :conversation_id AND seq > :after_seq
+ORDER BY seq
+"""
+
+DASHBOARD_STATS_QUERIES = {
+    'total_customers': TOTAL_CUSTOMERS,
+    'total_projects': TOTAL_PROJECTS,
+    'completed_tasks': COMPLETED_TASKS,
+    'active_projects': ACTIVE_PROJECTS,
+}
+
+DASHBOARD_STATS_VARIANTS = {
+    'stats_aggregated': DASHBOARD_STATS_AGGREGATED,
+    'stats_counters': DASHBOARD_STATS_COUNTERS,
+}
+
+DASHBOARD_QUERIES = {
+    'user_with_organizations': USER_WITH_ORGANIZATIONS,
+    **DASHBOARD_STATS_QUERIES,
+    'recent_projects': RECENT_PROJECTS,
+    'recent_tasks_user': USER_BY_CLERK_ID,
+    'recent_tasks': RECENT_TASKS,
+    'recent_activity': RECENT_ACTIVITY,
+}
+
+CUSTOMER_QUERIES = {
+    'user_with_organizations': USER_WITH_ORGANIZATIONS,
+    'customers_list': CUSTOMERS_LIST,
+    'customer_projects': CUSTOMER_PROJECTS,
+    'customers_page_keyset': CUSTOMERS_PAGE_KEYSET,
+}
+
+TASK_HIERARCHY_QUERIES = {
+    'subtree_recursive': TASK_SUBTREE_RECURSIVE,
+    'subtree_closure': TASK_SUBTREE_CLOSURE,
+    'rollup_recursive': TASK_ROLLUP_RECURSIVE,
+    'rollup_closure': TASK_ROLLUP_CLOSURE,
+}
+
+AI_MESSAGE_QUERIES = {
+    'messages_tail': AI_MESSAGES_TAIL,
+    'messages_after': AI_MESSAGES_AFTER,
+}
@@ -0,0 +1,548 @@
+# Idempotent Stripe webhook processing for subscriptions
+#
+# Stripe delivers every event at least once, retries for days and does not
+# keep order. Each delivery is checked against its Stripe-Signature header,
+# then deduplicated in two layers: a sliding-window Bloom filter of recent
+# event ids in memory, and the stripe_events table, which holds every event
+# id ever processed. The filter only ever saves work: "not seen" skips the
+# table lookup and goes straight to the transaction, whose INSERT ... ON
+# CONFLICT claim still catches ids that have aged out of the filter, and
+# "maybe seen" costs one primary key lookup. Its memory is fixed by
+# BLOOM_CAPACITY and BLOOM_ERROR_RATE, however many events arrive.
+#
+# customer.subscription.* events carry the whole subscription, so applying
+# one is an upsert into subscriptions. An event older than the newest one
+# already applied to its subscription is recorded but not applied, so a
+# late delivery never rolls a subscription back. Event.created only has
+# one-second resolution and a created/updated pair often shares a second,
+# so an event from the same second as the newest applied one is stale if a
+# later type of event (created < updated < deleted) was applied in that
+# second. Otherwise the subscription is fetched from Stripe, when a
+# fetch_subscription hook is given, and the current object is applied in
+# place of the event's. Events for the same subscription run one at a time
+# in arrival order; different subscriptions run concurrently.
+#
+# The benchmark replays synthetic subscription lifecycles whose deliveries
+# are delayed, reordered and duplicated, with some events sharing a second,
+# checks the final subscriptions rows against the last event of every
+# subscription, and compares per-subscription serialization with handling
+# one delivery at a time.
+#
+# Usage: python stripe_webhooks.py --subscriptions 2000 --duplicate-rate 0.3
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import math
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from rate_limiter import AccessControl, Entitlements, make_tools
+from schema_ddl import load_sqlite
+from schema_spec import load_tables
+
+BLOOM_CAPACITY = 100_000
+BLOOM_ERROR_RATE = 0.001
+BLOOM_GENERATIONS = 4
+SIGNATURE_TOLERANCE = 300
+MAX_IN_FLIGHT = 256
+
+# Stripe subscription status -> subscriptions.status
+STRIPE_STATUSES = {
+    'active': 'active',
+    'trialing': 'active',
+    'past_due': 'past_due',
+    'incomplete': 'past_due',
+    'paused': 'past_due',
+    'unpaid': 'unpaid',
+    'canceled': 'cancelled',
+    'incomplete_expired': 'cancelled',
+}
+# In lifecycle order, which breaks ties between events created in the same second
+SUBSCRIPTION_EVENTS = ('customer.subscription.created', 'customer.subscription.updated',
+                       'customer.subscription.deleted')
+EVENT_RANK = {event_type: rank for rank, event_type in enumerate(SUBSCRIPTION_EVENTS)}
+
+APPLIED = 'applied'
+DUPLICATE = 'duplicate'
+STALE = 'stale'
+IGNORED = 'ignored'
+# Same second and type as the newest applied event; resolved by fetching the subscription
+TIED = 'tied'
+
+STRIPE_EVENTS_DDL = """CREATE TABLE IF NOT EXISTS stripe_events (
+  id TEXT PRIMARY KEY,
+  type TEXT NOT NULL,
+  stripe_subscription_id TEXT,
+  created BIGINT NOT NULL,
+  applied BOOLEAN NOT NULL DEFAULT FALSE,
+  received_at TIMESTAMP NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_stripe_events_applied ON stripe_events (stripe_subscription_id, created) WHERE applied;"""
+
+# Same statements for PostgreSQL and SQLite
+SEEN_EVENT = "SELECT 1 FROM stripe_events WHERE id = :id"
+
+CLAIM_EVENT = """INSERT INTO stripe_events (id, type, stripe_subscription_id, created, received_at)
+VALUES (:id, :type, :stripe_subscription_id, :created, :received_at)
+ON CONFLICT (id) DO NOTHING
+RETURNING id"""
+
+LAST_APPLIED = """SELECT MAX(created) FROM stripe_events
+WHERE stripe_subscription_id = :stripe_subscription_id AND applied"""
+
+APPLIED_TYPES_AT = """SELECT type FROM stripe_events
+WHERE stripe_subscription_id = :stripe_subscription_id AND applied AND created = :created"""
+
+MARK_APPLIED = "UPDATE stripe_events SET applied = TRUE WHERE id = :id"
+
+# Lets Stripe's retry through again when a tied event could not be resolved
+RELEASE_EVENT = "DELETE FROM stripe_events WHERE id = :id AND NOT applied"
+
+UPSERT_SUBSCRIPTION = """INSERT INTO subscriptions
+  (id, organization_id, stripe_subscription_id, stripe_customer_id, status, tier, current_period_start,
+   current_period_end, cancel_at_period_end, metadata, created_at, updated_at)
+VALUES (:id, :organization_id, :stripe_subscription_id, :stripe_customer_id, :status, :tier, :current_period_start,
+        :current_period_end, :cancel_at_period_end, :metadata, :received_at, :received_at)
+ON CONFLICT (stripe_subscription_id) DO UPDATE SET
+  status = excluded.status, tier = excluded.tier, current_period_start = excluded.current_period_start,
+  current_period_end = excluded.current_period_end, cancel_at_period_end = excluded.cancel_at_period_end,
+  metadata = excluded.metadata, updated_at = excluded.updated_at"""
+
+
+class SignatureError(Exception):
+    pass
+
+
+def sign(payload: bytes, secret: str, timestamp: int) -> str:
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + payload, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def verify_signature(payload: bytes, header: str, secret: str, now: float,
+                     tolerance: int = SIGNATURE_TOLERANCE) -> None:
+    """Check a Stripe-Signature header; raises SignatureError if it does not match or is too old."""
+    parts = [part.split('=', 1) for part in header.split(',') if '=' in part]
+    timestamps = [value for name, value in parts if name == 't']
+    signatures = [value for name, value in parts if name == 'v1']
+    if not timestamps or not signatures:
+        raise SignatureError("malformed Stripe-Signature header")
+    timestamp = int(timestamps[0])
+    if abs(now - timestamp) > tolerance:
+        raise SignatureError("signature timestamp outside the tolerance")
+    expected = sign(payload, secret, timestamp).split('v1=')[1]
+    if not any(hmac.compare_digest(expected, signature) for signature in signatures):
+        raise SignatureError("no matching signature")
+
+
+def _iso(epoch: Optional[int]) -> Optional[str]:
+    return None if epoch is None else datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+@dataclass
+class WebhookEvent:
+    id: str
+    type: str
+    created: int
+    subscription_id: Optional[str]
+    data: Dict[str, Any]
+
+    @classmethod
+    def from_stripe(cls, body: Dict[str, Any]) -> 'WebhookEvent':
+        data = body['data']['object']
+        if body['type'] in SUBSCRIPTION_EVENTS:
+            subscription_id = data['id']
+        else:
+            subscription_id = data.get('subscription')
+        return cls(body['id'], body['type'], body['created'], subscription_id, data)
+
+    def subscription_row(self) -> Dict[str, Any]:
+        """subscriptions columns from the subscription object; tier and organization come from its metadata."""
+        metadata = self.data.get('metadata') or {}
+        return {
+            'id': metadata.get('subscription_row_id') or str(uuid.uuid5(uuid.NAMESPACE_URL, self.data['id'])),
+            'organization_id': metadata.get('organization_id'),
+            'stripe_subscription_id': self.data['id'],
+            'stripe_customer_id': self.data.get('customer'),
+            'status': STRIPE_STATUSES[self.data['status']],
+            'tier': metadata.get('tier', 'free'),
+            'current_period_start': _iso(self.data.get('current_period_start')),
+            'current_period_end': _iso(self.data.get('current_period_end')),
+            'cancel_at_period_end': bool(self.data.get('cancel_at_period_end')),
+            'metadata': json.dumps(metadata),
+        }
+
+
+class SlidingBloomFilter:
+    """Bloom filter over the last ~capacity ids, kept as generations that are dropped oldest first."""
+
+    def __init__(self, capacity: int = BLOOM_CAPACITY, error_rate: float = BLOOM_ERROR_RATE,
+                 generations: int = BLOOM_GENERATIONS):
+        self.per_generation = math.ceil(capacity / generations)
+        # Every generation is checked, so each gets its share of the error rate
+        rate = error_rate / generations
+        self.bits = math.ceil(-self.per_generation * math.log(rate) / math.log(2) ** 2)
+        self.hashes = max(round(self.bits / self.per_generation * math.log(2)), 1)
+        self.generations = [bytearray((self.bits + 7) // 8) for _ in range(generations)]
+        self.count = 0
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(len(generation) for generation in self.generations)
+
+    def _positions(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(first + index * second) % self.bits for index in range(self.hashes)]
+
+    def __contains__(self, key: str) -> bool:
+        positions = self._positions(key)
+        return any(all(generation[position >> 3] >> (position & 7) & 1 for position in positions)
+                   for generation in self.generations)
+
+    def add(self, key: str) -> None:
+        if self.count >= self.per_generation:
+            self.generations.pop()
+            self.generations.insert(0, bytearray((self.bits + 7) // 8))
+            self.count = 0
+        current = self.generations[0]
+        for position in self._positions(key):
+            current[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+
+class KeyedSerializer:
+    """Runs coroutines one at a time per key, in submission order, and concurrently across keys."""
+
+    def __init__(self):
+        self._tails: Dict[str, asyncio.Task] = {}
+
+    def run(self, key: str, work: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = asyncio.ensure_future(self._after(key, self._tails.get(key), work))
+        self._tails[key] = task
+        return task
+
+    async def _after(self, key: str, previous: Optional[asyncio.Task], work: Callable[[], Awaitable[Any]]) -> Any:
+        if previous is not None:
+            await asyncio.wait([previous])
+        try:
+            return await work()
+        finally:
+            if self._tails.get(key) is asyncio.current_task():
+                del self._tails[key]
+
+    def __len__(self) -> int:
+        return len(self._tails)
+
+
+@dataclass
+class WebhookStats:
+    received: int = 0
+    applied: int = 0
+    stale: int = 0
+    ties: int = 0
+    refetched: int = 0
+    ignored: int = 0
+    duplicates_filtered: int = 0
+    duplicates_claimed: int = 0
+    false_positives: int = 0
+    lookups: int = 0
+
+
+class WebhookProcessor:
+    """Verifies, deduplicates and applies Stripe webhook deliveries."""
+
+    def __init__(self, conn: sqlite3.Connection, secret: str, bloom: Optional[SlidingBloomFilter] = None,
+                 on_applied: Optional[Callable[[WebhookEvent, Dict[str, Any]], Awaitable[None]]] = None,
+                 max_in_flight: int = MAX_IN_FLIGHT, clock: Callable[[], float] = time.time,
+                 fetch_subscription: Optional[Callable[[str], Dict[str, Any]]] = None):
+        """fetch_subscription(id) returns the current subscription object, as stripe.Subscription.retrieve does.
+
+        Without it, an event tied with the newest applied one on second and
+        type is applied in arrival order.
+        """
+        self.conn = conn
+        self.secret = secret
+        self.bloom = bloom or SlidingBloomFilter()
+        self.on_applied = on_applied
+        self.fetch_subscription = fetch_subscription
+        self.clock = clock
+        self.stats = WebhookStats()
+        self.conn.executescript(STRIPE_EVENTS_DDL)
+        # One connection, one thread: database work is serialized, handlers around it are not
+        self._db = ThreadPoolExecutor(max_workers=1)
+        self._serializer = KeyedSerializer()
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+
+    async def handle(self, payload: bytes, signature: str) -> str:
+        """Process one delivery, as the webhook endpoint would before answering 200."""
+        verify_signature(payload, signature, self.secret, self.clock())
+        return await self.process(WebhookEvent.from_stripe(json.loads(payload)))
+
+    def process(self, event: WebhookEvent) -> asyncio.Task:
+        self.stats.received += 1
+        return self._serializer.run(event.subscription_id or event.id, lambda: self._process(event))
+
+    async def _process(self, event: WebhookEvent) -> str:
+        async with self._in_flight:
+            maybe_seen = event.id in self.bloom
+            loop = asyncio.get_running_loop()
+            outcome, row = await loop.run_in_executor(self._db, self._apply, event, maybe_seen)
+            self.bloom.add(event.id)
+            if outcome == TIED:
+                try:
+                    current = await loop.run_in_executor(None, self.fetch_subscription, event.subscription_id)
+                except Exception:
+                    await loop.run_in_executor(self._db, self._release, event)
+                    raise
+                outcome, row = await loop.run_in_executor(self._db, self._apply_current, event, current)
+            if outcome == APPLIED and self.on_applied is not None:
+                # Runs after the commit: a failure here is not retried by Stripe, as the event is recorded
+                await self.on_applied(event, row)
+            return outcome
+
+    def _apply(self, event: WebhookEvent, maybe_seen: bool) -> Tuple[str, Optional[Dict[str, Any]]]:
+        stats = self.stats
+        if maybe_seen:
+            stats.lookups += 1
+            if self.conn.execute(SEEN_EVENT, {'id': event.id}).fetchone() is not None:
+                stats.duplicates_filtered += 1
+                return DUPLICATE, None
+            stats.false_positives += 1
+        received_at = datetime.now(timezone.utc).isoformat()
+        with self.conn:
+            claimed = self.conn.execute(CLAIM_EVENT, {
+                'id': event.id, 'type': event.type, 'stripe_subscription_id': event.subscription_id,
+                'created': event.created, 'received_at': received_at}).fetchone()
+            if claimed is None:
+                stats.duplicates_claimed += 1
+                return DUPLICATE, None
+            if event.type not in SUBSCRIPTION_EVENTS:
+                stats.ignored += 1
+                return IGNORED, None
+            last = self.conn.execute(LAST_APPLIED, {'stripe_subscription_id': event.subscription_id}).fetchone()[0]
+            if last is not None and event.created < last:
+                stats.stale += 1
+                return STALE, None
+            if last == event.created:
+                stats.ties += 1
+                applied_ranks = [EVENT_RANK[event_type] for event_type, in self.conn.execute(
+                    APPLIED_TYPES_AT, {'stripe_subscription_id': event.subscription_id, 'created': last})]
+                if max(applied_ranks) > EVENT_RANK[event.type]:
+                    stats.stale += 1
+                    return STALE, None
+                if self.fetch_subscription is not None:
+                    # Claimed but not applied; _apply_current finishes it with the fetched object
+                    return TIED, None
+            row = self._upsert(event, received_at)
+        stats.applied += 1
+        return APPLIED, row
+
+    def _apply_current(self, event: WebhookEvent, current: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """Apply the subscription as fetched from Stripe for a tied event."""
+        fetched = WebhookEvent(event.id, event.type, event.created, event.subscription_id, current)
+        with self.conn:
+            row = self._upsert(fetched, datetime.now(timezone.utc).isoformat())
+        self.stats.applied += 1
+        self.stats.refetched += 1
+        return APPLIED, row
+
+    def _upsert(self, event: WebhookEvent, received_at: str) -> Dict[str, Any]:
+        row = event.subscription_row()
+        self.conn.execute(UPSERT_SUBSCRIPTION, {**row, 'received_at': received_at})
+        self.conn.execute(MARK_APPLIED, {'id': event.id})
+        return row
+
+    def _release(self, event: WebhookEvent) -> None:
+        with self.conn:
+            self.conn.execute(RELEASE_EVENT, {'id': event.id})
+
+    def close(self) -> None:
+        self._db.shutdown()
+
+
+def make_lifecycles(subscriptions: int, seed: int, same_second_rate: float = 0.15) -> List[List[Dict[str, Any]]]:
+    """Stripe events per subscription, oldest first, each carrying the whole subscription object.
+
+    same_second_rate of the changes happen in the same second as the event before them.
+    """
+    rng = random.Random(seed)
+    tiers = [tier for tier in load_tables()['subscriptions'].column('tier').enum_values if tier != 'free']
+    lifecycles = []
+    for index in range(subscriptions):
+        created = 1_790_000_000 + rng.randrange(30 * 86400)
+        state = {'id': f'sub_{index:08d}', 'object': 'subscription', 'customer': f'cus_{index:08d}',
+                 'status': rng.choice(['active', 'trialing']), 'cancel_at_period_end': False,
+                 'current_period_start': created, 'current_period_end': created + 30 * 86400,
+                 'metadata': {'organization_id': f'org-{index}', 'tier': rng.choice(tiers)}}
+        events = [('customer.subscription.created', created, dict(state, metadata=dict(state['metadata'])))]
+        for _ in range(rng.randint(2, 10)):
+            if rng.random() >= same_second_rate:
+                created += rng.randint(1, 3 * 86400)
+            change = rng.random()
+            if change < 0.3:
+                state['metadata']['tier'] = rng.choice(tiers)
+            elif change < 0.6:
+                state['status'] = rng.choice(['past_due', 'unpaid', 'active'])
+            elif change < 0.8:
+                state['cancel_at_period_end'] = not state['cancel_at_period_end']
+            else:
+                state['current_period_start'] = state['current_period_end']
+                state['current_period_end'] += 30 * 86400
+                state['status'] = 'active'
+            events.append(('customer.subscription.updated', created, dict(state, metadata=dict(state['metadata']))))
+            if rng.random() < 0.3:
+                invoice = {'id': f'in_{index}_{created}', 'object': 'invoice', 'subscription': state['id']}
+                events.append(('invoice.paid', created, invoice))
+        if rng.random() < 0.2:
+            if rng.random() >= same_second_rate:
+                created += rng.randint(1, 3 * 86400)
+            state['status'] = 'canceled'
+            events.append(('customer.subscription.deleted', created, dict(state, metadata=dict(state['metadata']))))
+        lifecycles.append([{'id': f'evt_{index:08d}_{number:03d}', 'object': 'event', 'type': kind,
+                            'created': when, 'data': {'object': body}}
+                           for number, (kind, when, body) in enumerate(events)])
+    return lifecycles
+
+
+def make_deliveries(lifecycles: List[List[Dict[str, Any]]], duplicate_rate: float, mean_delay: float,
+                    seed: int) -> List[Dict[str, Any]]:
+    """Every event once after a random delay, plus retries of duplicate_rate of them, in arrival order."""
+    rng = random.Random(seed)
+    deliveries = []
+    for events in lifecycles:
+        for event in events:
+            arrival = event['created'] + rng.expovariate(1 / mean_delay)
+            deliveries.append((arrival, event))
+            while rng.random() < duplicate_rate:
+                arrival += rng.expovariate(1 / (mean_delay * 10))
+                deliveries.append((arrival, event))
+    deliveries.sort(key=lambda delivery: delivery[0])
+    return [event for _, event in deliveries]
+
+
+def expected_rows(lifecycles: List[List[Dict[str, Any]]]) -> Dict[str, Tuple]:
+    expected = {}
+    for events in lifecycles:
+        last = [event for event in events if event['type'] in SUBSCRIPTION_EVENTS][-1]
+        row = WebhookEvent.from_stripe(last).subscription_row()
+        expected[row['stripe_subscription_id']] = (row['status'], row['tier'], int(row['cancel_at_period_end']),
+                                                   row['current_period_end'])
+    return expected
+
+
+def current_subscriptions(lifecycles: List[List[Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """What stripe.Subscription.retrieve returns once every lifecycle has played out."""
+    current = {}
+    for events in lifecycles:
+        last = [event for event in events if event['type'] in SUBSCRIPTION_EVENTS][-1]
+        current[last['data']['object']['id']] = last['data']['object']
+    return current
+
+
+def stored_rows(conn: sqlite3.Connection) -> Dict[str, Tuple]:
+    rows = conn.execute("SELECT stripe_subscription_id, status, tier, cancel_at_period_end, current_period_end "
+                        "FROM subscriptions").fetchall()
+    return {row[0]: tuple(row[1:]) for row in rows}
+
+
+async def replay(path: str, deliveries: List[Dict[str, Any]], secret: str, bloom_capacity: int,
+                 handler_ms: float, serial: bool,
+                 subscriptions: Dict[str, Dict[str, Any]]) -> Tuple[WebhookProcessor, AccessControl, float]:
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    load_sqlite(load_tables(), conn)
+    access = AccessControl(Entitlements(make_tools(50, random.Random(1))))
+
+    async def refresh_entitlements(event: WebhookEvent, row: Dict[str, Any]) -> None:
+        # Stands in for invalidating caches and notifying the app after a plan change
+        await asyncio.sleep(handler_ms / 1000)
+        access.set_subscription(row['organization_id'], row['tier'], row['status'])
+
+    # Signatures are checked against the time of signing, as Stripe signs each attempt when it sends it
+    signed = [(payload, sign(payload, secret, event['created']), event['created'])
+              for event in deliveries for payload in (json.dumps(event).encode(),)]
+    now = 0.0
+    processor = WebhookProcessor(conn, secret, SlidingBloomFilter(bloom_capacity), refresh_entitlements,
+                                 clock=lambda: now, fetch_subscription=lambda subscription_id: subscriptions[subscription_id])
+    started = time.perf_counter()
+    tasks = []
+    for payload, signature, signed_at in signed:
+        now = signed_at
+        verify_signature(payload, signature, secret, now)
+        event = WebhookEvent.from_stripe(json.loads(payload))
+        if serial:
+            await processor.process(event)
+        else:
+            tasks.append(processor.process(event))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    processor.close()
+    return processor, access, elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay synthetic Stripe webhook deliveries')
+    parser.add_argument('--subscriptions', type=int, default=2_000)
+    parser.add_argument('--duplicate-rate', type=float, default=0.3)
+    parser.add_argument('--mean-delay', type=float, default=3_600, help='mean delivery delay in seconds')
+    parser.add_argument('--bloom-capacity', type=int, default=10_000)
+    parser.add_argument('--handler-ms', type=float, default=1.0, help='simulated work after each applied event')
+    args = parser.parse_args()
+
+    lifecycles = make_lifecycles(args.subscriptions, seed=42)
+    deliveries = make_deliveries(lifecycles, args.duplicate_rate, args.mean_delay, seed=43)
+    events = sum(len(lifecycle) for lifecycle in lifecycles)
+    expected = expected_rows(lifecycles)
+    subscriptions = current_subscriptions(lifecycles)
+    same_second = sum(earlier['created'] == later['created'] for lifecycle in lifecycles
+                      for earlier, later in zip(lifecycle, lifecycle[1:])
+                      if earlier['type'] in SUBSCRIPTION_EVENTS and later['type'] in SUBSCRIPTION_EVENTS)
+    # A subscription whose last delivery is not its newest event ends wrong if deliveries are applied as they come
+    last_arrival: Dict[str, Dict[str, Any]] = {}
+    for event in deliveries:
+        if event['type'] in SUBSCRIPTION_EVENTS:
+            last_arrival[event['data']['object']['id']] = event
+    arrival_order = expected_rows([[event] for event in last_arrival.values()])
+    reordered = sum(arrival_order[row_id] != row for row_id, row in expected.items())
+
+    print("=== STRIVE TECH STRIPE WEBHOOK REPLAY ===\n")
+    print(f"{args.subscriptions:,} subscriptions, {events:,} events, {len(deliveries):,} deliveries "
+          f"({len(deliveries) - events:,} duplicates); applying in arrival order would leave "
+          f"{reordered:,} subscriptions on an old status or tier; {same_second:,} events share a second with "
+          f"the one before\n")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, serial in (('per-subscription', False), ('one at a time', True)):
+            processor, access, elapsed = asyncio.run(replay(
+                os.path.join(directory, f'{serial}.db'), deliveries, 'whsec_benchmark', args.bloom_capacity,
+                args.handler_ms, serial, subscriptions))
+            stats = processor.stats
+            stored = stored_rows(processor.conn)
+            wrong = sum(stored.get(row_id) != row for row_id, row in expected.items())
+            recorded = processor.conn.execute("SELECT COUNT(*) FROM stripe_events").fetchone()[0]
+            print(f"{name}")
+            print("-" * 60)
+            print(f"  • {len(deliveries) / elapsed:,.0f} deliveries/s ({elapsed:,.2f}s); {stats.applied:,} applied, "
+                  f"{stats.stale:,} stale, {stats.ignored:,} ignored, "
+                  f"{stats.duplicates_filtered + stats.duplicates_claimed:,} duplicates")
+            print(f"  • {stats.ties:,} same-second ties: {stats.refetched:,} resolved by fetching the subscription, "
+                  f"the rest by event type")
+            print(f"  • duplicates: {stats.duplicates_filtered:,} found after the filter said maybe, "
+                  f"{stats.duplicates_claimed:,} caught by the claim after leaving the filter; "
+                  f"{stats.lookups:,} lookups, {stats.false_positives} false positives; "
+                  f"filter {processor.bloom.memory_bytes / 1024:,.0f} KiB")
+            print(f"  • {recorded:,} events recorded for {events:,} sent; {len(stored):,} subscriptions, "
+                  f"{'all match' if not wrong else f'{wrong:,} DO NOT MATCH'} their newest event")
+            processor.conn.close()
+            print()
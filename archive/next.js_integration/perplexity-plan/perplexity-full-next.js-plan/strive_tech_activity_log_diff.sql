@@ -0,0 +1,18 @@
+ALTER TABLE activity_logs ADD COLUMN resource_seq INTEGER;
+ALTER TABLE activity_logs ADD COLUMN is_checkpoint BOOLEAN NOT NULL DEFAULT TRUE;
+ALTER TABLE activity_logs ADD COLUMN data_patch JSONB;
+
+CREATE INDEX idx_activity_logs_resource_seq
+  ON activity_logs (organization_id, resource_type, resource_id, resource_seq);
+
+-- Rebuild input for entry :seq: the checkpoint, then the patches to apply in order
+-- WITH checkpoint AS (
+--   SELECT resource_seq, created_at FROM activity_logs
+--   WHERE organization_id = :org AND resource_type = :type AND resource_id = :id
+--     AND resource_seq <= :seq AND is_checkpoint
+--   ORDER BY resource_seq DESC LIMIT 1
+-- )
+-- SELECT l.resource_seq, l.is_checkpoint, l.new_data, l.data_patch FROM activity_logs l, checkpoint c
+-- WHERE l.organization_id = :org AND l.resource_type = :type AND l.resource_id = :id
+--   AND l.resource_seq BETWEEN c.resource_seq AND :seq AND l.created_at >= c.created_at
+-- ORDER BY l.resource_seq;
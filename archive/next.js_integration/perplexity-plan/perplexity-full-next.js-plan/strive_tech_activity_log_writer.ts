@@ -0,0 +1,78 @@
+
+// lib/activity-log-writer.ts
+import { Prisma } from '@prisma/client'
+import { prisma } from '@/lib/prisma'
+
+// Activity logs are written off the request path: logActivity() queues the
+// entry in process and a flush writes queued entries with one createMany,
+// once MAX_BATCH entries are waiting or FLUSH_INTERVAL_MS after the first.
+// The queue is bounded: when it is full, logActivity() waits for a flush to
+// free space (backpressure) instead of growing without limit.
+// On serverless platforms the process can be frozen once the response is
+// sent; await flushActivityLogs() before returning where that matters.
+// activity_log_writer.py is the reference implementation and benchmark.
+
+const MAX_BATCH = 500
+const MAX_QUEUE = 10_000
+const FLUSH_INTERVAL_MS = 250
+const MAX_ATTEMPTS = 3
+
+export type ActivityLogEntry = Prisma.ActivityLogCreateManyInput
+
+const queue: ActivityLogEntry[] = []
+let waiting: Array<() => void> = []
+let timer: NodeJS.Timeout | null = null
+let flushing: Promise<void> | null = null
+
+export async function logActivity(entry: ActivityLogEntry) {
+  while (queue.length >= MAX_QUEUE) {
+    await new Promise<void>(resolve => waiting.push(resolve))
+  }
+  queue.push(entry)
+
+  if (queue.length >= MAX_BATCH) {
+    void flushActivityLogs()
+  } else if (!timer) {
+    timer = setTimeout(() => void flushActivityLogs(), FLUSH_INTERVAL_MS)
+  }
+}
+
+export function flushActivityLogs(): Promise<void> {
+  if (timer) {
+    clearTimeout(timer)
+    timer = null
+  }
+  if (!flushing) {
+    flushing = drain().finally(() => {
+      flushing = null
+    })
+  }
+  return flushing
+}
+
+async function drain() {
+  while (queue.length > 0) {
+    const batch = queue.splice(0, MAX_BATCH)
+    const released = waiting
+    waiting = []
+    released.forEach(resolve => resolve())
+    await writeBatch(batch)
+  }
+}
+
+async function writeBatch(batch: ActivityLogEntry[]) {
+  for (let attempt = 1; ; attempt++) {
+    try {
+      await prisma.activityLog.createMany({ data: batch })
+      return
+    } catch (error) {
+      if (attempt >= MAX_ATTEMPTS) {
+        console.error(`Dropping ${batch.length} activity log entries:`, error)
+        return
+      }
+      await new Promise(resolve => setTimeout(resolve, 100 * 2 ** attempt))
+    }
+  }
+}
+
+process.once('beforeExit', () => void flushActivityLogs())
@@ -0,0 +1,34 @@
+ALTER TABLE ai_conversations ADD COLUMN message_count INTEGER NOT NULL DEFAULT 0;
+
+CREATE TABLE ai_messages (
+  conversation_id UUID NOT NULL REFERENCES ai_conversations(id) ON DELETE CASCADE,
+  seq INTEGER NOT NULL,
+  role TEXT NOT NULL CHECK (role IN ('system', 'user', 'assistant', 'tool')),
+  content TEXT NOT NULL,
+  tokens INTEGER,
+  metadata JSONB,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (conversation_id, seq)
+);
+
+INSERT INTO ai_messages (conversation_id, seq, role, content, tokens, metadata, created_at)
+SELECT c.id, m.ordinality - 1, m.value->>'role', coalesce(m.value->>'content', ''), (m.value->>'tokens')::integer,
+       nullif(m.value - 'role' - 'content' - 'tokens', '{}'::jsonb), c.created_at
+FROM ai_conversations c
+CROSS JOIN LATERAL jsonb_array_elements(CASE jsonb_typeof(c.conversation_data)
+  WHEN 'array' THEN c.conversation_data
+  ELSE coalesce(c.conversation_data->'messages', '[]'::jsonb) END) WITH ORDINALITY AS m
+ON CONFLICT (conversation_id, seq) DO NOTHING;
+
+UPDATE ai_conversations SET message_count = (
+  SELECT count(*) FROM ai_messages m WHERE m.conversation_id = ai_conversations.id
+);
+
+-- Appending a turn of :n messages (one transaction):
+-- UPDATE ai_conversations SET message_count = message_count + :n, usage_tokens = usage_tokens + :tokens,
+--   updated_at = now() WHERE id = :conversation_id RETURNING message_count;
+-- INSERT INTO ai_messages (conversation_id, seq, role, content, tokens)
+--   VALUES (:conversation_id, message_count - :n, ...), ..., (:conversation_id, message_count - 1, ...);
+--
+-- Once the application reads ai_messages:
+-- ALTER TABLE ai_conversations DROP COLUMN conversation_data;
@@ -3,6 +3,8 @@
 import { NextRequest, NextResponse } from 'next/server'
 import { auth } from '@clerk/nextjs'
 import { prisma } from '@/lib/prisma'
+import { getCurrentUser } from '@/lib/current-user'
+import { logActivity } from '@/lib/activity-log-writer'
 import { z } from 'zod'
 
 const createCustomerSchema = z.object({
@@ -24,14 +26,7 @@ export async function GET(request: NextRequest) {
     }
 
     // Get user's organization(s)
-    const user = await prisma.user.findUnique({
-      where: { clerkUserId: userId },
-      include: {
-        organizationMembers: {
-          include: { organization: true }
-        }
-      }
-    })
+    const user = await getCurrentUser()
 
     if (!user || user.organizationMembers.length === 0) {
       return NextResponse.json({ error: 'No organization found' }, { status: 403 })
@@ -72,14 +67,7 @@ export async function POST(request: NextRequest) {
     const validatedData = createCustomerSchema.parse(body)
 
     // Get user's primary organization
-    const user = await prisma.user.findUnique({
-      where: { clerkUserId: userId },
-      include: {
-        organizationMembers: {
-          include: { organization: true }
-        }
-      }
-    })
+    const user = await getCurrentUser()
 
     if (!user || user.organizationMembers.length === 0) {
       return NextResponse.json({ error: 'No organization found' }, { status: 403 })
@@ -100,18 +88,17 @@ export async function POST(request: NextRequest) {
       }
     })
 
-    // Log activity
-    await prisma.activityLog.create({
-      data: {
-        organizationId,
-        userId: user.id,
-        action: 'customer_created',
-        resourceType: 'customer',
-        resourceId: customer.id,
-        newData: customer,
-        ipAddress: request.ip || 'unknown',
-        userAgent: request.headers.get('user-agent') || 'unknown'
-      }
+    // Log activity off the request path; newData is the validated input, not
+    // the full record with its includes
+    await logActivity({
+      organizationId,
+      userId: user.id,
+      action: 'customer_created',
+      resourceType: 'customer',
+      resourceId: customer.id,
+      newData: validatedData,
+      ipAddress: request.ip || 'unknown',
+      userAgent: request.headers.get('user-agent') || 'unknown'
     })
 
     return NextResponse.json(customer, { status: 201 })
@@ -0,0 +1,106 @@
+
+// app/api/customers/route.ts (keyset-paginated GET)
+import { NextRequest, NextResponse } from 'next/server'
+import { auth } from '@clerk/nextjs'
+import { prisma } from '@/lib/prisma'
+import { getCurrentUser } from '@/lib/current-user'
+import { z } from 'zod'
+
+// Pages walk the (organization_id, created_at, id) index, so page 100 costs
+// the same as page 1:
+//   CREATE INDEX idx_customers_organization_id_created_at_id
+//     ON customers (organization_id, created_at, id);
+// The cursor is the (createdAt, id) of the last customer sent; id breaks ties
+// between customers created in the same millisecond.
+
+const MAX_PAGE_SIZE = 100
+
+const listCustomersSchema = z.object({
+  organizationId: z.string().optional(),
+  cursor: z.string().optional(),
+  limit: z.coerce.number().int().min(1).max(MAX_PAGE_SIZE).default(25)
+})
+
+const cursorSchema = z.tuple([z.string().datetime(), z.string()])
+
+function encodeCursor(customer: { createdAt: Date; id: string }) {
+  return Buffer.from(JSON.stringify([customer.createdAt.toISOString(), customer.id])).toString('base64url')
+}
+
+function decodeCursor(cursor: string) {
+  let decoded: unknown
+  try {
+    decoded = JSON.parse(Buffer.from(cursor, 'base64url').toString())
+  } catch {
+    decoded = null
+  }
+  const [createdAt, id] = cursorSchema.parse(decoded)
+  return { createdAt: new Date(createdAt), id }
+}
+
+export async function GET(request: NextRequest) {
+  try {
+    const { userId } = auth()
+    if (!userId) {
+      return NextResponse.json({ error: 'Unauthorized' }, { status: 401 })
+    }
+
+    const params = listCustomersSchema.parse(Object.fromEntries(request.nextUrl.searchParams))
+
+    const user = await getCurrentUser()
+
+    if (!user || user.organizationMembers.length === 0) {
+      return NextResponse.json({ error: 'No organization found' }, { status: 403 })
+    }
+
+    // One organization per request: a single index range serves the ORDER BY,
+    // where an IN over several organizations would need a sort
+    const membership = params.organizationId
+      ? user.organizationMembers.find(member => member.organizationId === params.organizationId)
+      : user.organizationMembers[0]
+
+    if (!membership) {
+      return NextResponse.json({ error: 'No organization found' }, { status: 403 })
+    }
+
+    const after = params.cursor ? decodeCursor(params.cursor) : null
+
+    const rows = await prisma.customer.findMany({
+      where: {
+        organizationId: membership.organizationId,
+        ...(after && {
+          OR: [
+            { createdAt: { lt: after.createdAt } },
+            { createdAt: after.createdAt, id: { lt: after.id } }
+          ]
+        })
+      },
+      include: {
+        assignedTo: {
+          select: { name: true, email: true }
+        },
+        // Project lists belong on the customer detail route; the list only needs a count
+        _count: {
+          select: { projects: true }
+        }
+      },
+      orderBy: [{ createdAt: 'desc' }, { id: 'desc' }],
+      take: params.limit + 1
+    })
+
+    const hasMore = rows.length > params.limit
+    const customers = hasMore ? rows.slice(0, params.limit) : rows
+
+    return NextResponse.json({
+      customers,
+      nextCursor: hasMore ? encodeCursor(customers[customers.length - 1]) : null
+    })
+  } catch (error) {
+    if (error instanceof z.ZodError) {
+      return NextResponse.json({ error: 'Invalid input', details: error.errors }, { status: 400 })
+    }
+
+    console.error('Error fetching customers:', error)
+    return NextResponse.json({ error: 'Internal server error' }, { status: 500 })
+  }
+}
@@ -0,0 +1,15 @@
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+ALTER TABLE appointments ADD CONSTRAINT appointments_end_after_start CHECK (end_time > start_time);
+
+ALTER TABLE appointments ADD COLUMN during TSTZRANGE
+  GENERATED ALWAYS AS (tstzrange(start_time, end_time, '[)')) STORED;
+
+ALTER TABLE appointments ADD CONSTRAINT appointments_no_double_booking
+  EXCLUDE USING gist (assigned_to WITH =, during WITH &&)
+  WHERE (status NOT IN ('cancelled', 'no_show'));
+
+-- Conflicts for a proposed booking:
+-- SELECT id, start_time, end_time FROM appointments
+-- WHERE assigned_to = :user_id AND during && tstzrange(:start, :end, '[)')
+--   AND status NOT IN ('cancelled', 'no_show');
@@ -0,0 +1,32 @@
+ALTER TABLE content ADD COLUMN search_text TEXT;
+
+ALTER TABLE content ADD COLUMN search_vector TSVECTOR GENERATED ALWAYS AS (
+  setweight(to_tsvector('english', coalesce(title, '')), 'A')
+    || setweight(to_tsvector('english', coalesce(excerpt, '')), 'B')
+    || setweight(to_tsvector('english', coalesce(search_text, '')), 'C')
+) STORED;
+
+CREATE INDEX idx_content_search_vector_gin ON content USING gin (search_vector);
+
+-- NULL until the indexer has stripped the current body; the old search_text stays searchable meanwhile
+ALTER TABLE content ADD COLUMN search_indexed_at TIMESTAMPTZ;
+
+CREATE INDEX idx_content_search_pending ON content (id) WHERE search_indexed_at IS NULL;
+
+CREATE FUNCTION content_search_pending() RETURNS trigger AS $$
+BEGIN
+  IF NEW.content IS DISTINCT FROM OLD.content THEN
+    NEW.search_indexed_at := NULL;
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER content_search_pending BEFORE UPDATE OF content ON content
+  FOR EACH ROW EXECUTE FUNCTION content_search_pending();
+
+-- Ranked search within an organization:
+-- SELECT id, title, ts_rank(search_vector, query) AS rank
+-- FROM content, websearch_to_tsquery('english', :q) AS query
+-- WHERE organization_id = :organization_id AND search_vector @@ query
+-- ORDER BY rank DESC LIMIT 20;
@@ -0,0 +1,104 @@
+
+// lib/current-user.ts
+import { cache } from 'react'
+import { auth } from '@clerk/nextjs'
+import { prisma } from '@/lib/prisma'
+
+// Every route and page needs the signed-in user with their organization
+// memberships. Resolution goes through two layers so the lookup runs at most
+// once per request, and usually not at all:
+// - React cache() memoizes it for the current server request, so the page,
+//   its data helpers and server actions share one result
+// - a small cross-request LRU keyed by Clerk user id with a short TTL, so a
+//   burst of API calls from one client does not repeat it. Route handlers
+//   only get this layer: cache() does not memoize outside a React render
+// Call invalidateCurrentUser() after changing a user's memberships.
+
+const TTL_MS = 30_000
+const MAX_ENTRIES = 1_000
+
+// findUnique with a nested include runs three queries in Prisma
+// (users, organization_members, organizations)
+const ROUND_TRIPS_PER_LOAD = 3
+
+const loadUser = (clerkUserId: string) =>
+  prisma.user.findUnique({
+    where: { clerkUserId },
+    include: {
+      organizationMembers: {
+        include: { organization: true }
+      }
+    }
+  })
+
+export type CurrentUser = NonNullable<Awaited<ReturnType<typeof loadUser>>>
+
+type Entry = { user: Promise<CurrentUser | null>; expiresAt: number }
+
+const recentUsers = new Map<string, Entry>()
+
+const totals = { lookups: 0, dbLoads: 0 }
+
+// cache() hands every caller in the same request the same counters
+const requestStats = cache(() => ({ lookups: 0, dbLoads: 0 }))
+
+function fromRecentUsers(clerkUserId: string) {
+  const entry = recentUsers.get(clerkUserId)
+  if (!entry) return null
+  if (entry.expiresAt <= Date.now()) {
+    recentUsers.delete(clerkUserId)
+    return null
+  }
+  // Map keeps insertion order: re-inserting marks the entry most recently used
+  recentUsers.delete(clerkUserId)
+  recentUsers.set(clerkUserId, entry)
+  return entry.user
+}
+
+function resolveUser(clerkUserId: string) {
+  const recent = fromRecentUsers(clerkUserId)
+  if (recent) return recent
+
+  totals.dbLoads++
+  requestStats().dbLoads++
+  const user = loadUser(clerkUserId)
+  recentUsers.set(clerkUserId, { user, expiresAt: Date.now() + TTL_MS })
+  if (recentUsers.size > MAX_ENTRIES) {
+    recentUsers.delete(recentUsers.keys().next().value)
+  }
+
+  // Users still being onboarded and failed lookups are not kept
+  const forget = () => {
+    if (recentUsers.get(clerkUserId)?.user === user) recentUsers.delete(clerkUserId)
+  }
+  user.then(found => { if (!found) forget() }, forget)
+  return user
+}
+
+const resolveForRequest = cache(resolveUser)
+
+export async function getCurrentUser(): Promise<CurrentUser | null> {
+  const { userId } = auth()
+  if (!userId) return null
+
+  totals.lookups++
+  requestStats().lookups++
+  return resolveForRequest(userId)
+}
+
+export function invalidateCurrentUser(clerkUserId: string) {
+  recentUsers.delete(clerkUserId)
+}
+
+// Each lookup served from either layer saves the queries of a fresh load
+function withSavings({ lookups, dbLoads }: { lookups: number; dbLoads: number }) {
+  return { lookups, dbLoads, roundTripsSaved: (lookups - dbLoads) * ROUND_TRIPS_PER_LOAD }
+}
+
+export function getRequestResolverStats() {
+  return withSavings(requestStats())
+}
+
+export function getResolverStats() {
+  return withSavings(totals)
+}
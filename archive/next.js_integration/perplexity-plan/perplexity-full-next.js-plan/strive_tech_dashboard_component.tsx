@@ -3,6 +3,8 @@
 import { auth } from '@clerk/nextjs'
 import { redirect } from 'next/navigation'
 import { prisma } from '@/lib/prisma'
+import { getCurrentUser, getRequestResolverStats } from '@/lib/current-user'
+import { getDashboardStatsAggregated } from '@/lib/dashboard-stats'
 import { DashboardStats } from '@/components/dashboard/dashboard-stats'
 import { RecentActivity } from '@/components/dashboard/recent-activity'
 import { ProjectOverview } from '@/components/dashboard/project-overview'
@@ -15,14 +17,7 @@ export default async function DashboardPage() {
     redirect('/sign-in')
   }
 
-  const user = await prisma.user.findUnique({
-    where: { clerkUserId: userId },
-    include: {
-      organizationMembers: {
-        include: { organization: true }
-      }
-    }
-  })
+  const user = await getCurrentUser()
 
   if (!user || user.organizationMembers.length === 0) {
     redirect('/onboarding')
@@ -32,12 +27,16 @@ export default async function DashboardPage() {
 
   // Fetch dashboard data in parallel
   const [stats, recentProjects, recentTasks, recentActivity] = await Promise.all([
-    getDashboardStats(organizationId),
+    getDashboardStatsAggregated(organizationId),
     getRecentProjects(organizationId),
-    getRecentTasks(userId),
+    getRecentTasks(),
     getRecentActivity(organizationId)
   ])
 
+  if (process.env.NODE_ENV !== 'production') {
+    console.debug('[current-user]', getRequestResolverStats())
+  }
+
   return (
     <div className="flex-1 space-y-4 p-8 pt-6">
       <div className="flex items-center justify-between space-y-2">
@@ -65,32 +64,6 @@ export default async function DashboardPage() {
   )
 }
 
-async function getDashboardStats(organizationId: string) {
-  const [totalCustomers, totalProjects, completedTasks, activeProjects] = await Promise.all([
-    prisma.customer.count({ where: { organizationId } }),
-    prisma.project.count({ where: { organizationId } }),
-    prisma.task.count({ 
-      where: { 
-        project: { organizationId },
-        status: 'DONE'
-      }
-    }),
-    prisma.project.count({ 
-      where: { 
-        organizationId,
-        status: 'ACTIVE'
-      }
-    })
-  ])
-
-  return {
-    totalCustomers,
-    totalProjects,
-    completedTasks,
-    activeProjects
-  }
-}
-
 async function getRecentProjects(organizationId: string) {
   return prisma.project.findMany({
     where: { organizationId },
@@ -110,10 +83,9 @@ async function getRecentProjects(organizationId: string) {
   })
 }
 
-async function getRecentTasks(userId: string) {
-  const user = await prisma.user.findUnique({
-    where: { clerkUserId: userId }
-  })
+async function getRecentTasks() {
+  // Served by the request cache: DashboardPage already resolved the user
+  const user = await getCurrentUser()
 
   if (!user) return []
 
@@ -0,0 +1,68 @@
+CREATE TABLE organization_stats (
+  organization_id TEXT PRIMARY KEY REFERENCES organizations(id),
+  total_customers INTEGER NOT NULL DEFAULT 0,
+  total_projects INTEGER NOT NULL DEFAULT 0,
+  active_projects INTEGER NOT NULL DEFAULT 0,
+  completed_tasks INTEGER NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE FUNCTION organizations_organization_stats() RETURNS trigger AS $$
+BEGIN
+  INSERT INTO organization_stats (organization_id) VALUES (NEW.id);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER organizations_organization_stats AFTER INSERT ON organizations FOR EACH ROW EXECUTE FUNCTION organizations_organization_stats();
+
+CREATE FUNCTION customers_organization_stats() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    UPDATE organization_stats SET total_customers = total_customers - 1, updated_at = CURRENT_TIMESTAMP WHERE organization_id = OLD.organization_id;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    UPDATE organization_stats SET total_customers = total_customers + 1, updated_at = CURRENT_TIMESTAMP WHERE organization_id = NEW.organization_id;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER customers_organization_stats AFTER INSERT OR DELETE OR UPDATE OF organization_id ON customers FOR EACH ROW EXECUTE FUNCTION customers_organization_stats();
+
+CREATE FUNCTION projects_organization_stats() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    UPDATE organization_stats SET total_projects = total_projects - 1, active_projects = active_projects - CASE WHEN OLD.status = 'ACTIVE' THEN 1 ELSE 0 END, completed_tasks = completed_tasks - (SELECT count(*) FROM tasks WHERE project_id = OLD.id AND status = 'DONE'), updated_at = CURRENT_TIMESTAMP WHERE organization_id = OLD.organization_id;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    UPDATE organization_stats SET total_projects = total_projects + 1, active_projects = active_projects + CASE WHEN NEW.status = 'ACTIVE' THEN 1 ELSE 0 END, completed_tasks = completed_tasks + (SELECT count(*) FROM tasks WHERE project_id = NEW.id AND status = 'DONE'), updated_at = CURRENT_TIMESTAMP WHERE organization_id = NEW.organization_id;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER projects_organization_stats AFTER INSERT OR DELETE OR UPDATE OF organization_id, status ON projects FOR EACH ROW EXECUTE FUNCTION projects_organization_stats();
+
+CREATE FUNCTION tasks_organization_stats() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    UPDATE organization_stats SET completed_tasks = completed_tasks - CASE WHEN OLD.status = 'DONE' THEN 1 ELSE 0 END, updated_at = CURRENT_TIMESTAMP WHERE organization_id = (SELECT organization_id FROM projects WHERE id = OLD.project_id);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    UPDATE organization_stats SET completed_tasks = completed_tasks + CASE WHEN NEW.status = 'DONE' THEN 1 ELSE 0 END, updated_at = CURRENT_TIMESTAMP WHERE organization_id = (SELECT organization_id FROM projects WHERE id = NEW.project_id);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tasks_organization_stats AFTER INSERT OR DELETE OR UPDATE OF project_id, status ON tasks FOR EACH ROW EXECUTE FUNCTION tasks_organization_stats();
+
+INSERT INTO organization_stats (organization_id, total_customers, total_projects, active_projects, completed_tasks)
+SELECT o.id,
+  (SELECT count(*) FROM customers c WHERE c.organization_id = o.id),
+  (SELECT count(*) FROM projects p WHERE p.organization_id = o.id),
+  (SELECT count(*) FROM projects p WHERE p.organization_id = o.id AND p.status = 'ACTIVE'),
+  (SELECT count(*) FROM tasks t JOIN projects p ON p.id = t.project_id
+   WHERE p.organization_id = o.id AND t.status = 'DONE')
+FROM organizations o;
@@ -0,0 +1,59 @@
+
+// lib/dashboard-stats.ts
+import { prisma } from '@/lib/prisma'
+
+// getDashboardStats used to fire four count() queries, two of them on
+// projects and one joining tasks through projects. Two replacements:
+// - getDashboardStatsAggregated: the same counts in a single round trip
+// - getDashboardStatsFromCounters: a primary-key read of organization_stats,
+//   a row kept current by triggers (strive_tech_dashboard_counters.sql).
+//   Cheapest to read, but every customer/project/task write also updates it.
+// Enum values are the uppercase names Prisma stores: ACTIVE_PROJECT_STATUS and
+// COMPLETED_TASK_STATUS from sql_queries.py through prisma_enum(), the same
+// literals the counter triggers compare against.
+
+export type DashboardStats = {
+  totalCustomers: number
+  totalProjects: number
+  completedTasks: number
+  activeProjects: number
+}
+
+type StatsRow = { [K in keyof DashboardStats]: bigint | number }
+
+function toStats(row: StatsRow): DashboardStats {
+  return {
+    totalCustomers: Number(row.totalCustomers),
+    totalProjects: Number(row.totalProjects),
+    completedTasks: Number(row.completedTasks),
+    activeProjects: Number(row.activeProjects)
+  }
+}
+
+export async function getDashboardStatsAggregated(organizationId: string): Promise<DashboardStats> {
+  const [row] = await prisma.$queryRaw<StatsRow[]>`
+    SELECT
+      (SELECT count(*) FROM customers WHERE organization_id = ${organizationId}) AS "totalCustomers",
+      count(*) AS "totalProjects",
+      (SELECT count(*) FROM tasks t JOIN projects tp ON tp.id = t.project_id
+       WHERE tp.organization_id = ${organizationId} AND t.status = 'DONE') AS "completedTasks",
+      count(*) FILTER (WHERE p.status = 'ACTIVE') AS "activeProjects"
+    FROM projects p
+    WHERE p.organization_id = ${organizationId}
+  `
+  return toStats(row)
+}
+
+export async function getDashboardStatsFromCounters(organizationId: string): Promise<DashboardStats> {
+  const [row] = await prisma.$queryRaw<StatsRow[]>`
+    SELECT
+      total_customers AS "totalCustomers",
+      total_projects AS "totalProjects",
+      completed_tasks AS "completedTasks",
+      active_projects AS "activeProjects"
+    FROM organization_stats
+    WHERE organization_id = ${organizationId}
+  `
+  // Organizations created before the counters were installed and not yet backfilled
+  return row ? toStats(row) : getDashboardStatsAggregated(organizationId)
+}
@@ -0,0 +1,159 @@
+-- Run after strive_tech_task_closure.sql and strive_tech_ai_messages.sql, which create task_closure and ai_messages
+
+CREATE OR REPLACE FUNCTION app_org_ids() RETURNS UUID[]
+LANGUAGE plpgsql STABLE SECURITY DEFINER SET search_path = public AS $$
+DECLARE
+  bound TEXT := current_setting('app.org_ids', true);
+BEGIN
+  IF auth.uid() IS NULL AND bound IS NOT NULL AND bound <> '' THEN
+    RETURN bound::UUID[];
+  END IF;
+  RETURN ARRAY(SELECT organization_id FROM organization_members WHERE user_id = auth.uid());
+END
+$$;
+
+REVOKE ALL ON FUNCTION app_org_ids() FROM PUBLIC;
+
+GRANT EXECUTE ON FUNCTION app_org_ids() TO authenticated;
+
+CREATE OR REPLACE FUNCTION app_admin_org_ids() RETURNS UUID[]
+LANGUAGE plpgsql STABLE SECURITY DEFINER SET search_path = public AS $$
+DECLARE
+  bound TEXT := current_setting('app.admin_org_ids', true);
+BEGIN
+  IF auth.uid() IS NULL AND bound IS NOT NULL AND bound <> '' THEN
+    RETURN bound::UUID[];
+  END IF;
+  RETURN ARRAY(SELECT organization_id FROM organization_members WHERE user_id = auth.uid() AND role IN ('owner', 'admin'));
+END
+$$;
+
+REVOKE ALL ON FUNCTION app_admin_org_ids() FROM PUBLIC;
+
+GRANT EXECUTE ON FUNCTION app_admin_org_ids() TO authenticated;
+
+CREATE OR REPLACE FUNCTION app_owner_org_ids() RETURNS UUID[]
+LANGUAGE plpgsql STABLE SECURITY DEFINER SET search_path = public AS $$
+DECLARE
+  bound TEXT := current_setting('app.owner_org_ids', true);
+BEGIN
+  IF auth.uid() IS NULL AND bound IS NOT NULL AND bound <> '' THEN
+    RETURN bound::UUID[];
+  END IF;
+  RETURN ARRAY(SELECT organization_id FROM organization_members WHERE user_id = auth.uid() AND role IN ('owner'));
+END
+$$;
+
+REVOKE ALL ON FUNCTION app_owner_org_ids() FROM PUBLIC;
+
+GRANT EXECUTE ON FUNCTION app_owner_org_ids() TO authenticated;
+
+CREATE OR REPLACE FUNCTION create_organization(org_name TEXT, org_slug TEXT DEFAULT NULL) RETURNS UUID
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public AS $$
+DECLARE
+  organization UUID := gen_random_uuid();
+BEGIN
+  IF auth.uid() IS NULL THEN
+    RAISE EXCEPTION 'create_organization() needs a signed-in user';
+  END IF;
+  INSERT INTO organizations (id, name, slug, subscription_status, created_at, updated_at)
+  VALUES (organization, org_name, org_slug, 'trial', now(), now());
+  INSERT INTO organization_members (id, user_id, organization_id, role, joined_at, created_at)
+  VALUES (gen_random_uuid(), auth.uid(), organization, 'owner', now(), now());
+  RETURN organization;
+END
+$$;
+
+REVOKE ALL ON FUNCTION create_organization(TEXT, TEXT) FROM PUBLIC;
+
+GRANT EXECUTE ON FUNCTION create_organization(TEXT, TEXT) TO authenticated;
+
+ALTER TABLE organizations ENABLE ROW LEVEL SECURITY;
+CREATE POLICY organization_read ON organizations
+  FOR SELECT USING (id = ANY ((SELECT app_org_ids())));
+CREATE POLICY organization_admin_update ON organizations
+  FOR UPDATE USING (id = ANY ((SELECT app_admin_org_ids())))
+  WITH CHECK (id = ANY ((SELECT app_admin_org_ids())));
+
+ALTER TABLE organization_members ENABLE ROW LEVEL SECURITY;
+CREATE POLICY organization_read ON organization_members
+  FOR SELECT USING (organization_id = ANY ((SELECT app_org_ids())));
+CREATE POLICY organization_admin_insert ON organization_members
+  FOR INSERT
+  WITH CHECK (organization_id = ANY ((SELECT app_admin_org_ids())) AND role IS DISTINCT FROM 'owner');
+CREATE POLICY organization_admin_update ON organization_members
+  FOR UPDATE USING (organization_id = ANY ((SELECT app_admin_org_ids())) AND role IS DISTINCT FROM 'owner')
+  WITH CHECK (organization_id = ANY ((SELECT app_admin_org_ids())) AND role IS DISTINCT FROM 'owner');
+CREATE POLICY organization_admin_delete ON organization_members
+  FOR DELETE USING (organization_id = ANY ((SELECT app_admin_org_ids())) AND role IS DISTINCT FROM 'owner');
+CREATE POLICY organization_owner_insert ON organization_members
+  FOR INSERT
+  WITH CHECK (organization_id = ANY ((SELECT app_owner_org_ids())));
+CREATE POLICY organization_owner_update ON organization_members
+  FOR UPDATE USING (organization_id = ANY ((SELECT app_owner_org_ids())))
+  WITH CHECK (organization_id = ANY ((SELECT app_owner_org_ids())));
+CREATE POLICY organization_owner_delete ON organization_members
+  FOR DELETE USING (organization_id = ANY ((SELECT app_owner_org_ids())));
+
+ALTER TABLE customers ENABLE ROW LEVEL SECURITY;
+CREATE POLICY organization_isolation ON customers
+  FOR ALL USING (organization_id = ANY ((SELECT app_org_ids())))
+  WITH CHECK (organization_id = ANY ((SELECT app_org_ids())));
+
+ALTER TABLE projects ENABLE ROW LEVEL SECURITY;
+CREATE POLICY organization_isolation ON projects
+  FOR ALL USING (organization_id = ANY ((SELECT app_org_ids())))
+  WITH CHECK (organization_id = ANY ((SELECT app_org_ids())));
+
+ALTER TABLE ai_conversations ENABLE ROW LEVEL SECURITY;
+CREATE POLICY organization_isolation ON ai_conversations
+  FOR ALL USING (organization_id = ANY ((SELECT app_org_ids())))
+  WITH CHECK (organization_id = ANY ((SELECT app_org_ids())));
+
+ALTER TABLE subscriptions ENABLE ROW LEVEL SECURITY;
+CREATE POLICY organization_read ON subscriptions
+  FOR SELECT USING (organization_id = ANY ((SELECT app_org_ids())));
+
+ALTER TABLE usage_tracking ENABLE ROW LEVEL SECURITY;
+CREATE POLICY organization_read ON usage_tracking
+  FOR SELECT USING (organization_id = ANY ((SELECT app_org_ids())));
+
+ALTER TABLE appointments ENABLE ROW LEVEL SECURITY;
+CREATE POLICY organization_isolation ON appointments
+  FOR ALL USING (organization_id = ANY ((SELECT app_org_ids())))
+  WITH CHECK (organization_id = ANY ((SELECT app_org_ids())));
+
+ALTER TABLE content ENABLE ROW LEVEL SECURITY;
+CREATE POLICY organization_isolation ON content
+  FOR ALL USING (organization_id = ANY ((SELECT app_org_ids())))
+  WITH CHECK (organization_id = ANY ((SELECT app_org_ids())));
+
+ALTER TABLE activity_logs ENABLE ROW LEVEL SECURITY;
+CREATE POLICY organization_read ON activity_logs
+  FOR SELECT USING (organization_id = ANY ((SELECT app_org_ids())));
+
+ALTER TABLE tasks ENABLE ROW LEVEL SECURITY;
+CREATE POLICY organization_isolation ON tasks
+  FOR ALL USING (project_id IN (SELECT id FROM projects WHERE organization_id = ANY ((SELECT app_org_ids()))))
+  WITH CHECK (project_id IN (SELECT id FROM projects WHERE organization_id = ANY ((SELECT app_org_ids()))));
+
+ALTER TABLE task_closure ENABLE ROW LEVEL SECURITY;
+CREATE POLICY organization_isolation ON task_closure
+  FOR ALL USING (descendant_id IN (SELECT t.id FROM tasks t JOIN projects p ON p.id = t.project_id WHERE p.organization_id = ANY ((SELECT app_org_ids()))))
+  WITH CHECK (descendant_id IN (SELECT t.id FROM tasks t JOIN projects p ON p.id = t.project_id WHERE p.organization_id = ANY ((SELECT app_org_ids()))));
+
+ALTER TABLE ai_messages ENABLE ROW LEVEL SECURITY;
+CREATE POLICY organization_isolation ON ai_messages
+  FOR ALL USING (conversation_id IN (SELECT id FROM ai_conversations WHERE organization_id = ANY ((SELECT app_org_ids()))))
+  WITH CHECK (conversation_id IN (SELECT id FROM ai_conversations WHERE organization_id = ANY ((SELECT app_org_ids()))));
+
+REVOKE UPDATE ON organizations FROM authenticated;
+GRANT UPDATE (name, slug, description, settings, billing_email, updated_at) ON organizations TO authenticated;
+
+-- Per request, from the app server's pooled connection once it has authenticated the caller
+-- (the server's database role needs EXECUTE on app_org_ids(), app_admin_org_ids() and app_owner_org_ids() as well):
+-- BEGIN; SET LOCAL app.org_ids = '{<organization ids>}';
+--   SET LOCAL app.admin_org_ids = '{<ids of those where the caller is owner or admin>}';
+--   SET LOCAL app.owner_org_ids = '{<ids of those where the caller is owner>}'; ...; COMMIT;
+-- Writes to subscriptions, usage_tracking and activity_logs go through the service role,
+-- which bypasses RLS.
@@ -0,0 +1,328 @@
+CREATE TYPE users_role AS ENUM ('admin', 'moderator', 'employee', 'client');
+
+CREATE TYPE users_subscription_tier AS ENUM ('free', 'basic', 'pro', 'enterprise');
+
+CREATE TYPE organizations_subscription_status AS ENUM ('active', 'inactive', 'trial');
+
+CREATE TYPE organization_members_role AS ENUM ('owner', 'admin', 'member', 'viewer');
+
+CREATE TYPE customers_status AS ENUM ('lead', 'prospect', 'active', 'churned');
+
+CREATE TYPE customers_source AS ENUM ('website', 'referral', 'social', 'email', 'other');
+
+CREATE TYPE projects_status AS ENUM ('planning', 'active', 'on_hold', 'completed', 'cancelled');
+
+CREATE TYPE projects_priority AS ENUM ('low', 'medium', 'high', 'critical');
+
+CREATE TYPE tasks_status AS ENUM ('todo', 'in_progress', 'review', 'done', 'cancelled');
+
+CREATE TYPE tasks_priority AS ENUM ('low', 'medium', 'high', 'critical');
+
+CREATE TYPE ai_conversations_context_type AS ENUM ('general', 'project', 'customer', 'task');
+
+CREATE TYPE ai_conversations_ai_model AS ENUM ('openai_gpt4', 'claude_sonnet', 'gemini');
+
+CREATE TYPE ai_tools_tool_type AS ENUM ('chatbot', 'analysis', 'automation', 'integration');
+
+CREATE TYPE ai_tools_required_tier AS ENUM ('basic', 'pro', 'enterprise');
+
+CREATE TYPE subscriptions_status AS ENUM ('active', 'past_due', 'cancelled', 'unpaid');
+
+CREATE TYPE subscriptions_tier AS ENUM ('free', 'basic', 'pro', 'enterprise');
+
+CREATE TYPE usage_tracking_resource_type AS ENUM ('ai_tokens', 'api_calls', 'storage', 'seats');
+
+CREATE TYPE appointments_status AS ENUM ('scheduled', 'confirmed', 'completed', 'cancelled', 'no_show');
+
+CREATE TYPE content_content_type AS ENUM ('page', 'blog_post', 'documentation', 'template');
+
+CREATE TYPE content_status AS ENUM ('draft', 'published', 'archived');
+
+CREATE TABLE users (
+  id UUID PRIMARY KEY,
+  clerk_user_id TEXT UNIQUE,
+  email TEXT NOT NULL UNIQUE,
+  name TEXT,
+  avatar_url TEXT,
+  role users_role,
+  subscription_tier users_subscription_tier,
+  is_active BOOLEAN DEFAULT TRUE,
+  created_at TIMESTAMPTZ,
+  updated_at TIMESTAMPTZ
+);
+
+CREATE TABLE organizations (
+  id UUID PRIMARY KEY,
+  name TEXT NOT NULL,
+  slug TEXT UNIQUE,
+  description TEXT,
+  settings JSONB,
+  subscription_status organizations_subscription_status,
+  billing_email TEXT,
+  created_at TIMESTAMPTZ,
+  updated_at TIMESTAMPTZ
+);
+
+CREATE TABLE organization_members (
+  id UUID PRIMARY KEY,
+  user_id UUID REFERENCES users(id),
+  organization_id UUID REFERENCES organizations(id),
+  role organization_members_role,
+  permissions JSONB,
+  joined_at TIMESTAMPTZ,
+  created_at TIMESTAMPTZ
+);
+
+CREATE TABLE customers (
+  id UUID PRIMARY KEY,
+  organization_id UUID REFERENCES organizations(id),
+  name TEXT NOT NULL,
+  email TEXT,
+  phone TEXT,
+  company TEXT,
+  status customers_status,
+  source customers_source,
+  tags TEXT[],
+  custom_fields JSONB,
+  assigned_to UUID REFERENCES users(id),
+  created_at TIMESTAMPTZ,
+  updated_at TIMESTAMPTZ
+);
+
+CREATE TABLE projects (
+  id UUID PRIMARY KEY,
+  organization_id UUID REFERENCES organizations(id),
+  customer_id UUID REFERENCES customers(id),
+  name TEXT NOT NULL,
+  description TEXT,
+  status projects_status,
+  priority projects_priority,
+  start_date DATE,
+  due_date DATE,
+  completion_date DATE,
+  budget NUMERIC(12, 2),
+  progress_percentage INTEGER CHECK (progress_percentage BETWEEN 0 AND 100),
+  project_manager_id UUID REFERENCES users(id),
+  created_at TIMESTAMPTZ,
+  updated_at TIMESTAMPTZ
+);
+
+CREATE TABLE tasks (
+  id UUID PRIMARY KEY,
+  project_id UUID REFERENCES projects(id),
+  parent_task_id UUID REFERENCES tasks(id),
+  title TEXT NOT NULL,
+  description TEXT,
+  status tasks_status,
+  priority tasks_priority,
+  assigned_to UUID REFERENCES users(id),
+  created_by UUID REFERENCES users(id),
+  due_date TIMESTAMPTZ,
+  estimated_hours NUMERIC(12, 2),
+  actual_hours NUMERIC(12, 2),
+  tags TEXT[],
+  position TEXT COLLATE "C",
+  created_at TIMESTAMPTZ,
+  updated_at TIMESTAMPTZ
+);
+
+CREATE TABLE ai_conversations (
+  id UUID PRIMARY KEY,
+  user_id UUID REFERENCES users(id),
+  organization_id UUID REFERENCES organizations(id),
+  title TEXT,
+  context_type ai_conversations_context_type,
+  context_id UUID,
+  ai_model ai_conversations_ai_model,
+  conversation_data JSONB,
+  usage_tokens INTEGER,
+  is_archived BOOLEAN DEFAULT FALSE,
+  created_at TIMESTAMPTZ,
+  updated_at TIMESTAMPTZ
+);
+
+CREATE TABLE ai_tools (
+  id UUID PRIMARY KEY,
+  name TEXT NOT NULL,
+  description TEXT,
+  tool_type ai_tools_tool_type,
+  required_tier ai_tools_required_tier,
+  configuration JSONB,
+  is_active BOOLEAN DEFAULT TRUE,
+  created_at TIMESTAMPTZ,
+  updated_at TIMESTAMPTZ
+);
+
+CREATE TABLE subscriptions (
+  id UUID PRIMARY KEY,
+  organization_id UUID REFERENCES organizations(id),
+  stripe_subscription_id TEXT UNIQUE,
+  stripe_customer_id TEXT,
+  status subscriptions_status,
+  tier subscriptions_tier,
+  current_period_start TIMESTAMPTZ,
+  current_period_end TIMESTAMPTZ,
+  cancel_at_period_end BOOLEAN DEFAULT FALSE,
+  metadata JSONB,
+  created_at TIMESTAMPTZ,
+  updated_at TIMESTAMPTZ
+);
+
+CREATE TABLE usage_tracking (
+  id UUID,
+  organization_id UUID REFERENCES organizations(id),
+  user_id UUID REFERENCES users(id),
+  resource_type usage_tracking_resource_type,
+  resource_name TEXT,
+  usage_amount INTEGER,
+  billing_period DATE NOT NULL,
+  metadata JSONB,
+  created_at TIMESTAMPTZ,
+  PRIMARY KEY (id, billing_period)
+) PARTITION BY RANGE (billing_period);
+
+CREATE TABLE appointments (
+  id UUID PRIMARY KEY,
+  organization_id UUID REFERENCES organizations(id),
+  customer_id UUID REFERENCES customers(id),
+  assigned_to UUID REFERENCES users(id),
+  title TEXT NOT NULL,
+  description TEXT,
+  start_time TIMESTAMPTZ NOT NULL,
+  end_time TIMESTAMPTZ NOT NULL,
+  status appointments_status,
+  location TEXT,
+  meeting_url TEXT,
+  reminders_sent JSONB,
+  created_at TIMESTAMPTZ,
+  updated_at TIMESTAMPTZ
+);
+
+CREATE TABLE content (
+  id UUID PRIMARY KEY,
+  organization_id UUID REFERENCES organizations(id),
+  title TEXT NOT NULL,
+  slug TEXT,
+  content_type content_content_type,
+  content TEXT,
+  excerpt TEXT,
+  status content_status,
+  author_id UUID REFERENCES users(id),
+  published_at TIMESTAMPTZ,
+  seo_meta JSONB,
+  created_at TIMESTAMPTZ,
+  updated_at TIMESTAMPTZ
+);
+
+CREATE TABLE activity_logs (
+  id UUID,
+  organization_id UUID REFERENCES organizations(id),
+  user_id UUID REFERENCES users(id),
+  action TEXT,
+  resource_type TEXT,
+  resource_id TEXT,
+  old_data JSONB,
+  new_data JSONB,
+  ip_address INET,
+  user_agent TEXT,
+  created_at TIMESTAMPTZ NOT NULL,
+  PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE INDEX idx_tasks_status_assigned_to ON tasks (status, assigned_to);
+
+CREATE INDEX idx_ai_conversations_user_id_created_at ON ai_conversations (user_id, created_at);
+
+CREATE INDEX idx_activity_logs_organization_id_created_at ON activity_logs (organization_id, created_at);
+
+CREATE INDEX idx_usage_tracking_organization_id_billing_period ON usage_tracking (organization_id, billing_period);
+
+CREATE INDEX idx_customers_organization_id_created_at_id ON customers (organization_id, created_at, id);
+
+CREATE INDEX idx_tasks_project_id_status_position ON tasks (project_id, status, position);
+
+CREATE INDEX idx_customers_email ON customers (email);
+
+CREATE INDEX idx_appointments_start_time ON appointments (start_time);
+
+CREATE INDEX idx_organization_members_user_id ON organization_members (user_id);
+
+CREATE INDEX idx_organization_members_organization_id ON organization_members (organization_id);
+
+CREATE INDEX idx_customers_assigned_to ON customers (assigned_to);
+
+CREATE INDEX idx_projects_organization_id ON projects (organization_id);
+
+CREATE INDEX idx_projects_customer_id ON projects (customer_id);
+
+CREATE INDEX idx_projects_project_manager_id ON projects (project_manager_id);
+
+CREATE INDEX idx_tasks_parent_task_id ON tasks (parent_task_id);
+
+CREATE INDEX idx_tasks_assigned_to ON tasks (assigned_to);
+
+CREATE INDEX idx_tasks_created_by ON tasks (created_by);
+
+CREATE INDEX idx_ai_conversations_organization_id ON ai_conversations (organization_id);
+
+CREATE INDEX idx_subscriptions_organization_id ON subscriptions (organization_id);
+
+CREATE INDEX idx_usage_tracking_user_id ON usage_tracking (user_id);
+
+CREATE INDEX idx_appointments_organization_id ON appointments (organization_id);
+
+CREATE INDEX idx_appointments_customer_id ON appointments (customer_id);
+
+CREATE INDEX idx_appointments_assigned_to ON appointments (assigned_to);
+
+CREATE INDEX idx_content_organization_id ON content (organization_id);
+
+CREATE INDEX idx_content_author_id ON content (author_id);
+
+CREATE INDEX idx_activity_logs_user_id ON activity_logs (user_id);
+
+CREATE INDEX idx_customers_tags_gin ON customers USING gin (tags);
+
+CREATE INDEX idx_tasks_tags_gin ON tasks USING gin (tags);
+
+CREATE FUNCTION create_monthly_partitions(
+  parent TEXT,
+  from_month DATE DEFAULT date_trunc('month', now())::date,
+  months_ahead INTEGER DEFAULT 3
+) RETURNS void AS $$
+DECLARE
+  partition_month DATE := date_trunc('month', from_month)::date;
+BEGIN
+  WHILE partition_month <= (date_trunc('month', now()) + make_interval(months => months_ahead))::date LOOP
+    EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                   parent || '_' || to_char(partition_month, 'YYYY_MM'), parent, partition_month, (partition_month + interval '1 month')::date);
+    partition_month := (partition_month + interval '1 month')::date;
+  END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Existing data: rename each table to <table>_unpartitioned before running this file, then copy it
+-- with INSERT INTO <table> SELECT * FROM <table>_unpartitioned once the partitions exist.
+DO $$
+DECLARE
+  parent TEXT;
+  key TEXT;
+  oldest DATE;
+BEGIN
+  FOR parent, key IN SELECT * FROM (VALUES ('activity_logs', 'created_at'), ('usage_tracking', 'billing_period')) AS partitioned (parent, key) LOOP
+    oldest := NULL;
+    IF to_regclass(parent || '_unpartitioned') IS NOT NULL THEN
+      EXECUTE format('SELECT min(%I)::date FROM %I', key, parent || '_unpartitioned') INTO oldest;
+    END IF;
+    PERFORM create_monthly_partitions(parent, coalesce(oldest, date_trunc('month', now())::date));
+  END LOOP;
+END
+$$;
+
+DO $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+    PERFORM cron.schedule('create-monthly-partitions', '0 3 * * *', $cron$SELECT create_monthly_partitions('activity_logs'); SELECT create_monthly_partitions('usage_tracking');$cron$);
+  END IF;
+END
+$$;
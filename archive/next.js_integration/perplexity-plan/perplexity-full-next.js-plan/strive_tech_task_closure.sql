@@ -0,0 +1,41 @@
+CREATE TABLE task_closure (
+  ancestor_id UUID NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+  descendant_id UUID NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+  depth INTEGER NOT NULL,
+  PRIMARY KEY (ancestor_id, descendant_id)
+);
+
+CREATE INDEX idx_task_closure_descendant_id ON task_closure (descendant_id, ancestor_id);
+
+CREATE FUNCTION tasks_task_closure() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    INSERT INTO task_closure (ancestor_id, descendant_id, depth)
+    SELECT NEW.id, NEW.id, 0
+    UNION ALL
+    SELECT ancestor_id, NEW.id, depth + 1 FROM task_closure WHERE descendant_id = NEW.parent_task_id;
+  ELSIF NEW.parent_task_id IS DISTINCT FROM OLD.parent_task_id THEN
+    IF EXISTS (SELECT 1 FROM task_closure WHERE ancestor_id = NEW.id AND descendant_id = NEW.parent_task_id) THEN
+      RAISE EXCEPTION 'task % cannot move under its own subtask', NEW.id;
+    END IF;
+    DELETE FROM task_closure
+    WHERE descendant_id IN (SELECT descendant_id FROM task_closure WHERE ancestor_id = NEW.id)
+      AND ancestor_id NOT IN (SELECT descendant_id FROM task_closure WHERE ancestor_id = NEW.id);
+    INSERT INTO task_closure (ancestor_id, descendant_id, depth)
+    SELECT above.ancestor_id, below.descendant_id, above.depth + below.depth + 1
+    FROM task_closure above, task_closure below
+    WHERE above.descendant_id = NEW.parent_task_id AND below.ancestor_id = NEW.id;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tasks_task_closure AFTER INSERT OR UPDATE OF parent_task_id ON tasks FOR EACH ROW EXECUTE FUNCTION tasks_task_closure();
+
+INSERT INTO task_closure (ancestor_id, descendant_id, depth)
+WITH RECURSIVE paths (ancestor_id, descendant_id, depth) AS (
+  SELECT id, id, 0 FROM tasks
+  UNION ALL
+  SELECT paths.ancestor_id, t.id, paths.depth + 1 FROM paths JOIN tasks t ON t.parent_task_id = paths.descendant_id
+)
+SELECT ancestor_id, descendant_id, depth FROM paths;
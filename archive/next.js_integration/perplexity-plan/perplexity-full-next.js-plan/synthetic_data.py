@@ -0,0 +1,458 @@
+# Generate a synthetic multi-tenant dataset for the Strive Tech schema
+#
+# Rows are laid out contiguously per organization, so every foreign key can be
+# resolved from per-org offsets alone: no generated ids are kept in memory.
+# Each table is cut into shards of whole organizations; every shard has its
+# own deterministic seed and is written by a process pool, streaming to CSV
+# and/or PostgreSQL COPY text files in fixed-size batches. Throughput depends
+# on the machine and is printed at the end of every run.
+#
+# Usage: python synthetic_data.py --organizations 5000 --scale 1 --out data/
+
+import argparse
+import json
+import os
+import random
+import time
+import zlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from fractional_index import spaced_key
+from schema_spec import Column, Table, load_tables
+
+# Average rows per organization at --scale 1. users/organization_members are
+# seats; tables not listed here and without organization_id get a fixed count.
+ROWS_PER_ORGANIZATION = {
+    'users': 8,
+    'organization_members': 8,
+    'customers': 400,
+    'projects': 25,
+    'tasks': 600,
+    'ai_conversations': 40,
+    'subscriptions': 1,
+    'usage_tracking': 1200,
+    'appointments': 150,
+    'content': 20,
+    'activity_logs': 1500,
+}
+
+GLOBAL_ROWS = {
+    'ai_tools': 24,
+}
+
+# Fraction of NULLs for columns marked "nullable" in script_1.py
+NULL_RATES = {
+    'parent_task_id': 0.8,
+    'completion_date': 0.7,
+    'customer_id': 0.3,
+}
+DEFAULT_NULL_RATE = 0.1
+
+# Columns derived from another column in the same row: (source, max offset in seconds)
+DERIVED_TIMESTAMPS = {
+    'updated_at': ('created_at', 30 * 86400),
+    'end_time': ('start_time', 3 * 3600),
+    'current_period_end': ('current_period_start', 31 * 86400),
+}
+
+EPOCH = 1704067200  # 2024-01-01T00:00:00Z
+TIME_SPAN = 2 * 365 * 86400
+ROWS_PER_SHARD = 1_000_000
+BATCH_SIZE = 5000
+POOL_SIZE = 4096
+
+WORDS = (
+    'alpha bravo cedar delta ember falcon granite harbor iris juniper kestrel lumen '
+    'meadow nova orbit pine quartz river summit timber umber vertex willow zenith'
+).split()
+TAGS = ['vip', 'enterprise', 'smb', 'newsletter', 'trial', 'renewal', 'urgent',
+        'partner', 'inbound', 'outbound', 'q1', 'q2', 'q3', 'q4', 'priority', 'follow-up']
+
+
+def table_number(tables: Dict[str, Table], name: str) -> int:
+    return list(tables).index(name) + 1
+
+
+def row_uuid(table_no: int, index: int) -> str:
+    # Deterministic, unique across tables, shaped like a v4 UUID
+    return '%08x-0000-4000-8000-%012x' % (table_no, index)
+
+
+@dataclass
+class DatasetPlan:
+    organizations: int
+    seed: int
+    # table -> offsets; org k owns rows [offsets[k], offsets[k + 1])
+    offsets: Dict[str, array]
+    global_rows: Dict[str, int]
+
+    def rows(self, table: str) -> int:
+        if table in self.global_rows:
+            return self.global_rows[table]
+        return self.offsets[table][-1]
+
+    def org_range(self, table: str, org: int) -> Tuple[int, int]:
+        offsets = self.offsets[table]
+        return offsets[org], offsets[org + 1]
+
+
+def build_plan(tables: Dict[str, Table], organizations: int, scale: float = 1.0, seed: int = 42) -> DatasetPlan:
+    """Draw a heavy-tailed tenant size distribution and lay out every table per org."""
+    rng = random.Random(seed)
+    # Pareto(1.2) weights: a few large tenants, a long tail of small ones
+    weights = [rng.paretovariate(1.2) for _ in range(organizations)]
+    mean_weight = sum(weights) / organizations
+
+    offsets = {'organizations': array('q', range(organizations + 1))}
+    for table, per_org in ROWS_PER_ORGANIZATION.items():
+        column = array('q', [0])
+        total = 0
+        for weight in weights:
+            if per_org == 1:
+                count = 1
+            else:
+                count = max(1, int(round(per_org * scale * weight / mean_weight)))
+            total += count
+            column.append(total)
+        offsets[table] = column
+    # organization_members is one row per seat: member row i of an org is its user i
+    offsets['organization_members'] = offsets['users']
+
+    global_rows = {table: count for table, count in GLOBAL_ROWS.items() if table in tables}
+    missing = set(tables) - set(offsets) - set(global_rows)
+    if missing:
+        raise ValueError(f"No row counts configured for: {', '.join(sorted(missing))}")
+    return DatasetPlan(organizations=organizations, seed=seed, offsets=offsets, global_rows=global_rows)
+
+
+_DAYS: Dict[int, str] = {}
+
+
+def _day(days: int) -> str:
+    text = _DAYS.get(days)
+    if text is None:
+        text = _DAYS[days] = time.strftime('%Y-%m-%d', time.gmtime(days * 86400))
+    return text
+
+
+def format_timestamp(seconds: int) -> str:
+    days, rest = divmod(seconds, 86400)
+    return '%sT%02d:%02d:%02dZ' % (_day(days), rest // 3600, rest // 60 % 60, rest % 60)
+
+
+def _text_pool(rng: random.Random, low: int, high: int, title: bool = False) -> List[str]:
+    # Free text is drawn from a per-column pool; building strings per row dominated runtime
+    pool = [' '.join(rng.choices(WORDS, k=rng.randrange(low, high))) for _ in range(POOL_SIZE)]
+    return [text.title() for text in pool] if title else pool
+
+
+def _value_factory(table: Table, column: Column, tables: Dict[str, Table], plan: DatasetPlan) -> Callable:
+    """Return gen(rand, org, index, row) producing one value for the column.
+
+    rand is the bound random() of the shard's generator; integer draws use
+    int(rand() * n), which is several times cheaper than randrange().
+    """
+    name, kind = column.name, column.type
+    table_no = table_number(tables, table.name)
+    pool_rng = random.Random(f'{plan.seed}:{table.name}.{name}')
+
+    if column.primary_key:
+        return lambda rand, org, index, row: row_uuid(table_no, index)
+
+    if column.references:
+        ref_table, _ = column.references
+        ref_no = table_number(tables, ref_table)
+        if ref_table == 'organizations':
+            return lambda rand, org, index, row: row_uuid(ref_no, org)
+        offsets = plan.offsets[ref_table]
+        if ref_table == table.name:
+            # Self reference (subtasks): an earlier row of the same org keeps it a forest
+            def parent(rand, org, index, row):
+                start = offsets[org]
+                return row_uuid(ref_no, start + int(rand() * (index - start))) if index > start else None
+            return parent
+        if table.name == 'organization_members' and ref_table == 'users':
+            # Member row i of an organization is its user i, so every user of an org is a member once
+            members = plan.offsets[table.name]
+            return lambda rand, org, index, row: row_uuid(ref_no, offsets[org] + index - members[org])
+
+        def reference(rand, org, index, row):
+            start = offsets[org]
+            return row_uuid(ref_no, start + int(rand() * (offsets[org + 1] - start)))
+        return reference
+
+    if name in DERIVED_TIMESTAMPS:
+        source, max_offset = DERIVED_TIMESTAMPS[name]
+        position = [c.name for c in table.columns].index(source)
+        return lambda rand, org, index, row: row[position] + 60 + int(rand() * max_offset)
+
+    if table.name == 'tasks' and name == 'position':
+        # Fractional keys spread over the organization's tasks, so every kanban column starts ordered
+        offsets = plan.offsets['tasks']
+        return lambda rand, org, index, row: spaced_key(index - offsets[org], offsets[org + 1] - offsets[org])
+
+    if kind == 'enum':
+        values = column.enum_values
+        count = len(values)
+        return lambda rand, org, index, row: values[int(rand() * count)]
+    if kind == 'boolean':
+        default = column.default == 'true'
+        return lambda rand, org, index, row: default if rand() < 0.9 else not default
+    if kind == 'timestamp':
+        # Kept as epoch seconds so derived columns can offset them; formatted on write
+        return lambda rand, org, index, row: EPOCH + int(rand() * TIME_SPAN)
+    if kind == 'date':
+        if name == 'billing_period':
+            return lambda rand, org, index, row: _day(EPOCH // 86400 + int(rand() * TIME_SPAN // 86400))[:8] + '01'
+        return lambda rand, org, index, row: _day(EPOCH // 86400 + int(rand() * TIME_SPAN // 86400))
+    if kind == 'integer':
+        low, high = column.value_range or (0, 5000)
+        return lambda rand, org, index, row: low + int(rand() * (high - low + 1))
+    if kind == 'decimal':
+        top = 10000 if name == 'budget' else 80
+        return lambda rand, org, index, row: round(rand() * top, 2)
+
+    if kind == 'inet':
+        pool = ['10.%d.%d.%d' % (pool_rng.randrange(256), pool_rng.randrange(256), pool_rng.randrange(1, 255))
+                for _ in range(POOL_SIZE)]
+    elif kind == 'jsonb':
+        pool = [json.dumps({'source': 'synthetic', 'v': pool_rng.randrange(1000)}) for _ in range(POOL_SIZE)]
+    elif kind == 'string[]':
+        pool = [pool_rng.sample(TAGS, pool_rng.randrange(0, 4)) for _ in range(POOL_SIZE)]
+    # string / text: shape by column name
+    elif 'email' in name:
+        prefix = name.split('_')[0]
+        return lambda rand, org, index, row: f'{prefix}{table_no}x{index}@example.test'
+    elif column.unique:
+        return lambda rand, org, index, row: f'{name}_{table_no:02d}{index:012x}'
+    elif name == 'phone':
+        return lambda rand, org, index, row: '+1555%07d' % int(rand() * 10 ** 7)
+    elif name.endswith('url'):
+        return lambda rand, org, index, row: f'https://example.test/{name}/{index}'
+    elif kind == 'text' or name == 'user_agent':
+        pool = _text_pool(pool_rng, 8, 40)
+    else:
+        pool = _text_pool(pool_rng, 1, 4, title=True)
+    return lambda rand, org, index, row: pool[int(rand() * POOL_SIZE)]
+
+
+def row_factory(table: Table, tables: Dict[str, Table], plan: DatasetPlan) -> Callable:
+    """Return make(rand, org, index) -> list of raw values in column order."""
+    generators = []
+    for column in table.columns:
+        gen = _value_factory(table, column, tables, plan)
+        if column.nullable:
+            gen = _nullable(gen, NULL_RATES.get(column.name, DEFAULT_NULL_RATE))
+        generators.append(gen)
+
+    def make(rand, org, index):
+        row = []
+        for gen in generators:
+            row.append(gen(rand, org, index, row))
+        return row
+    return make
+
+
+def _nullable(gen: Callable, rate: float) -> Callable:
+    def maybe(rand, org, index, row):
+        return None if rand() < rate else gen(rand, org, index, row)
+    return maybe
+
+
+def shard_org_ranges(plan: DatasetPlan, table: str, rows_per_shard: int = ROWS_PER_SHARD) -> List[Tuple[int, int]]:
+    """Split a table into shards of whole organizations of roughly rows_per_shard rows."""
+    if table in plan.global_rows:
+        return [(0, 0)]
+    offsets = plan.offsets[table]
+    shards, start = [], 0
+    for org in range(plan.organizations):
+        if offsets[org + 1] - offsets[start] >= rows_per_shard:
+            shards.append((start, org + 1))
+            start = org + 1
+    if start < plan.organizations:
+        shards.append((start, plan.organizations))
+    return shards
+
+
+def shard_seed(seed: int, table: str, shard: int) -> int:
+    return zlib.crc32(f'{seed}:{table}:{shard}'.encode())
+
+
+def _formatters(table: Table) -> List[Callable]:
+    formatters = []
+    for column in table.columns:
+        if column.type == 'timestamp':
+            formatters.append(format_timestamp)
+        elif column.type == 'boolean':
+            formatters.append(lambda value: 't' if value else 'f')
+        elif column.type == 'string[]':
+            formatters.append(lambda value: '{' + ','.join(value) + '}')
+        elif column.type in ('integer', 'decimal'):
+            formatters.append(str)
+        else:
+            formatters.append(None)
+    return formatters
+
+
+def generate_rows(tables: Dict[str, Table], plan: DatasetPlan, table: str,
+                  shard: int, org_range: Tuple[int, int]) -> Iterator[List[Optional[str]]]:
+    """Yield the rows of one shard as PostgreSQL text values (None for NULL)."""
+    rand = random.Random(shard_seed(plan.seed, table, shard)).random
+    make = row_factory(tables[table], tables, plan)
+    formatters = _formatters(tables[table])
+    positions = [(i, f) for i, f in enumerate(formatters) if f is not None]
+
+    if table in plan.global_rows:
+        orgs = [(None, range(plan.global_rows[table]))]
+    else:
+        offsets = plan.offsets[table]
+        orgs = ((org, range(offsets[org], offsets[org + 1])) for org in range(*org_range))
+    for org, indexes in orgs:
+        for index in indexes:
+            row = make(rand, org, index)
+            for i, formatter in positions:
+                if row[i] is not None:
+                    row[i] = formatter(row[i])
+            yield row
+
+
+def _csv_field(value: Optional[str]) -> str:
+    # Hand-rolled rather than csv.writer: most fields need no quoting and the
+    # writer's per-character scan was the slowest step per row. PostgreSQL
+    # reads an unquoted empty field as NULL and "" as an empty string.
+    if value is None:
+        return ''
+    if not value or ',' in value or '"' in value or '\n' in value or '\r' in value:
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def _copy_field(value: Optional[str]) -> str:
+    if value is None:
+        return '\\N'
+    if '\\' in value or '\t' in value or '\n' in value or '\r' in value:
+        value = value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    return value
+
+
+def write_shard(args) -> Tuple[str, int, int, float]:
+    """Worker entry point: stream one shard to disk in BATCH_SIZE batches."""
+    table_name, shard, org_range, out_dir, formats = args
+    tables, plan = _WORKER_STATE['tables'], _WORKER_STATE['plan']
+    started = time.perf_counter()
+
+    os.makedirs(os.path.join(out_dir, table_name), exist_ok=True)
+    files = {}
+    for fmt in formats:
+        path = os.path.join(out_dir, table_name, f'{table_name}-{shard:04d}.{fmt}')
+        files[fmt] = open(path, 'w', newline='')
+    csv_file, copy_file = files.get('csv'), files.get('copy')
+    if csv_file:
+        csv_file.write(','.join(column.name for column in tables[table_name].columns) + '\n')
+
+    count = 0
+    rows = generate_rows(tables, plan, table_name, shard, org_range)
+    while True:
+        batch = list(islice(rows, BATCH_SIZE))
+        if not batch:
+            break
+        count += len(batch)
+        if csv_file:
+            csv_file.write(''.join(','.join(map(_csv_field, row)) + '\n' for row in batch))
+        if copy_file:
+            copy_file.write(''.join('\t'.join(map(_copy_field, row)) + '\n' for row in batch))
+
+    for f in files.values():
+        f.close()
+    return table_name, shard, count, time.perf_counter() - started
+
+
+_WORKER_STATE = {}
+
+
+def _init_worker(tables, plan):
+    _WORKER_STATE['tables'] = tables
+    _WORKER_STATE['plan'] = plan
+
+
+def write_load_script(tables: Dict[str, Table], jobs: List[tuple], out_dir: str, formats: List[str]) -> str:
+    """psql script that COPYs every shard in FK order."""
+    path = os.path.join(out_dir, 'load.sql')
+    fmt = 'copy' if 'copy' in formats else 'csv'
+    options = '' if fmt == 'copy' else " WITH (FORMAT csv, HEADER true)"
+    with open(path, 'w') as f:
+        for table_name, shard, _, _, _ in jobs:
+            columns = ', '.join(column.name for column in tables[table_name].columns)
+            shard_path = os.path.join(table_name, f'{table_name}-{shard:04d}.{fmt}')
+            f.write(f"\\copy {table_name} ({columns}) FROM '{shard_path}'{options}\n")
+    return path
+
+
+def generate_dataset(organizations: int, out_dir: str, scale: float = 1.0, seed: int = 42,
+                     formats: Tuple[str, ...] = ('csv', 'copy'), workers: Optional[int] = None,
+                     rows_per_shard: int = ROWS_PER_SHARD) -> Dict[str, int]:
+    tables = load_tables()
+    plan = build_plan(tables, organizations, scale, seed)
+    jobs = [(table, shard, org_range, out_dir, list(formats))
+            for table in tables
+            for shard, org_range in enumerate(shard_org_ranges(plan, table, rows_per_shard))]
+
+    os.makedirs(out_dir, exist_ok=True)
+    counts = {table: 0 for table in tables}
+    # Largest shards first so the pool does not end on a straggler
+    ordered = sorted(jobs, key=lambda job: -_shard_rows(plan, job[0], job[2]))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(tables, plan)) as pool:
+        for table, shard, count, elapsed in pool.map(write_shard, ordered):
+            counts[table] += count
+    write_load_script(tables, jobs, out_dir, list(formats))
+    return counts
+
+
+def _shard_rows(plan: DatasetPlan, table: str, org_range: Tuple[int, int]) -> int:
+    if table in plan.global_rows:
+        return plan.global_rows[table]
+    return plan.offsets[table][org_range[1]] - plan.offsets[table][org_range[0]]
+
+
+def load_sqlite_dataset(conn, tables: Dict[str, Table], plan: DatasetPlan,
+                        only: Optional[Tuple[str, ...]] = None) -> Dict[str, int]:
+    """Insert the dataset (or just the `only` tables) into an open SQLite connection."""
+    counts = {}
+    for table in tables:
+        if only and table not in only:
+            continue
+        placeholders = ', '.join('?' for _ in tables[table].columns)
+        sql = f"INSERT INTO {table} VALUES ({placeholders})"
+        before = conn.total_changes
+        for shard, org_range in enumerate(shard_org_ranges(plan, table)):
+            conn.executemany(sql, generate_rows(tables, plan, table, shard, org_range))
+        counts[table] = conn.total_changes - before
+    conn.commit()
+    return counts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a synthetic Strive Tech dataset')
+    parser.add_argument('--organizations', type=int, default=2000)
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplier on ROWS_PER_ORGANIZATION')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--format', choices=['csv', 'copy', 'both'], default='both')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', default='strive_tech_synthetic_data')
+    args = parser.parse_args()
+
+    formats = ('csv', 'copy') if args.format == 'both' else (args.format,)
+    started = time.perf_counter()
+    counts = generate_dataset(args.organizations, args.out, args.scale, args.seed, formats, args.workers)
+    elapsed = time.perf_counter() - started
+
+    print("=== STRIVE TECH SYNTHETIC DATASET ===\n")
+    for table, count in counts.items():
+        print(f"  • {table}: {count:,} rows")
+    total = sum(counts.values())
+    print(f"\nTotal: {total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+    print(f"Files written to '{args.out}', load with: cd {args.out} && psql -f load.sql")
@@ -0,0 +1,326 @@
+# Tag index for customers.tags / tasks.tags using compressed bitmaps
+#
+# Rows of each organization are numbered densely and every (organization,
+# tag) pair gets a bitmap of the rows carrying the tag. Bitmaps are split
+# into 65536-row chunks, Roaring style: a chunk with few rows is a sorted
+# array of 16-bit offsets, a dense chunk is a 65536-bit integer. AND, OR and
+# NOT then work chunk by chunk without touching the rows themselves.
+#
+# PostgreSQL gets GIN indexes on the array columns from schema_ddl.py. The
+# benchmark emulates GIN posting lists in SQLite with an inverted
+# customer_tags table and compares both with filtering the tags of every
+# row of the organization.
+#
+# Usage: python tag_index.py --customers 10000000 --organizations 2000
+
+import argparse
+import bisect
+import json
+import random
+import sqlite3
+import time
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from benchmark_utils import format_latency, percentiles, time_calls
+from synthetic_data import TAGS
+
+CHUNK_BITS = 16
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+# Past this many rows a chunk is smaller as a bitset (8 KiB) than as an array
+ARRAY_LIMIT = 4096
+
+Container = Union[array, int]
+
+_BYTE_BITS = [tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+
+
+def _to_bitset(values: array) -> int:
+    bits = bytearray(1 << (CHUNK_BITS - 3))
+    for value in values:
+        bits[value >> 3] |= 1 << (value & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def _to_array(bitset: int) -> array:
+    raw = bitset.to_bytes(1 << (CHUNK_BITS - 3), 'little')
+    return array('H', [index << 3 | bit for index, byte in enumerate(raw) if byte for bit in _BYTE_BITS[byte]])
+
+
+def _normalize(container: Container) -> Optional[Container]:
+    if isinstance(container, int):
+        count = container.bit_count()
+        if count == 0:
+            return None
+        return _to_array(container) if count <= ARRAY_LIMIT else container
+    if not container:
+        return None
+    return _to_bitset(container) if len(container) > ARRAY_LIMIT else container
+
+
+def _filter(values: array, bitset: int, keep: bool) -> array:
+    raw = bitset.to_bytes(1 << (CHUNK_BITS - 3), 'little')
+    return array('H', [value for value in values if bool(raw[value >> 3] >> (value & 7) & 1) == keep])
+
+
+def _and(a: Container, b: Container) -> Optional[Container]:
+    if isinstance(a, int) and isinstance(b, int):
+        return _normalize(a & b)
+    if isinstance(a, int):
+        a, b = b, a
+    if isinstance(b, int):
+        return _normalize(_filter(a, b, keep=True))
+    return _normalize(array('H', sorted(set(a).intersection(b))))
+
+
+def _or(a: Container, b: Container) -> Container:
+    if isinstance(a, int) or isinstance(b, int):
+        return (a if isinstance(a, int) else _to_bitset(a)) | (b if isinstance(b, int) else _to_bitset(b))
+    return _normalize(array('H', sorted(set(a).union(b))))
+
+
+def _and_not(a: Container, b: Container) -> Optional[Container]:
+    if isinstance(a, int):
+        return _normalize(a & ~(b if isinstance(b, int) else _to_bitset(b)))
+    if isinstance(b, int):
+        return _normalize(_filter(a, b, keep=False))
+    return _normalize(array('H', sorted(set(a).difference(b))))
+
+
+class Bitmap:
+    """A compressed set of row numbers."""
+
+    __slots__ = ('chunks',)
+
+    def __init__(self, chunks: Optional[Dict[int, Container]] = None):
+        self.chunks: Dict[int, Container] = chunks or {}
+
+    @classmethod
+    def full(cls, rows: int) -> 'Bitmap':
+        """Rows 0 .. rows - 1."""
+        chunks = {}
+        for key in range((rows + CHUNK_MASK) >> CHUNK_BITS):
+            width = min(rows - (key << CHUNK_BITS), 1 << CHUNK_BITS)
+            chunks[key] = _normalize((1 << width) - 1)
+        return cls(chunks)
+
+    def add(self, row: int) -> None:
+        key, low = row >> CHUNK_BITS, row & CHUNK_MASK
+        container = self.chunks.get(key)
+        if container is None:
+            self.chunks[key] = array('H', [low])
+        elif isinstance(container, int):
+            self.chunks[key] = container | 1 << low
+        else:
+            # Rows usually arrive in order, so this is an append
+            if not container or container[-1] < low:
+                container.append(low)
+            else:
+                position = bisect.bisect_left(container, low)
+                if position == len(container) or container[position] != low:
+                    container.insert(position, low)
+            if len(container) > ARRAY_LIMIT:
+                self.chunks[key] = _to_bitset(container)
+
+    def __and__(self, other: 'Bitmap') -> 'Bitmap':
+        chunks = {}
+        for key in self.chunks.keys() & other.chunks.keys():
+            container = _and(self.chunks[key], other.chunks[key])
+            if container is not None:
+                chunks[key] = container
+        return Bitmap(chunks)
+
+    def __or__(self, other: 'Bitmap') -> 'Bitmap':
+        chunks = dict(self.chunks)
+        for key, container in other.chunks.items():
+            chunks[key] = _or(chunks[key], container) if key in chunks else container
+        return Bitmap(chunks)
+
+    def __sub__(self, other: 'Bitmap') -> 'Bitmap':
+        chunks = {}
+        for key, container in self.chunks.items():
+            if key in other.chunks:
+                container = _and_not(container, other.chunks[key])
+            if container is not None:
+                chunks[key] = container
+        return Bitmap(chunks)
+
+    def __len__(self) -> int:
+        return sum(c.bit_count() if isinstance(c, int) else len(c) for c in self.chunks.values())
+
+    def __iter__(self) -> Iterator[int]:
+        for key in sorted(self.chunks):
+            container = self.chunks[key]
+            values = _to_array(container) if isinstance(container, int) else container
+            base = key << CHUNK_BITS
+            for value in values:
+                yield base + value
+
+    @property
+    def nbytes(self) -> int:
+        return sum((1 << (CHUNK_BITS - 3)) if isinstance(c, int) else c.itemsize * len(c)
+                   for c in self.chunks.values())
+
+
+class TagIndex:
+    """Bitmaps per (organization, tag) over each organization's rows."""
+
+    def __init__(self):
+        self.row_ids: Dict[str, List] = {}
+        self.bitmaps: Dict[Tuple[str, str], Bitmap] = {}
+
+    def add(self, organization_id: str, row_id, tags: Iterable[str]) -> None:
+        rows = self.row_ids.setdefault(organization_id, [])
+        row = len(rows)
+        rows.append(row_id)
+        for tag in tags:
+            bitmap = self.bitmaps.get((organization_id, tag))
+            if bitmap is None:
+                bitmap = self.bitmaps[(organization_id, tag)] = Bitmap()
+            bitmap.add(row)
+
+    def _tag(self, organization_id: str, tag: str) -> Bitmap:
+        return self.bitmaps.get((organization_id, tag)) or Bitmap()
+
+    def query(self, organization_id: str, all_of: Sequence[str] = (), any_of: Sequence[str] = (),
+              none_of: Sequence[str] = ()) -> Bitmap:
+        """Rows having every tag of all_of, at least one of any_of and none of none_of."""
+        if all_of:
+            # Intersect the rarest tags first so the running result stays small
+            required = sorted((self._tag(organization_id, tag) for tag in all_of), key=len)
+            result = required[0]
+            for bitmap in required[1:]:
+                result = result & bitmap
+        elif any_of:
+            result = None
+        else:
+            result = Bitmap.full(len(self.row_ids.get(organization_id, ())))
+        if any_of:
+            union = Bitmap()
+            for tag in any_of:
+                union = union | self._tag(organization_id, tag)
+            result = union if result is None else result & union
+        for tag in none_of:
+            result = result - self._tag(organization_id, tag)
+        return result
+
+    def ids(self, organization_id: str, bitmap: Bitmap) -> List:
+        rows = self.row_ids.get(organization_id, [])
+        return [rows[row] for row in bitmap]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(bitmap.nbytes for bitmap in self.bitmaps.values())
+
+
+def _unindexed_sql(organization_id, all_of, any_of, none_of) -> Tuple[str, list]:
+    """Filters the tags of every row of the organization, as without a GIN index."""
+    conditions, params = ["organization_id = ?"], [organization_id]
+    for tag in all_of:
+        conditions.append("EXISTS (SELECT 1 FROM json_each(tags) WHERE value = ?)")
+        params.append(tag)
+    if any_of:
+        conditions.append(f"EXISTS (SELECT 1 FROM json_each(tags) WHERE value IN ({', '.join('?' * len(any_of))}))")
+        params.extend(any_of)
+    if none_of:
+        conditions.append(f"NOT EXISTS (SELECT 1 FROM json_each(tags) WHERE value IN ({', '.join('?' * len(none_of))}))")
+        params.extend(none_of)
+    return f"SELECT count(*) FROM customers WHERE {' AND '.join(conditions)}", params
+
+
+def _inverted_sql(organization_id, all_of, any_of, none_of) -> Tuple[str, list]:
+    """Posting-list version, as a GIN index evaluates tags @> / && conditions."""
+    postings = "SELECT customer_id FROM customer_tags WHERE organization_id = ? AND tag = ?"
+    union = "SELECT DISTINCT customer_id FROM customer_tags WHERE organization_id = ? AND tag IN ({})"
+    parts, params = [], []
+    for tag in all_of:
+        parts.append(postings)
+        params.extend((organization_id, tag))
+    if any_of:
+        parts.append(union.format(', '.join('?' * len(any_of))))
+        params.extend((organization_id, *any_of))
+    if not parts:
+        parts.append("SELECT id FROM customers WHERE organization_id = ?")
+        params.append(organization_id)
+    sql = ' INTERSECT '.join(parts)
+    if none_of:
+        sql += ' EXCEPT ' + union.format(', '.join('?' * len(none_of)))
+        params.extend((organization_id, *none_of))
+    return f"SELECT count(*) FROM ({sql})", params
+
+
+QUERIES = {
+    'A AND B': ((TAGS[0], TAGS[1]), (), ()),
+    'A OR rare': ((), (TAGS[0], TAGS[12]), ()),
+    'A AND NOT B': ((TAGS[0],), (), (TAGS[1],)),
+    '(A OR B) AND C AND NOT D': ((TAGS[2],), (TAGS[0], TAGS[1]), (TAGS[3],)),
+    'NOT A': ((), (), (TAGS[0],)),
+}
+
+
+def generate_customers(count: int, organizations: int, seed: int = 42) -> Iterator[Tuple[int, int, List[str]]]:
+    """(id, organization, tags) with heavy-tailed tenants and Zipf-distributed tags."""
+    rng = random.Random(seed)
+    weights = [rng.paretovariate(1.2) for _ in range(organizations)]
+    total = sum(weights)
+    sizes = [int(count * weight / total) for weight in weights]
+    sizes[0] += count - sum(sizes)
+    tag_weights = [1 / (rank + 1) for rank in range(len(TAGS))]
+    customer_id = 0
+    for organization, size in enumerate(sizes):
+        for _ in range(size):
+            yield customer_id, organization, sorted(set(rng.choices(TAGS, tag_weights, k=rng.randrange(0, 5))))
+            customer_id += 1
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark tag filters: bitmaps, posting lists and row filtering')
+    parser.add_argument('--customers', type=int, default=10_000_000)
+    parser.add_argument('--organizations', type=int, default=2000)
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+
+    print("=== STRIVE TECH TAG INDEX BENCHMARK ===\n")
+    conn = sqlite3.connect(':memory:')
+    conn.executescript("""
+        CREATE TABLE customers (id INTEGER PRIMARY KEY, organization_id INTEGER NOT NULL, tags TEXT);
+        CREATE TABLE customer_tags (organization_id INTEGER, tag TEXT, customer_id INTEGER,
+                                    PRIMARY KEY (organization_id, tag, customer_id)) WITHOUT ROWID;
+    """)
+    index = TagIndex()
+    started = time.perf_counter()
+    batch, postings = [], []
+    for customer_id, organization, tags in generate_customers(args.customers, args.organizations):
+        index.add(organization, customer_id, tags)
+        batch.append((customer_id, organization, json.dumps(tags)))
+        postings.extend((organization, tag, customer_id) for tag in tags)
+        if len(batch) >= 100_000:
+            conn.executemany("INSERT INTO customers VALUES (?, ?, ?)", batch)
+            conn.executemany("INSERT INTO customer_tags VALUES (?, ?, ?)", postings)
+            batch, postings = [], []
+    conn.executemany("INSERT INTO customers VALUES (?, ?, ?)", batch)
+    conn.executemany("INSERT INTO customer_tags VALUES (?, ?, ?)", postings)
+    conn.execute("CREATE INDEX idx_customers_organization_id ON customers (organization_id)")
+    conn.commit()
+    print(f"{args.customers:,} customers in {args.organizations:,} organizations loaded in "
+          f"{time.perf_counter() - started:.0f}s; bitmaps take {index.nbytes / 1024 / 1024:,.1f} MiB "
+          f"for {sum(len(bitmap) for bitmap in index.bitmaps.values()):,} tag assignments")
+
+    sizes = sorted(((len(rows), organization) for organization, rows in index.row_ids.items()), reverse=True)
+    tenants = {'largest': sizes[0], 'median': sizes[len(sizes) // 2]}
+    for label, (size, organization) in tenants.items():
+        print(f"\n{label} tenant ({size:,} customers)")
+        print("-" * 60)
+        for name, (all_of, any_of, none_of) in QUERIES.items():
+            unindexed, unindexed_params = _unindexed_sql(organization, all_of, any_of, none_of)
+            inverted, inverted_params = _inverted_sql(organization, all_of, any_of, none_of)
+            methods = {
+                'bitmap': lambda: len(index.query(organization, all_of, any_of, none_of)),
+                'posting lists': lambda: conn.execute(inverted, inverted_params).fetchone()[0],
+                'row filter': lambda: conn.execute(unindexed, unindexed_params).fetchone()[0],
+            }
+            counts = {method: run() for method, run in methods.items()}
+            agree = 'ok' if len(set(counts.values())) == 1 else f'MISMATCH {counts}'
+            print(f"  {name} ({counts['bitmap']:,} matches, {agree})")
+            for method, run in methods.items():
+                print(f"    • {method:<14} {format_latency(percentiles(time_calls(run, args.iterations, warmup=1)))}")
@@ -0,0 +1,111 @@
+# Benchmark subtask trees: recursive parent_task_id walks vs the closure table
+#
+# For each tree depth, loads synthetic subtask trees into the SQLite schema
+# with task_closure and its triggers (schema_ddl.task_closure_ddl), then
+# times subtree listings and hour rollups from tree roots and mid-level
+# tasks with both representations. Insert cost is measured with and without
+# the closure triggers, and random subtree moves check that the closure
+# table stays equal to the recursive answer.
+#
+# Usage: python task_hierarchy_benchmark.py --depths 3 5 10 15 20 --trees 200 --tree-size 500
+
+import argparse
+import random
+import time
+from typing import List, Tuple
+
+from benchmark_utils import format_latency, percentiles, time_calls
+from schema_ddl import load_sqlite, task_closure_ddl
+from schema_spec import load_tables
+from sql_queries import TASK_HIERARCHY_QUERIES, TASK_SUBTREE_CLOSURE, TASK_SUBTREE_RECURSIVE
+
+INSERT_TASK = """
+INSERT INTO tasks (id, project_id, parent_task_id, title, estimated_hours, actual_hours)
+VALUES (?, 'project', ?, ?, ?, ?)
+"""
+
+
+def build_trees(trees: int, size: int, depth: int, seed: int = 42) -> List[Tuple[str, str, int]]:
+    """(id, parent_id, depth) rows in insert order. Each tree has a chain
+    reaching `depth` levels below its root, the other nodes hang off random
+    nodes above that depth."""
+    rng = random.Random(seed)
+    rows = []
+    for tree in range(trees):
+        nodes = [(f't{tree}-0', None, 0)]
+        for level in range(1, depth + 1):
+            nodes.append((f't{tree}-{level}', nodes[-1][0], level))
+        while len(nodes) < size:
+            parent_id, _, parent_depth = nodes[rng.randrange(len(nodes))]
+            if parent_depth < depth:
+                nodes.append((f't{tree}-{len(nodes)}', parent_id, parent_depth + 1))
+        rows.extend(nodes)
+    return rows
+
+
+def load_trees(rows: List[Tuple[str, str, int]], closure: bool):
+    conn = load_sqlite(load_tables())
+    if closure:
+        conn.executescript(task_closure_ddl('sqlite'))
+    rng = random.Random(7)
+    started = time.perf_counter()
+    conn.executemany(INSERT_TASK, ((task_id, parent_id, task_id, round(rng.random() * 8, 2), round(rng.random() * 8, 2))
+                                   for task_id, parent_id, _ in rows))
+    conn.commit()
+    return conn, time.perf_counter() - started
+
+
+def subtree(conn, sql: str, task_id: str) -> List[Tuple[str, int]]:
+    return sorted((row[0], row[3]) for row in conn.execute(sql, {'task_id': task_id}))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark recursive vs closure-table subtask queries')
+    parser.add_argument('--depths', type=int, nargs='+', default=[3, 5, 10, 15, 20])
+    parser.add_argument('--trees', type=int, default=200)
+    parser.add_argument('--tree-size', type=int, default=500)
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--moves', type=int, default=200)
+    args = parser.parse_args()
+
+    print("=== STRIVE TECH SUBTASK HIERARCHY BENCHMARK (SQLite) ===\n")
+    for depth in args.depths:
+        rows = build_trees(args.trees, args.tree_size, depth)
+        plain, plain_load = load_trees(rows, closure=False)
+        conn, closure_load = load_trees(rows, closure=True)
+        closure_rows = conn.execute("SELECT count(*) FROM task_closure").fetchone()[0]
+        print(f"Depth {depth}: {len(rows):,} tasks, {closure_rows:,} closure rows")
+        print("-" * 60)
+        print(f"  • insert: {len(rows) / plain_load:,.0f} tasks/s plain, "
+              f"{len(rows) / closure_load:,.0f} tasks/s with closure triggers")
+
+        starts = {'root': 't0-0', 'mid-level': f't0-{depth // 2}'}
+        for label, task_id in starts.items():
+            size = len(subtree(conn, TASK_SUBTREE_CLOSURE, task_id))
+            print(f"  {label} task ({size:,} tasks in subtree)")
+            for name, sql in TASK_HIERARCHY_QUERIES.items():
+                stats = percentiles(time_calls(lambda: conn.execute(sql, {'task_id': task_id}).fetchall(),
+                                               args.iterations))
+                print(f"    • {name:<18} {format_latency(stats)}")
+
+        # Move random subtrees between trees, avoiding moves under their own descendants
+        rng = random.Random(depth)
+        samples = []
+        for _ in range(args.moves):
+            task_id, _, _ = rows[rng.randrange(len(rows))]
+            target, _, _ = rows[rng.randrange(len(rows))]
+            if conn.execute("SELECT 1 FROM task_closure WHERE ancestor_id = ? AND descendant_id = ?",
+                            (task_id, target)).fetchone():
+                continue
+            started = time.perf_counter()
+            conn.execute("UPDATE tasks SET parent_task_id = ? WHERE id = ?", (target, task_id))
+            conn.commit()
+            samples.append((time.perf_counter() - started) * 1000)
+        checked = [task_id for task_id, _, _ in rows[::max(len(rows) // 50, 1)]]
+        consistent = all(subtree(conn, TASK_SUBTREE_CLOSURE, task_id) == subtree(conn, TASK_SUBTREE_RECURSIVE, task_id)
+                         for task_id in checked)
+        print(f"  • {len(samples)} subtree moves: {format_latency(percentiles(samples))}, closure "
+              f"{'matches' if consistent else 'DIFFERS FROM'} the recursive walk")
+        plain.close()
+        conn.close()
+        print()
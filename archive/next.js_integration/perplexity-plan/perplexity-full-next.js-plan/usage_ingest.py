@@ -0,0 +1,551 @@
+# Coalescing ingestion of usage events into usage_tracking
+#
+# Every AI call, API call and storage or seat change is an event, but
+# usage_tracking only needs their sums: events are added up in memory per
+# (organization, user, resource_type, resource_name, billing_period) and
+# written as one row per key when MAX_PENDING_KEYS keys are pending or
+# FLUSH_INTERVAL seconds have passed. metadata.events records how many
+# events a row stands for.
+#
+# Each event is first appended to a write-ahead segment file. Appends are
+# group-committed: one write and fsync covers every event that arrived
+# while the previous one was in flight, and then the future record()
+# returned resolves, so an awaited event is durable. When the write or
+# fsync fails, that future raises the error instead, the events it covers
+# are taken back out of the pending totals and the segment is cut back to
+# its last synced length, so a failed event is never billed.
+#
+# A flush takes the unsynced lines and the pending totals in one step,
+# before it awaits anything, so events recorded while its fsync is in
+# flight belong to the next segment and not to both. It appends the lines
+# to the old segment, switches to a new one, writes the rows of the old one
+# in a single transaction together with its name in usage_ingest_batches,
+# then deletes the segment. At start-up recover() replays leftover
+# segments; a segment whose name is already in usage_ingest_batches was
+# written before the crash and is only deleted, so no event is counted
+# twice.
+#
+# The benchmark feeds synthetic events from concurrent producers that await
+# each acknowledgement and compares rows written with one row per event,
+# then crashes the pipeline three times and checks every total after
+# recovery, and fails one append part-way to check that its events are
+# refused and not billed.
+#
+# Usage: python usage_ingest.py --events 1000000 --producers 1000
+
+import argparse
+import asyncio
+import errno
+import glob
+import logging
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from schema_ddl import load_sqlite
+from schema_spec import load_tables
+
+RESOURCE_TYPES = load_tables()['usage_tracking'].column('resource_type').enum_values
+MAX_PENDING_KEYS = 50_000
+FLUSH_INTERVAL = 1.0
+SEGMENT_SUFFIX = '.wal'
+
+BATCHES_DDL = """CREATE TABLE IF NOT EXISTS usage_ingest_batches (
+  batch TEXT PRIMARY KEY,
+  row_count INTEGER NOT NULL,
+  event_count INTEGER NOT NULL,
+  flushed_at TIMESTAMP NOT NULL
+)"""
+
+# Same statements for PostgreSQL and SQLite; no row back means the batch was already written
+CLAIM_BATCH = """INSERT INTO usage_ingest_batches (batch, row_count, event_count, flushed_at)
+VALUES (:batch, :row_count, :event_count, :flushed_at)
+ON CONFLICT (batch) DO NOTHING
+RETURNING batch"""
+
+INSERT_USAGE = """INSERT INTO usage_tracking
+  (id, organization_id, user_id, resource_type, resource_name, usage_amount, billing_period, metadata, created_at)
+VALUES (:id, :organization_id, :user_id, :resource_type, :resource_name, :usage_amount, :billing_period,
+        :metadata, :created_at)"""
+
+Key = Tuple[str, str, str, str, str]
+Writer = Callable[[str, List[dict], int], bool]
+
+logger = logging.getLogger(__name__)
+
+
+def sqlite_writer(conn: sqlite3.Connection) -> Writer:
+    """Writes one segment's rows and claims its batch name in one transaction."""
+    conn.execute(BATCHES_DDL)
+
+    def write(batch: str, rows: List[dict], events: int) -> bool:
+        with conn:
+            claimed = conn.execute(CLAIM_BATCH, {'batch': batch, 'row_count': len(rows), 'event_count': events,
+                                                 'flushed_at': datetime.now(timezone.utc).isoformat()}).fetchone()
+            if claimed is None:
+                return False
+            conn.executemany(INSERT_USAGE, rows)
+        return True
+    return write
+
+
+def parse_line(line: str) -> Tuple[Key, int]:
+    *key, amount = line.rstrip('\n').split('\t')
+    return tuple(key), int(amount)
+
+
+def read_segment(path: str) -> Dict[Key, List[int]]:
+    """Coalesced totals of a segment; a line cut short by a crash has no newline and is skipped."""
+    with open(path, encoding='utf-8') as handle:
+        lines = handle.read().split('\n')
+    pending: Dict[Key, List[int]] = {}
+    for line in lines[:-1]:
+        key, amount = parse_line(line)
+        totals = pending.get(key)
+        if totals is None:
+            pending[key] = [amount, 1]
+        else:
+            totals[0] += amount
+            totals[1] += 1
+    return pending
+
+
+@dataclass
+class IngestStats:
+    events: int = 0
+    syncs: int = 0
+    failed_syncs: int = 0
+    failed_events: int = 0
+    wal_bytes: int = 0
+    flushes: int = 0
+    rows_written: int = 0
+    segments_recovered: int = 0
+    segments_skipped: int = 0
+
+
+class UsageIngestor:
+    """Coalesces usage events in memory, backed by write-ahead segments."""
+
+    def __init__(self, write: Writer, wal_dir: str, max_pending_keys: int = MAX_PENDING_KEYS,
+                 flush_interval: float = FLUSH_INTERVAL):
+        self.write = write
+        self.wal_dir = wal_dir
+        self.max_pending_keys = max_pending_keys
+        self.flush_interval = flush_interval
+        self.pending: Dict[Key, List[int]] = {}
+        self.stats = IngestStats()
+        self._events_pending = 0
+        self._lines: List[str] = []
+        self._ack: Optional[asyncio.Future] = None
+        self._unsynced = asyncio.Event()
+        self._segment: Optional[str] = None
+        self._segment_bytes = 0
+        self._file = None
+        self._sequence = 0
+        self._wal_lock = asyncio.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._flushing: Optional[asyncio.Task] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        os.makedirs(self.wal_dir, exist_ok=True)
+        await self.recover()
+        self._open_segment()
+        self._tasks = [asyncio.create_task(self._sync_loop()), asyncio.create_task(self._flush_loop())]
+
+    def record(self, organization_id: str, user_id: str, resource_type: str, resource_name: str, amount: int,
+               billing_period: str) -> asyncio.Future:
+        """Add one event; the returned future resolves once the event is on disk."""
+        if resource_type not in RESOURCE_TYPES:
+            raise ValueError(f"unknown resource_type {resource_type!r}")
+        if '\t' in resource_name or '\n' in resource_name:
+            raise ValueError(f"resource_name {resource_name!r} contains a tab or newline")
+        key = (organization_id, user_id, resource_type, resource_name, billing_period)
+        self._lines.append(f"{organization_id}\t{user_id}\t{resource_type}\t{resource_name}\t{billing_period}\t{amount}\n")
+        totals = self.pending.get(key)
+        if totals is None:
+            self.pending[key] = [amount, 1]
+            if len(self.pending) >= self.max_pending_keys:
+                self._flush_soon()
+        else:
+            totals[0] += amount
+            totals[1] += 1
+        self._events_pending += 1
+        self.stats.events += 1
+        if self._ack is None:
+            self._ack = asyncio.get_running_loop().create_future()
+            self._unsynced.set()
+        return self._ack
+
+    async def sync(self) -> None:
+        async with self._wal_lock:
+            await self._sync_locked()
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            async with self._wal_lock:
+                # No await until the lines and the totals they add up to are both taken
+                lines, ack = self._take_lines()
+                segment, pending, events = self._segment, self.pending, self._events_pending
+                self.pending, self._events_pending = {}, 0
+                events -= await self._append_lines(lines, ack, pending)
+                self._file.close()
+                self._open_segment()
+            await asyncio.to_thread(self._write_segment, segment, pending, events)
+
+    async def recover(self) -> None:
+        for path in sorted(glob.glob(os.path.join(self.wal_dir, f'*{SEGMENT_SUFFIX}'))):
+            pending = read_segment(path)
+            if not pending:
+                os.remove(path)
+                continue
+            events = sum(totals[1] for totals in pending.values())
+            if await asyncio.to_thread(self._write_segment, path, pending, events):
+                self.stats.segments_recovered += 1
+            else:
+                self.stats.segments_skipped += 1
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.flush()
+        self._file.close()
+        os.remove(self._segment)
+
+    def _open_segment(self) -> None:
+        self._sequence += 1
+        name = f"{time.time_ns():020d}-{self._sequence:06d}{SEGMENT_SUFFIX}"
+        self._segment = os.path.join(self.wal_dir, name)
+        self._segment_bytes = 0
+        self._file = open(self._segment, 'a', encoding='utf-8')
+
+    async def _sync_locked(self) -> None:
+        lines, ack = self._take_lines()
+        self._events_pending -= await self._append_lines(lines, ack, self.pending)
+
+    def _take_lines(self) -> Tuple[List[str], Optional[asyncio.Future]]:
+        lines, ack = self._lines, self._ack
+        self._lines, self._ack = [], None
+        self._unsynced.clear()
+        return lines, ack
+
+    async def _append_lines(self, lines: List[str], ack: Optional[asyncio.Future],
+                            pending: Dict[Key, List[int]]) -> int:
+        """Append lines to the current segment and resolve their ack; returns how many events failed.
+
+        On a failed write or fsync the ack raises the error, the events come
+        back out of pending and the segment is cut back to what was synced.
+        """
+        if not lines:
+            return 0
+        data = ''.join(lines)
+        try:
+            await asyncio.to_thread(self._append, self._file, data)
+        except OSError as error:
+            ack.set_exception(error)
+            for line in lines:
+                key, amount = parse_line(line)
+                totals = pending[key]
+                totals[0] -= amount
+                totals[1] -= 1
+                if totals[1] == 0:
+                    del pending[key]
+            self.stats.failed_syncs += 1
+            self.stats.failed_events += len(lines)
+            await asyncio.to_thread(self._reopen_segment)
+            return len(lines)
+        self.stats.syncs += 1
+        self.stats.wal_bytes += len(data)
+        self._segment_bytes += len(data.encode())
+        ack.set_result(None)
+        return 0
+
+    def _reopen_segment(self) -> None:
+        """Drop whatever a failed append left past the synced length, buffered or on disk."""
+        try:
+            self._file.close()
+        except OSError:
+            pass
+        try:
+            os.truncate(self._segment, self._segment_bytes)
+        finally:
+            self._file = open(self._segment, 'a', encoding='utf-8')
+
+    @staticmethod
+    def _append(handle, data: str) -> None:
+        handle.write(data)
+        handle.flush()
+        os.fsync(handle.fileno())
+
+    def _write_segment(self, path: str, pending: Dict[Key, List[int]], events: int) -> bool:
+        """Write a segment's rows unless its batch is already stored, then delete it."""
+        written = False
+        if pending:
+            batch = os.path.basename(path)[:-len(SEGMENT_SUFFIX)]
+            created_at = datetime.now(timezone.utc).isoformat()
+            rows = [{'id': str(uuid.uuid4()), 'organization_id': key[0], 'user_id': key[1],
+                     'resource_type': key[2], 'resource_name': key[3], 'usage_amount': amount,
+                     'billing_period': key[4], 'metadata': f'{{"events": {count}, "batch": "{batch}"}}',
+                     'created_at': created_at}
+                    for key, (amount, count) in pending.items()]
+            written = self.write(batch, rows, events)
+            if written:
+                self.stats.flushes += 1
+                self.stats.rows_written += len(rows)
+        os.remove(path)
+        return written
+
+    def _flush_soon(self) -> None:
+        if self._flushing is None or self._flushing.done():
+            self._flushing = asyncio.create_task(self.flush())
+
+    async def _sync_loop(self) -> None:
+        while True:
+            await self._unsynced.wait()
+            try:
+                await self.sync()
+            except OSError:
+                # Failed appends already reached their producers; this is the segment repair failing
+                logger.exception("Could not cut back WAL segment %s", self._segment)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self._flush_soon()
+
+
+def make_events(count: int, organizations: int, seed: int) -> List[tuple]:
+    """(organization, user, resource_type, resource_name, amount, billing_period) events, busy organizations first."""
+    rng = random.Random(seed)
+    names = {
+        'ai_tokens': ['openai_gpt4', 'claude_sonnet', 'gemini'],
+        'api_calls': [f'/api/v1/{resource}' for resource in ('customers', 'projects', 'tasks', 'invoices',
+                                                                 'appointments', 'content', 'search', 'webhooks')],
+        'storage': ['attachments', 'exports'],
+        'seats': ['members'],
+    }
+    org_weights = [1 / (rank + 1) for rank in range(organizations)]
+    orgs = rng.choices(range(organizations), org_weights, k=count)
+    types = rng.choices(RESOURCE_TYPES, [60, 35, 4, 1], k=count)
+    events = []
+    for org, resource_type in zip(orgs, types):
+        amount = rng.randint(50, 4000) if resource_type == 'ai_tokens' else 1
+        period = '2026-10-01' if rng.random() < 0.999 else '2026-09-01'
+        events.append((f'org-{org}', f'user-{org}-{rng.randrange(8)}', resource_type,
+                       rng.choice(names[resource_type]), amount, period))
+    return events
+
+
+def expected_totals(events: List[tuple]) -> Dict[Key, int]:
+    totals: Dict[Key, int] = {}
+    for organization_id, user_id, resource_type, resource_name, amount, period in events:
+        key = (organization_id, user_id, resource_type, resource_name, period)
+        totals[key] = totals.get(key, 0) + amount
+    return totals
+
+
+def stored_totals(conn: sqlite3.Connection) -> Dict[Key, int]:
+    rows = conn.execute("SELECT organization_id, user_id, resource_type, resource_name, billing_period, "
+                        "SUM(usage_amount) FROM usage_tracking GROUP BY 1, 2, 3, 4, 5").fetchall()
+    return {tuple(row[:5]): row[5] for row in rows}
+
+
+def open_database(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode = WAL")
+    load_sqlite(load_tables(), conn)
+    return conn
+
+
+async def produce(ingestor: UsageIngestor, events: List[tuple], producers: int) -> None:
+    async def producer(offset: int):
+        for index in range(offset, len(events), producers):
+            await ingestor.record(*events[index])
+    await asyncio.gather(*(producer(offset) for offset in range(producers)))
+
+
+async def run_pipeline(directory: str, events: List[tuple],
+                       producers: int) -> Tuple[IngestStats, sqlite3.Connection, float]:
+    conn = open_database(os.path.join(directory, 'coalesced.db'))
+    ingestor = UsageIngestor(sqlite_writer(conn), os.path.join(directory, 'wal'))
+    await ingestor.start()
+    started = time.perf_counter()
+    await produce(ingestor, events, producers)
+    acknowledged = time.perf_counter() - started
+    await ingestor.close()
+    return ingestor.stats, conn, acknowledged
+
+
+class SimulatedCrash(Exception):
+    pass
+
+
+def crash(ingestor: UsageIngestor) -> None:
+    """The process dies here: pending totals and unsynced lines are gone, the segment stays."""
+    for task in ingestor._tasks:
+        task.cancel()
+    ingestor._file.close()
+
+
+async def crash_and_recover(directory: str, events: List[tuple], producers: int) -> Tuple[IngestStats, bool]:
+    """Crash three times, replaying the segments left each time.
+
+    First after the first quarter is synced; then right after a flush during
+    whose slowed fsync the third quarter was recorded, once those events are
+    synced to the next segment; then after the last flush commits but before
+    its segment goes. Only explicit flushes run, so no flush is still in a
+    worker thread when the simulated process dies.
+    """
+    conn = open_database(os.path.join(directory, 'crash.db'))
+    wal_dir = os.path.join(directory, 'crash-wal')
+    write = sqlite_writer(conn)
+    first, second, third = (len(events) * part // 4 for part in (1, 2, 3))
+
+    ingestor = UsageIngestor(write, wal_dir, max_pending_keys=len(events), flush_interval=3600)
+    await ingestor.start()
+    await produce(ingestor, events[:first], producers)
+    await ingestor.sync()
+    crash(ingestor)
+
+    ingestor = UsageIngestor(write, wal_dir, max_pending_keys=len(events), flush_interval=3600)
+    await ingestor.start()
+    recovered = ingestor.stats.segments_recovered
+    for task in ingestor._tasks:
+        task.cancel()  # syncs are explicit too, so the flush below is the one that fsyncs
+    in_fsync = threading.Event()
+
+    def slow_append(handle, data):
+        in_fsync.set()
+        time.sleep(0.2)
+        UsageIngestor._append(handle, data)
+    ingestor._append = slow_append
+    acks = {ingestor.record(*event) for event in events[first:second]}
+    flushing = asyncio.create_task(ingestor.flush())
+    await asyncio.to_thread(in_fsync.wait)
+    acks.update(ingestor.record(*event) for event in events[second:third])
+    await flushing
+    await ingestor.sync()
+    await asyncio.gather(*acks)
+    crash(ingestor)
+
+    def commit_then_crash(batch, rows, count):
+        write(batch, rows, count)
+        raise SimulatedCrash(batch)
+
+    ingestor = UsageIngestor(write, wal_dir, max_pending_keys=len(events), flush_interval=3600)
+    await ingestor.start()
+    recovered += ingestor.stats.segments_recovered
+    await produce(ingestor, events[third:], producers)
+    ingestor.write = commit_then_crash
+    try:
+        await ingestor.flush()
+    except SimulatedCrash:
+        pass
+    crash(ingestor)
+
+    ingestor = UsageIngestor(write, wal_dir)
+    await ingestor.start()
+    stats = ingestor.stats
+    stats.segments_recovered += recovered
+    await ingestor.close()
+    return stats, stored_totals(conn) == expected_totals(events)
+
+
+async def failed_append(directory: str, events: List[tuple]) -> Tuple[IngestStats, bool]:
+    """Fail one append after half its bytes reach the segment; returns whether only the acknowledged events count.
+
+    The failed group's future must raise, the sync loop must keep acknowledging
+    later events, the segment must hold exactly the acknowledged events and
+    the flushed totals must leave the failed ones out.
+    """
+    conn = open_database(os.path.join(directory, 'failed-append.db'))
+    ingestor = UsageIngestor(sqlite_writer(conn), os.path.join(directory, 'failed-append-wal'),
+                             max_pending_keys=len(events), flush_interval=3600)
+    await ingestor.start()
+    first, second = len(events) // 3, len(events) * 2 // 3
+    await asyncio.gather(*{ingestor.record(*event) for event in events[:first]})
+
+    def disk_full(handle, data):
+        handle.write(data[:len(data) // 2])
+        handle.flush()
+        raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))
+    ingestor._append = disk_full
+    failing = {ingestor.record(*event) for event in events[first:second]}
+    refused = all(isinstance(result, OSError)
+                  for result in await asyncio.gather(*failing, return_exceptions=True))
+    del ingestor._append
+    await asyncio.wait_for(asyncio.gather(*{ingestor.record(*event) for event in events[second:]}), timeout=10)
+    acknowledged = events[:first] + events[second:]
+    on_disk = {key: totals[0] for key, totals in read_segment(ingestor._segment).items()}
+    await ingestor.close()
+    correct = refused and on_disk == expected_totals(acknowledged) == stored_totals(conn)
+    conn.close()
+    return ingestor.stats, correct
+
+
+def insert_per_event(directory: str, events: List[tuple], batch_size: int = 10_000) -> float:
+    """Baseline: one usage_tracking row per event, committed in batches; returns seconds."""
+    conn = open_database(os.path.join(directory, 'per-event.db'))
+    created_at = datetime.now(timezone.utc).isoformat()
+    started = time.perf_counter()
+    for start in range(0, len(events), batch_size):
+        with conn:
+            conn.executemany(INSERT_USAGE, [
+                {'id': str(uuid.uuid4()), 'organization_id': event[0], 'user_id': event[1], 'resource_type': event[2],
+                 'resource_name': event[3], 'usage_amount': event[4], 'billing_period': event[5],
+                 'metadata': '{}', 'created_at': created_at}
+                for event in events[start:start + batch_size]])
+    elapsed = time.perf_counter() - started
+    conn.close()
+    return elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark coalescing usage event ingestion')
+    parser.add_argument('--events', type=int, default=1_000_000)
+    parser.add_argument('--organizations', type=int, default=2_000)
+    parser.add_argument('--producers', type=int, default=1000)
+    args = parser.parse_args()
+
+    events = make_events(args.events, args.organizations, seed=42)
+    per_million = 1_000_000 / args.events
+    print("=== STRIVE TECH USAGE INGESTION BENCHMARK ===\n")
+    print(f"{args.events:,} events from {args.organizations:,} organizations, {args.producers} producers "
+          f"awaiting every acknowledgement\n")
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        stats, conn, acknowledged = asyncio.run(run_pipeline(directory, events, args.producers))
+        elapsed = time.perf_counter() - started
+        correct = stored_totals(conn) == expected_totals(events)
+        conn.close()
+        baseline = insert_per_event(directory, events)
+        print("Throughput")
+        print("-" * 60)
+        print(f"  • coalesced pipeline: {args.events / acknowledged:>10,.0f} events/s acknowledged, "
+              f"{args.events / elapsed:,.0f} events/s including start-up and the last flush")
+        print(f"    {'':<19} {stats.syncs:,} WAL syncs ({args.events / stats.syncs:,.0f} events each), "
+              f"{stats.wal_bytes / 1024 / 1024:,.1f} MiB of WAL")
+        print(f"  • one row per event:  {args.events / baseline:>10,.0f} events/s for the inserts alone")
+        print("\nDatabase rows")
+        print("-" * 60)
+        print(f"  • coalesced: {stats.rows_written * per_million:>10,.0f} rows per million events "
+              f"in {stats.flushes} flushes; totals {'match' if correct else 'DO NOT MATCH'} the events")
+        print(f"  • per event: {1_000_000:>10,} rows per million events")
+
+        stats, correct = asyncio.run(crash_and_recover(directory, events, args.producers))
+        print("\nCrash recovery")
+        print("-" * 60)
+        print(f"  • {stats.segments_recovered} segment(s) replayed, {stats.segments_skipped} already written and "
+              f"skipped; totals {'match' if correct else 'DO NOT MATCH'} the events")
+
+        stats, correct = asyncio.run(failed_append(directory, events))
+        print(f"  • append failed part-way: {stats.failed_events:,} events refused, later events acknowledged; "
+              f"segment and totals {'hold only acknowledged events' if correct else 'DO NOT MATCH'}")
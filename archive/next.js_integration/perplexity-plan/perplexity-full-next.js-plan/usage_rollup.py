@@ -0,0 +1,230 @@
+# Vectorized usage rollup for billing periods
+#
+# Aggregates usage_tracking events into per-organization, per-resource,
+# per-period totals with NumPy. Events arrive in chunks of parallel arrays
+# (organization index, resource code, period, amount); each chunk is folded
+# into the running totals with one np.bincount per billing period it touches.
+#
+# A period is closed when its invoice is cut. Events that arrive later for a
+# closed period still count towards its totals and are also kept as
+# adjustments to bill on the next invoice. rebuild_period() recomputes one
+# period from the raw events, for corrections and for checking the
+# incremental totals.
+#
+# The benchmark streams synthetic events (a configurable share of them late)
+# through the engine and reports throughput, then rebuilds one period and
+# compares it with the incremental totals.
+#
+# Usage: python usage_rollup.py --events 100000000 --organizations 20000
+
+import argparse
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from schema_spec import load_tables
+
+CHUNK_SIZE = 1_000_000
+
+# Codes for usage_tracking.resource_type, in script_1.py order
+RESOURCE_TYPES = load_tables()['usage_tracking'].column('resource_type').enum_values
+
+
+def period_index(billing_period: str) -> int:
+    """'2025-03-01' -> months since year 0, so consecutive periods differ by one."""
+    return int(billing_period[:4]) * 12 + int(billing_period[5:7]) - 1
+
+
+def period_label(period: int) -> str:
+    return f"{period // 12:04d}-{period % 12 + 1:02d}-01"
+
+
+@dataclass
+class EventChunk:
+    organization: np.ndarray  # int32 organization index
+    resource: np.ndarray      # int8 code into RESOURCE_TYPES
+    period: np.ndarray        # int32 period_index
+    amount: np.ndarray        # int64 usage_amount
+
+    def __len__(self) -> int:
+        return len(self.amount)
+
+
+@dataclass
+class RollupStats:
+    events: int = 0
+    chunks: int = 0
+    late_events: int = 0
+
+
+class UsageRollup:
+    """Running totals[period][organization, resource] over ingested events."""
+
+    def __init__(self, organizations: int, resources: int = len(RESOURCE_TYPES)):
+        self.organizations = organizations
+        self.resources = resources
+        self.totals: Dict[int, np.ndarray] = {}
+        self.adjustments: Dict[int, np.ndarray] = {}
+        self.closed: Set[int] = set()
+        self.stats = RollupStats()
+
+    def _grid(self, store: Dict[int, np.ndarray], period: int) -> np.ndarray:
+        grid = store.get(period)
+        if grid is None or grid.shape[0] < self.organizations:
+            grown = np.zeros((self.organizations, self.resources), dtype=np.int64)
+            if grid is not None:
+                grown[:grid.shape[0]] = grid
+            grid = store[period] = grown
+        return grid
+
+    def _sums(self, organization: np.ndarray, resource: np.ndarray, amount: np.ndarray) -> np.ndarray:
+        cells = organization.astype(np.int64) * self.resources + resource
+        # bincount sums in float64, exact while a cell stays below 2**53
+        sums = np.bincount(cells, weights=amount, minlength=self.organizations * self.resources)
+        return np.rint(sums).astype(np.int64).reshape(self.organizations, self.resources)
+
+    def ingest(self, chunk: EventChunk) -> None:
+        if len(chunk) == 0:
+            return
+        top = int(chunk.organization.max()) + 1
+        if top > self.organizations:
+            self.organizations = top
+        low, high = int(chunk.period.min()), int(chunk.period.max())
+        for period in range(low, high + 1):
+            if low == high:
+                organization, resource, amount = chunk.organization, chunk.resource, chunk.amount
+            else:
+                selected = chunk.period == period
+                if not selected.any():
+                    continue
+                organization, resource, amount = (chunk.organization[selected], chunk.resource[selected],
+                                                  chunk.amount[selected])
+            sums = self._sums(organization, resource, amount)
+            self._grid(self.totals, period)[:] += sums
+            if period in self.closed:
+                self._grid(self.adjustments, period)[:] += sums
+                self.stats.late_events += len(amount)
+        self.stats.events += len(chunk)
+        self.stats.chunks += 1
+
+    def close_period(self, period: int) -> np.ndarray:
+        """Mark a period invoiced and return its totals as billed."""
+        self.closed.add(period)
+        return self._grid(self.totals, period).copy()
+
+    def take_adjustments(self, period: int) -> Optional[np.ndarray]:
+        """Late usage for a closed period since the last call, to bill on the next invoice."""
+        return self.adjustments.pop(period, None)
+
+    def rebuild_period(self, period: int, chunks: Iterable[EventChunk]) -> np.ndarray:
+        """Recompute one period from raw events and replace its running totals."""
+        rebuilt = np.zeros((self.organizations, self.resources), dtype=np.int64)
+        for chunk in chunks:
+            selected = chunk.period == period
+            if selected.any():
+                rebuilt += self._sums(chunk.organization[selected], chunk.resource[selected], chunk.amount[selected])
+        self.totals[period] = rebuilt
+        return rebuilt
+
+    def totals_for(self, period: int) -> Dict[Tuple[int, str], int]:
+        """Non-zero {(organization, resource_type): total} for a period."""
+        grid = self._grid(self.totals, period)
+        organizations, resources = np.nonzero(grid)
+        return {(int(org), RESOURCE_TYPES[res]): int(grid[org, res]) for org, res in zip(organizations, resources)}
+
+
+def chunks_from_rows(rows: Iterable[tuple], organization_ids: Dict[str, int],
+                     chunk_size: int = CHUNK_SIZE) -> Iterator[EventChunk]:
+    """EventChunks from (organization_id, resource_type, billing_period, usage_amount)
+    rows, e.g. a cursor over usage_tracking. New organizations get the next index."""
+    resource_codes = {name: code for code, name in enumerate(RESOURCE_TYPES)}
+    buffer: List[tuple] = []
+
+    def flush() -> EventChunk:
+        organization, resource, period, amount = zip(*buffer)
+        buffer.clear()
+        return EventChunk(np.array(organization, dtype=np.int32), np.array(resource, dtype=np.int8),
+                          np.array(period, dtype=np.int32), np.array(amount, dtype=np.int64))
+
+    for organization_id, resource_type, billing_period, usage_amount in rows:
+        organization = organization_ids.setdefault(organization_id, len(organization_ids))
+        buffer.append((organization, resource_codes[resource_type], period_index(billing_period), usage_amount or 0))
+        if len(buffer) == chunk_size:
+            yield flush()
+    if buffer:
+        yield flush()
+
+
+def synthetic_chunks(events: int, organizations: int, periods: int, first_period: int,
+                     late_share: float, seed: int = 42, chunk_size: int = CHUNK_SIZE) -> Iterator[EventChunk]:
+    """Events in arrival order over `periods` months; late_share of them belong
+    to one of the three periods before the one being written."""
+    rng = np.random.default_rng(seed)
+    # Heavy-tailed tenant sizes, as in synthetic_data.py
+    weights = rng.pareto(1.2, organizations) + 1
+    cumulative = np.cumsum(weights / weights.sum())
+    for start in range(0, events, chunk_size):
+        size = min(chunk_size, events - start)
+        current = first_period + start * periods // events
+        period = np.full(size, current, dtype=np.int32)
+        late = rng.random(size) < late_share
+        period[late] -= rng.integers(1, 4, int(late.sum()), dtype=np.int32)
+        np.maximum(period, first_period, out=period)
+        yield EventChunk(
+            organization=np.minimum(np.searchsorted(cumulative, rng.random(size)), organizations - 1).astype(np.int32),
+            resource=rng.integers(0, len(RESOURCE_TYPES), size, dtype=np.int8),
+            period=period,
+            amount=rng.integers(1, 5001, size, dtype=np.int64),
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the vectorized usage rollup')
+    parser.add_argument('--events', type=int, default=20_000_000)
+    parser.add_argument('--organizations', type=int, default=20_000)
+    parser.add_argument('--periods', type=int, default=12)
+    parser.add_argument('--late-share', type=float, default=0.02)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    first_period = period_index('2025-01-01')
+    stream = lambda: synthetic_chunks(args.events, args.organizations, args.periods, first_period,  # noqa: E731
+                                      args.late_share, chunk_size=args.chunk_size)
+
+    print("=== STRIVE TECH USAGE ROLLUP BENCHMARK ===\n")
+    started = time.perf_counter()
+    generated = sum(len(chunk) for chunk in stream())
+    generation = time.perf_counter() - started
+    print(f"{generated:,} events, {args.organizations:,} organizations, {args.periods} periods, "
+          f"{args.late_share:.0%} late (generating them alone takes {generation:.1f}s)")
+
+    rollup = UsageRollup(args.organizations)
+    elapsed = 0.0
+    invoiced = {}
+    for chunk in stream():
+        started = time.perf_counter()
+        rollup.ingest(chunk)
+        elapsed += time.perf_counter() - started
+        # Cut the invoice for a period once events have moved two periods past it
+        newest = int(chunk.period.max())
+        for period in range(first_period, newest - 1):
+            if period not in rollup.closed:
+                invoiced[period] = rollup.close_period(period)
+    print("-" * 60)
+    print(f"  • ingest: {elapsed:.1f}s ({rollup.stats.events / elapsed / 1e6:,.1f}M events/s)")
+    adjusted = {period: rollup.take_adjustments(period) for period in sorted(rollup.closed)}
+    late_total = sum(int(grid.sum()) for grid in adjusted.values() if grid is not None)
+    print(f"  • {len(invoiced)} periods invoiced, {rollup.stats.late_events:,} late events "
+          f"adding {late_total:,} units as adjustments")
+
+    period = first_period + args.periods // 2
+    incremental = rollup.totals[period].copy()
+    started = time.perf_counter()
+    rebuilt = rollup.rebuild_period(period, stream())
+    print(f"  • rebuild of {period_label(period)} from raw events: {time.perf_counter() - started:.1f}s, "
+          f"{'matches' if np.array_equal(rebuilt, incremental) else 'DIFFERS FROM'} the incremental totals")
+    billed = invoiced.get(period)
+    if billed is not None:
+        print(f"  • billed at close {int(billed.sum()):,} units, final {int(rebuilt.sum()):,} units")